@@ -5,21 +5,207 @@ This module provides a FastAPI server that serves as an API for the LinkedIn Pro
 """
 
 import os
+import asyncio
+import hmac
+import logging
 from typing import Dict, List, Any, Optional
-from fastapi import FastAPI, HTTPException, Body
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Body, Header, Query, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field
 import uvicorn
-import json
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
 from query_processor import ProfileQueryProcessor
+from query_executor import ExecutorOverloaded, QueryExecutor
+from profile_listing import ProfileListing, etag_matches, parse_fields
+from profile_writer import ProfileWriter
+from profile_watcher import ProfileWatcher
+from profile_ingest import BulkIngestor, validate_profile_data
+from profile_io import JSON_DECODER
+from profile_model import CompactProfile
+from profile_snapshot import DEFAULT_SNAPSHOT_PATH
+from metrics import REGISTRY, RequestTimingMiddleware
+from request_profiler import RequestProfiler
+from outbound_dispatcher import OutboundDispatcher
+from webhook_queue import WebhookQueue
+from caches import DedupCache
+from wati_integration import AsyncWatiAPIClient, webhook_message_key
+
+logger = logging.getLogger(__name__)
+
+# Response class for JSON results; "orjson" serializes large results several times faster
+JSON_RESPONSE = os.environ.get("JSON_RESPONSE", "json")
+if JSON_RESPONSE == "orjson" and JSON_DECODER != "orjson":
+    logger.warning("JSON_RESPONSE=orjson requires the orjson package, using json")
+    JSON_RESPONSE = "json"
+ResultResponse = ORJSONResponse if JSON_RESPONSE == "orjson" else JSONResponse
 
 app = FastAPI(
     title="LinkedIn Profile Query Bot API",
     description="API for processing natural language queries about LinkedIn profiles",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ResultResponse
 )
 
+# Compress responses of at least COMPRESSION_MIN_BYTES for clients that accept it
+RESPONSE_COMPRESSION = os.environ.get("RESPONSE_COMPRESSION", "gzip")
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", "1024"))
+if RESPONSE_COMPRESSION == "br":
+    try:
+        from brotli_asgi import BrotliMiddleware
+    except ImportError:
+        logger.warning("RESPONSE_COMPRESSION=br requires the brotli-asgi package, using gzip")
+        RESPONSE_COMPRESSION = "gzip"
+    else:
+        # Falls back to gzip for clients that do not accept brotli
+        app.add_middleware(BrotliMiddleware, quality=4, minimum_size=COMPRESSION_MIN_BYTES, gzip_fallback=True)
+if RESPONSE_COMPRESSION == "gzip":
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_BYTES, compresslevel=6)
+
+# Outermost middleware, so request durations include compression
+app.add_middleware(RequestTimingMiddleware)
+
+# Leave the full query result out of /wati-webhook responses
+WEBHOOK_SLIM_RESPONSE = os.environ.get("WEBHOOK_SLIM_RESPONSE", "0") == "1"
+
+# Query processor settings, also used to build the processors of worker processes
+PROCESSOR_OPTIONS = {
+    "profiles_dir": os.environ.get("PROFILES_DIR", "profiles"),
+    "parse_cache_size": int(os.environ.get("PARSE_CACHE_SIZE", "0")),
+    "response_cache_bytes": int(os.environ.get("RESPONSE_CACHE_BYTES", "0")),
+    "profile_store": os.environ.get("PROFILE_STORE", "eager"),
+    "max_loaded_profiles": int(os.environ.get("MAX_LOADED_PROFILES", "1024")),
+    "load_workers": int(os.environ.get("PROFILE_LOAD_WORKERS", "0")) or None,
+    "snapshot_path": os.environ.get("PROFILE_SNAPSHOT", DEFAULT_SNAPSHOT_PATH) or None
+}
+
 # Initialize the query processor
-processor = ProfileQueryProcessor(profiles_dir="profiles")
+processor = ProfileQueryProcessor(**PROCESSOR_OPTIONS)
+
+# Run query processing off the event loop
+executor = QueryExecutor(
+    processor,
+    mode=os.environ.get("QUERY_EXECUTION_MODE", "thread"),
+    workers=int(os.environ.get("QUERY_WORKERS", "4")),
+    max_pending=int(os.environ.get("QUERY_MAX_PENDING", "64")),
+    processor_options=PROCESSOR_OPTIONS
+)
+
+# Applies profile files added, changed or deleted in the profiles directory by other tools
+# or other server workers; polling starts with the app
+PROFILE_WATCH_INTERVAL = float(os.environ.get("PROFILE_WATCH_INTERVAL", "2"))
+profile_watcher: Optional[ProfileWatcher] = None
+
+def profile_written(profile_id: str) -> None:
+    """Propagate a profile written by this server to query worker processes."""
+    executor.profile_changed(profile_id)
+    if profile_watcher:
+        # The processor already holds this version
+        profile_watcher.mark_current(profile_id)
+
+# Persists added profiles in the background; worker processes reload them once written
+profile_writer = ProfileWriter(processor.profiles_dir, on_written=profile_written)
+
+# Profiles still being written are not reloaded, since their files may be older than memory
+if PROFILE_WATCH_INTERVAL > 0:
+    profile_watcher = ProfileWatcher(processor, PROFILE_WATCH_INTERVAL, on_change=executor.profile_changed,
+                                     is_writing=profile_writer.is_writing)
+
+# Applies streamed NDJSON uploads in batches
+bulk_ingestor = BulkIngestor(processor, profile_writer)
+
+# Serialized /profiles pages, rebuilt when the corpus changes
+profile_listing = ProfileListing(processor)
+
+def _cache_samples(field: str):
+    """Collect a counter of every enabled cache for /metrics."""
+    stats = processor.stats()
+    for cache in ("parse_cache", "response_cache", "profile_store"):
+        if stats[cache] is not None:
+            yield (cache,), stats[cache][field]
+
+def _cache_hit_ratios():
+    """Collect the hit ratio of every enabled cache for /metrics."""
+    stats = processor.stats()
+    for cache in ("parse_cache", "response_cache", "profile_store"):
+        if stats[cache] is not None:
+            lookups = stats[cache]["hits"] + stats[cache]["misses"]
+            yield (cache,), stats[cache]["hits"] / lookups if lookups else 0.0
+
+def _resident_profiles():
+    """Collect the number of full profiles in memory for /metrics."""
+    store_stats = processor.stats()["profile_store"]
+    yield (), store_stats["loaded"] if store_stats else len(processor.loaded_profiles)
+
+REGISTRY.callback("cache_hits_total", "Cache hits", "counter", ("cache",), lambda: _cache_samples("hits"))
+REGISTRY.callback("cache_misses_total", "Cache misses", "counter", ("cache",), lambda: _cache_samples("misses"))
+REGISTRY.callback("cache_evictions_total", "Cache evictions", "counter", ("cache",),
+                  lambda: _cache_samples("evictions"))
+REGISTRY.callback("cache_hit_ratio", "Cache hits per lookup since startup", "gauge", ("cache",), _cache_hit_ratios)
+REGISTRY.callback("profiles_loaded", "Number of profiles available for queries", "gauge", (),
+                  lambda: [((), len(processor.loaded_profiles))])
+REGISTRY.callback("profiles_resident", "Number of full profiles held in memory", "gauge", (), _resident_profiles)
+REGISTRY.callback("profile_startup_load_seconds", "Duration of the last full profile load", "gauge", (),
+                  lambda: [((), processor.last_load_seconds)])
+REGISTRY.callback("query_executor_pending", "Query tasks queued or running", "gauge", (),
+                  lambda: [((), executor.stats()["pending"])])
+REGISTRY.callback("query_executor_rejected_total", "Query tasks rejected because too many were pending",
+                  "counter", (), lambda: [((), executor.stats()["rejected"])])
+REGISTRY.callback("profile_watcher_last_scan_seconds", "Duration of the last scan of the profiles directory",
+                  "gauge", (), lambda: [((), profile_watcher.stats()["last_scan_seconds"])] if profile_watcher else [])
+REGISTRY.callback("profile_writer_pending", "Profiles waiting to be written", "gauge", (),
+                  lambda: [((), profile_writer.stats()["pending"])])
+
+# Token required by the /admin endpoints; they are disabled when it is not set
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+# /wati-webhook sends replies back through the Wati API when a key is set; otherwise
+# replies are only returned in the webhook response
+WATI_API_KEY = os.environ.get("WATI_API_KEY")
+WATI_API_URL = os.environ.get("WATI_API_URL", "https://api.wati.io/api/v1")
+if WATI_API_KEY and aiohttp is None:
+    raise ImportError("Sending webhook replies requires the aiohttp package (pip install -r requirements.txt)")
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "10"))
+
+# Outbound reply dispatcher settings; one sender per pooled connection
+OUTBOUND_OPTIONS = {
+    "rate": float(os.environ.get("WATI_SEND_RATE", "10")),
+    "burst": int(os.environ.get("WATI_SEND_BURST", "20")),
+    "concurrency": HTTP_POOL_SIZE,
+    "max_queue": int(os.environ.get("WATI_SEND_QUEUE_SIZE", "10000")),
+    "max_retries": int(os.environ.get("WATI_SEND_RETRIES", "5"))
+}
+
+# When replies are sent through the Wati API, /wati-webhook acknowledges message events
+# at once and queues them for background processing
+WEBHOOK_QUEUE_SIZE = int(os.environ.get("WEBHOOK_QUEUE_SIZE", "1000"))
+WEBHOOK_CONSUMERS = int(os.environ.get("WEBHOOK_CONSUMERS", "8"))
+WEBHOOK_OVERFLOW = os.environ.get("WEBHOOK_OVERFLOW", "reject")
+
+# Created on startup, inside the event loop of each server worker
+wati_client: Optional[AsyncWatiAPIClient] = None
+reply_dispatcher: Optional[OutboundDispatcher] = None
+webhook_queue: Optional[WebhookQueue] = None
+
+# Remembers recently accepted webhook messages, so redeliveries are answered only once
+WEBHOOK_DEDUP_TTL = float(os.environ.get("WEBHOOK_DEDUP_TTL", "600"))
+webhook_dedup = (DedupCache(int(os.environ.get("WEBHOOK_DEDUP_SIZE", "50000")), WEBHOOK_DEDUP_TTL)
+                 if WEBHOOK_DEDUP_TTL > 0 else None)
+
+REGISTRY.callback("webhook_duplicates_suppressed_total", "Redelivered webhook messages that were not processed again",
+                  "counter", (),
+                  lambda: [((), webhook_dedup.stats()["duplicates"])] if webhook_dedup is not None else [])
+REGISTRY.callback("webhook_queue_depth", "Webhook events queued or being processed", "gauge", (),
+                  lambda: [((), webhook_queue.depth)] if webhook_queue else [])
+
+# Profiles the next N /query or /wati-webhook requests when armed through /admin/profiling
+request_profiler = RequestProfiler(os.environ.get("PROFILING_DIR", "profiling"))
+
+# Maximum number of queries accepted by /query/batch
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", "1000"))
 
 class QueryRequest(BaseModel):
     """Request model for profile queries."""
@@ -32,48 +218,225 @@ class WatiRequest(BaseModel):
     event: str
     userData: Dict[str, Any]
     payload: Dict[str, Any]
+    id: Optional[str] = None
+    whatsappMessageId: Optional[str] = None
+    timestamp: Optional[str] = None
 
 class ProfileSummary(BaseModel):
-    """Model for profile summary response."""
-    profile_id: str
-    name: str
+    """Model for profile summary response; only the fields selected with ?fields= are present."""
+    profile_id: Optional[str] = None
+    name: Optional[str] = None
     headline: Optional[str] = None
 
+class ProfilingRequest(BaseModel):
+    """Request model for arming the request profiler."""
+    requests: int = Field(10, ge=1, le=1000)
+
+def require_admin(token: Optional[str]) -> None:
+    """Reject admin requests without the configured admin token."""
+    if not ADMIN_TOKEN or not token or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+async def run_query(query: str) -> Dict[str, Any]:
+    """Process a single query, under the profiler if it is armed."""
+    # Only a flag check when profiling is off. A query the executor is about to reject
+    # does not take a profiling slot; nothing awaits between this check and submission
+    if request_profiler.armed and not executor.overloaded:
+        session = request_profiler.take()
+        if session is not None:
+            # Merging the statistics and saving the finished artifact happen off the event loop
+            loop = asyncio.get_running_loop()
+            try:
+                results, stats = await executor.process_queries_profiled([query])
+            except Exception:
+                await loop.run_in_executor(None, request_profiler.record, session, {}, [query])
+                raise
+            await loop.run_in_executor(None, request_profiler.record, session, stats, [query])
+            return results[0]
+    return await executor.process_query(query)
+
+def overloaded_error(e: ExecutorOverloaded) -> HTTPException:
+    """Build the response for queries rejected because the executor is overloaded."""
+    return HTTPException(status_code=503, detail=f"Server is busy: {str(e)}", headers={"Retry-After": "1"})
+
+@app.on_event("startup")
+async def start_background_services():
+    """Start watching the profiles directory and the Wati reply dispatcher, in every server worker process."""
+    global wati_client, reply_dispatcher, webhook_queue
+    if profile_watcher:
+        profile_watcher.start()
+    if WATI_API_KEY:
+        wati_client = AsyncWatiAPIClient(
+            WATI_API_KEY,
+            WATI_API_URL,
+            pool_size=HTTP_POOL_SIZE,
+            timeout=float(os.environ.get("HTTP_TIMEOUT", "10"))
+        )
+        reply_dispatcher = OutboundDispatcher(wati_client.send_message, name="wati_webhook", **OUTBOUND_OPTIONS)
+        reply_dispatcher.start()
+        webhook_queue = WebhookQueue(process_queued_webhook, WEBHOOK_QUEUE_SIZE, WEBHOOK_CONSUMERS,
+                                     WEBHOOK_OVERFLOW, on_drop=forget_webhook)
+        webhook_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown_executor():
+    """Stop background services, write pending profiles and stop the query worker pool."""
+    if profile_watcher:
+        profile_watcher.stop()
+    if webhook_queue:
+        # Answer the acknowledged events; their replies go to the dispatcher
+        await webhook_queue.close(timeout=10.0)
+    if reply_dispatcher:
+        # Send the queued replies before closing their connections
+        await reply_dispatcher.close(timeout=10.0)
+    if wati_client:
+        await wati_client.close()
+    profile_writer.close()
+    executor.shutdown()
+
 @app.get("/")
 async def root():
     """API root endpoint."""
     return {"message": "LinkedIn Profile Query Bot API"}
 
-@app.get("/profiles", response_model=List[ProfileSummary])
-async def list_profiles():
-    """List all available profiles."""
-    profiles = []
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Export metrics in the Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+# The body is serialized by ProfileListing, so it is documented here rather than validated
+@app.get("/profiles", responses={
+    200: {
+        "model": List[ProfileSummary],
+        "description": "Profile summaries with the requested fields",
+        "headers": {
+            "ETag": {"description": "Version of this page", "schema": {"type": "string"}},
+            "X-Next-Cursor": {"description": "Cursor of the next page, if any", "schema": {"type": "string"}}
+        }
+    },
+    304: {"description": "The page matches If-None-Match"},
+    400: {"description": "Unknown field or invalid cursor"}
+})
+async def list_profiles(
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of profiles to return"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header of the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields: profile_id, name, headline"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    List available profiles, sorted by profile ID.
+
+    When more profiles are available, the cursor of the next page is returned
+    in the X-Next-Cursor header. Responses carry an ETag; a matching
+    If-None-Match header gets 304 Not Modified.
+    """
+    try:
+        body, etag, next_cursor = profile_listing.page(parse_fields(fields), cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # Get profiles from processor's loaded profiles
-    for profile_id, profile_data in processor.loaded_profiles.items():
-        profiles.append({
-            "profile_id": profile_id,
-            "name": profile_data["basics"]["name"],
-            "headline": profile_data["basics"].get("headline")
-        })
+    headers = {"ETag": etag}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
 
-    return profiles
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @app.post("/query")
 async def process_query(request: QueryRequest):
     """Process a query about a LinkedIn profile."""
     try:
-        result = processor.process_query(request.query)
-        return result
+        result = await run_query(request.query)
+        # Results are plain JSON types, so they are serialized directly
+        return ResultResponse(result)
+    except ExecutorOverloaded as e:
+        raise overloaded_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/query/batch")
+async def process_query_batch(batch: List[QueryRequest]):
+    """
+    Process a batch of queries about LinkedIn profiles.
+
+    Results are returned in the same order as the queries.
+    """
+    if len(batch) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch size is limited to {MAX_BATCH_SIZE} queries")
+
+    try:
+        return ResultResponse(await executor.process_queries([request.query for request in batch]))
+    except ExecutorOverloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def answer_message(request: WatiRequest) -> Dict[str, Any]:
+    """Answer a webhook message event and queue the reply for the Wati API."""
+    message_text = request.payload.get("text", "")
+    result = await run_query(message_text)
+
+    # Prepare response for Wati
+    if result["success"]:
+        response_text = result["response"]
+    else:
+        available_profiles = ", ".join(result.get("available_profiles", []))
+        response_text = f"{result['error']}. Available profiles: {available_profiles}"
+
+    # Queue the reply for the dispatcher, which sends it through the Wati API
+    # within the rate limit and retries it if Wati is rate limiting or failing
+    whatsapp_number = request.userData.get("waId")
+    reply = "disabled"
+    if reply_dispatcher and whatsapp_number:
+        reply = "queued" if reply_dispatcher.submit(whatsapp_number, response_text) else "dropped"
+
+    response = {
+        "status": "success",
+        "response": response_text,
+        "whatsapp_number": whatsapp_number,
+        "reply": reply
+    }
+    if not WEBHOOK_SLIM_RESPONSE:
+        response["query_result"] = result
+    return response
+
+def request_message_key(request: WatiRequest) -> Optional[str]:
+    """Build the key identifying redeliveries of a webhook message."""
+    return webhook_message_key({
+        "id": request.id,
+        "whatsappMessageId": request.whatsappMessageId,
+        "timestamp": request.timestamp,
+        "userData": request.userData,
+        "payload": request.payload
+    })
+
+def forget_webhook(request: WatiRequest) -> None:
+    """Let a redelivery of a message that was dropped from the webhook queue be processed."""
+    if webhook_dedup is not None:
+        message_key = request_message_key(request)
+        if message_key is not None:
+            webhook_dedup.discard(message_key)
+
+async def process_queued_webhook(request: WatiRequest) -> None:
+    """Answer an acknowledged webhook event, waiting for the query executor when it is busy."""
+    for attempt in range(5):
+        try:
+            await answer_message(request)
+            return
+        except ExecutorOverloaded:
+            # The event cannot be retried by Wati any more, so wait instead of failing it
+            await asyncio.sleep(0.1 * 2 ** attempt)
+    await answer_message(request)
+
 @app.post("/wati-webhook")
 async def wati_webhook(request: WatiRequest = Body(...)):
     """
     Webhook endpoint for Wati integration.
 
     This endpoint receives messages from Wati and processes LinkedIn profile queries.
+    When replies are sent through the Wati API, message events are acknowledged at
+    once and processed in the background.
     """
     try:
         # Check if this is a message event
@@ -85,55 +448,70 @@ async def wati_webhook(request: WatiRequest = Body(...)):
         if not message_text:
             return {"status": "ignored", "reason": "No message text"}
 
-        # Process the query
-        result = processor.process_query(message_text)
-
-        # Prepare response for Wati
-        if result["success"]:
-            response_text = result["response"]
-        else:
-            available_profiles = ", ".join(result.get("available_profiles", []))
-            response_text = f"{result['error']}. Available profiles: {available_profiles}"
-
-        # In a real implementation, this would send a response back to Wati API
-        # Here we just return what would be sent
-        return {
-            "status": "success",
-            "response": response_text,
-            "whatsapp_number": request.userData.get("waId"),
-            "query_result": result
-        }
+        # Wati redelivers events it saw no timely response to; answer each message once
+        message_key = None
+        if webhook_dedup is not None:
+            message_key = request_message_key(request)
+            if message_key is not None and webhook_dedup.seen(message_key):
+                return {"status": "duplicate"}
+
+        if webhook_queue:
+            if webhook_queue.submit(request):
+                if message_key is not None:
+                    webhook_dedup.add(message_key)
+                return {"status": "accepted"}
+            if WEBHOOK_OVERFLOW == "reject":
+                raise HTTPException(status_code=503, detail="Webhook queue is full", headers={"Retry-After": "1"})
+            return {"status": "dropped"}
+
+        # No reply is sent through the Wati API, so it is returned in the response
+        if message_key is not None:
+            webhook_dedup.add(message_key)
+        try:
+            return ResultResponse(await answer_message(request))
+        except Exception:
+            if message_key is not None:
+                # Let a redelivery of the message try again
+                webhook_dedup.discard(message_key)
+            raise
+    except HTTPException:
+        raise
+    except ExecutorOverloaded as e:
+        raise overloaded_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/add-profile")
 async def add_profile(profile_data: Dict[str, Any] = Body(...)):
     """
-    Add a new LinkedIn profile to the system.
+    Add a new LinkedIn profile to the system, or replace an existing one.
 
-    In a real implementation, this would validate and process the profile data.
+    The profile is queryable as soon as this returns; it is written to the
+    profiles directory in the background.
     """
     try:
         # Validate required fields
-        if not profile_data.get("profile_id"):
-            raise HTTPException(status_code=400, detail="profile_id is required")
-
-        if not profile_data.get("basics") or not profile_data["basics"].get("name"):
-            raise HTTPException(status_code=400, detail="basics.name is required")
+        try:
+            profile_id = validate_profile_data(profile_data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-        # Save profile to file
-        profile_id = profile_data["profile_id"]
-        profile_file = os.path.join(processor.profiles_dir, f"{profile_id}.json")
+        try:
+            profile = CompactProfile.from_dict(profile_id, profile_data)
+            processor.validate_profile(profile)
+        except (KeyError, TypeError, AttributeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid profile data: {str(e)}")
 
-        # Create directory if it doesn't exist
-        os.makedirs(processor.profiles_dir, exist_ok=True)
+        # Both calls can block: the write waits while the writer's queue is full, and the
+        # upsert waits for the index lock while reloads and bulk batches are applied
+        loop = asyncio.get_running_loop()
 
-        # Write profile data to file
-        with open(profile_file, "w") as f:
-            json.dump(profile_data, f, indent=2)
+        # Save profile to file; queued first, so the profile watcher does not reload an
+        # older file over the new profile
+        await loop.run_in_executor(None, profile_writer.write, profile_id, profile_data)
 
-        # Reload profile in processor
-        processor._load_profile(profile_id)
+        # Update the in-memory store and indexes straight from the payload
+        await loop.run_in_executor(None, processor.upsert_compact_profiles, [profile])
 
         return {"status": "success", "profile_id": profile_id}
     except HTTPException:
@@ -141,6 +519,50 @@ async def add_profile(profile_data: Dict[str, Any] = Body(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/admin/profiling")
+async def start_profiling(request: ProfilingRequest, x_admin_token: Optional[str] = Header(None)):
+    """Profile the next N /query or /wati-webhook requests into one artifact."""
+    require_admin(x_admin_token)
+    profile_id = request_profiler.arm(request.requests)
+    return {"status": "armed", "profile_id": profile_id, "requests": request.requests}
+
+@app.get("/admin/profiling")
+async def profiling_status(x_admin_token: Optional[str] = Header(None)):
+    """Show the active profiling session and the saved artifacts."""
+    require_admin(x_admin_token)
+    return request_profiler.status()
+
+@app.get("/admin/profiling/{profile_id}")
+async def profiling_summary(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Get the hot functions of a saved profile."""
+    require_admin(x_admin_token)
+    path = request_profiler.artifact_path(profile_id, ".json")
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return FileResponse(path, media_type="application/json")
+
+@app.get("/admin/profiling/{profile_id}/download")
+async def profiling_download(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Download a saved profile in the pstats format."""
+    require_admin(x_admin_token)
+    path = request_profiler.artifact_path(profile_id, ".prof")
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+
+@app.post("/profiles/bulk")
+async def bulk_add_profiles(request: Request):
+    """
+    Add or replace many profiles from a streamed NDJSON body, one profile per line.
+
+    Records are validated and stored as the upload arrives. Invalid records
+    are skipped; the summary reports counts and the first errors by line number.
+    """
+    try:
+        return ResultResponse(await bulk_ingestor.ingest(request.stream()))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 if __name__ == "__main__":
     # Create profiles directory if it doesn't exist
     os.makedirs("profiles", exist_ok=True)
@@ -0,0 +1,972 @@
+"""
+LinkedIn Profile Query Bot - Benchmarks
+
+This script provides microbenchmarks for the query processing pipeline.
+Run a single suite with, for example:
+
+    python benchmark.py keywords
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import string
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from keyword_matcher import KeywordMatcher
+from profile_index import ProfileNameIndex
+
+SAMPLE_QUERIES = [
+    "What is the educational qualification of John Smith?",
+    "Where did Sara Johnson study?",
+    "What is Michael Zhang's current job?",
+    "Tell me about Priya Patel's work experience at Tech Corp",
+    "What skills does James Wilson have?",
+    "Does John Smith speak Spanish?",
+    "Where is Sara Johnson located?",
+    "Tell me about Michael Zhang's certifications",
+    "How can I contact Priya Patel?",
+    "Tell me about James Wilson",
+]
+
+
+def time_per_call(func: Callable[[], object], min_seconds: float = 0.2) -> float:
+    """
+    Measure the average wall time of a callable.
+
+    Args:
+        func: Zero-argument callable to measure
+        min_seconds: Minimum total measurement time
+
+    Returns:
+        Average seconds per call
+    """
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_seconds:
+        for _ in range(100):
+            func()
+        calls += 100
+        elapsed = time.perf_counter() - start
+    return elapsed / calls
+
+
+def _random_words(rng: random.Random, count: int) -> List[str]:
+    return ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+            for _ in range(count)]
+
+
+def bench_keywords(args: argparse.Namespace) -> None:
+    """Compare naive keyword scanning with the compiled matcher as tables grow."""
+    rng = random.Random(42)
+    queries = [query.lower() for query in SAMPLE_QUERIES]
+
+    print(f"{'categories':>10} {'keywords':>9} {'naive us/query':>15} {'matcher us/query':>17}")
+    for extra_categories in (0, 24, 120, 500):
+        tables: Dict[str, List[str]] = {
+            "education": ["education", "degree", "university", "college", "school"],
+            "experience": ["experience", "work", "job", "position", "company"],
+            "skills": ["skill", "expertise", "proficiency", "know", "knows"],
+            "languages": ["language", "speak", "speaking", "fluent", "native"],
+            "certifications": ["certification", "certificate", "certified", "license"],
+            "location": ["location", "located", "live", "lives", "based"],
+            "contact": ["contact", "email", "phone", "website", "reach"],
+            "general": ["about", "profile", "background", "summary", "tell me about"],
+        }
+        for index in range(extra_categories):
+            tables[f"category_{index}"] = _random_words(rng, 12)
+
+        matcher = KeywordMatcher(tables)
+        keyword_count = sum(len(keywords) for keywords in tables.values())
+
+        def naive():
+            for query in queries:
+                for keywords in tables.values():
+                    sum(keyword in query for keyword in keywords)
+
+        def compiled():
+            for query in queries:
+                matcher.find(query)
+
+        naive_us = time_per_call(naive, args.seconds) / len(queries) * 1e6
+        matcher_us = time_per_call(compiled, args.seconds) / len(queries) * 1e6
+        print(f"{len(tables):>10} {keyword_count:>9} {naive_us:>15.2f} {matcher_us:>17.2f}")
+
+
+def _synthetic_names(rng: random.Random, count: int) -> List[str]:
+    onsets = list("bcdfghjklmnprstvwyz") + ["ch", "sh", "th", "br", "tr", "st", "gr", "kr"]
+    vowels = list("aeiou") + ["ai", "ou", "ee", "ia"]
+    codas = [""] * 6 + list("lmnrst") + ["nd", "rt"]
+
+    def word():
+        syllables = rng.randint(2, 3)
+        return "".join(rng.choice(onsets) + rng.choice(vowels) + rng.choice(codas)
+                       for _ in range(syllables)).capitalize()
+
+    first_names = [word() for _ in range(3000)]
+    last_names = [word() for _ in range(30000)]
+    return [f"{rng.choice(first_names)} {rng.choice(last_names)}" for _ in range(count)]
+
+
+def _typo(rng: random.Random, name: str, edits: int = 1) -> str:
+    chars = list(name)
+    for _ in range(edits):
+        position = rng.randrange(1, len(chars) - 1)
+        if chars[position] != " " and chars[position + 1] != " ":
+            chars[position], chars[position + 1] = chars[position + 1], chars[position]
+    return "".join(chars)
+
+
+def bench_fuzzy(args: argparse.Namespace) -> None:
+    """Measure typo-tolerant name lookups against the trigram index."""
+    rng = random.Random(7)
+
+    print(f"{'profiles':>9} {'typos':>6} {'build s':>8} {'us/lookup':>10} {'p99 us':>8} {'recall':>7}")
+    for count, edits in ((1000, 1), (10000, 1), (100000, 1), (100000, 2)):
+        names = _synthetic_names(rng, count)
+        index = ProfileNameIndex()
+        start = time.perf_counter()
+        for position, name in enumerate(names):
+            index.add(f"profile-{position}", name)
+        build_seconds = time.perf_counter() - start
+
+        samples = rng.sample(range(count), 500)
+        latencies = []
+        found = 0
+        for position in samples:
+            query = _typo(rng, names[position], edits)
+            start = time.perf_counter()
+            match = index.match_similar_name(query)
+            latencies.append(time.perf_counter() - start)
+            if match and index._names[match[0]] == index._names[f"profile-{position}"]:
+                found += 1
+
+        latencies.sort()
+        mean_us = sum(latencies) / len(latencies) * 1e6
+        p99_us = latencies[int(len(latencies) * 0.99)] * 1e6
+        print(f"{count:>9} {edits:>6} {build_seconds:>8.2f} {mean_us:>10.1f} {p99_us:>8.1f} {found / len(samples):>7.1%}")
+
+
+def synthetic_profile(rng: random.Random, profile_id: str, name: str) -> Dict[str, Any]:
+    """
+    Build a synthetic profile following the schema of the profiles directory.
+
+    Companies, skills, institutions and languages are drawn from small
+    shared pools, as they are in real corpora.
+    """
+    companies = [f"Company {index}" for index in range(500)]
+    titles = ["Software Engineer", "Senior Software Engineer", "Data Scientist", "Product Manager",
+              "Marketing Director", "DevOps Engineer", "UX Designer", "Engineering Manager"]
+    institutions = [f"University {index}" for index in range(200)]
+    degrees = ["Bachelor of Science in Computer Science", "Master of Science in Computer Science",
+               "MBA", "Bachelor of Arts in Economics", "PhD in Statistics"]
+    skills = [f"Skill {index}" for index in range(300)]
+    languages = ["English", "Spanish", "Mandarin", "Hindi", "French", "German", "Arabic"]
+    proficiencies = ["Native", "Professional working proficiency", "Elementary proficiency"]
+    cities = [f"City {index}" for index in range(100)]
+
+    return {
+        "profile_id": profile_id,
+        "basics": {
+            "name": name,
+            "headline": f"{rng.choice(titles)} at {rng.choice(companies)}",
+            "location": rng.choice(cities),
+            "summary": f"{name} is an experienced professional with {rng.randint(2, 25)} years in the industry.",
+            "profile_url": f"https://linkedin.com/in/{profile_id}",
+            "captured_at": "2025-04-27T10:30:00.000Z"
+        },
+        "contact_info": {
+            "email": f"{profile_id}@example.com",
+            "phone": f"+1{rng.randint(1000000000, 9999999999)}",
+            "websites": [f"https://{profile_id}.dev"],
+            "twitter": f"@{profile_id}"
+        },
+        "experience": [
+            {
+                "title": rng.choice(titles),
+                "company": rng.choice(companies),
+                "location": rng.choice(cities),
+                "duration": f"Jan {2010 + index * 3} - Dec {2012 + index * 3}",
+                "description": "Led development of internal tools and customer-facing services."
+            }
+            for index in range(rng.randint(1, 4))
+        ],
+        "education": [
+            {
+                "degree": rng.choice(degrees),
+                "institution": rng.choice(institutions),
+                "date_range": f"{2000 + index * 4} - {2004 + index * 4}",
+                "description": "Graduated with honors."
+            }
+            for index in range(rng.randint(1, 2))
+        ],
+        "skills": rng.sample(skills, rng.randint(5, 15)),
+        "languages": [{"language": language, "proficiency": rng.choice(proficiencies)}
+                      for language in rng.sample(languages, rng.randint(1, 3))],
+        "certifications": [{"name": f"Certification {rng.randint(0, 99)}", "issuer": rng.choice(companies),
+                            "date": str(rng.randint(2015, 2024))}
+                           for _ in range(rng.randint(0, 3))]
+    }
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _measure_representation(representation: str, count: int, connection) -> None:
+    """Build a corpus in a fresh process and report the growth of its peak RSS."""
+    from profile_model import CompactProfile
+
+    rng = random.Random(11)
+    names = _synthetic_names(rng, count)
+    baseline = _peak_rss_bytes()
+
+    profiles = {}
+    for position, name in enumerate(names):
+        profile_id = f"profile-{position}"
+        # Round-trip through JSON text so strings are not shared, as with json.load from disk
+        data = json.loads(json.dumps(synthetic_profile(rng, profile_id, name)))
+        if representation == "compact":
+            profiles[profile_id] = CompactProfile.from_dict(profile_id, data)
+        else:
+            profiles[profile_id] = data
+
+    connection.send(_peak_rss_bytes() - baseline)
+    connection.close()
+
+
+def bench_memory(args: argparse.Namespace) -> None:
+    """Compare resident memory of dict and compact profile representations."""
+    print(f"{'profiles':>9} {'dict MB':>9} {'compact MB':>11} {'ratio':>6}")
+    for count in (10000, 100000):
+        results = {}
+        for representation in ("dict", "compact"):
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            worker = multiprocessing.Process(target=_measure_representation,
+                                             args=(representation, count, sender))
+            worker.start()
+            results[representation] = receiver.recv()
+            worker.join()
+
+        dict_mb = results["dict"] / 2 ** 20
+        compact_mb = results["compact"] / 2 ** 20
+        print(f"{count:>9} {dict_mb:>9.1f} {compact_mb:>11.1f} {dict_mb / compact_mb:>6.2f}")
+
+
+def write_synthetic_corpus(profiles_dir: str, count: int, seed: int = 3) -> None:
+    """Write a synthetic corpus of profile files, one JSON file per profile."""
+    rng = random.Random(seed)
+    os.makedirs(profiles_dir, exist_ok=True)
+    for position, name in enumerate(_synthetic_names(rng, count)):
+        profile_id = f"profile-{position}"
+        with open(os.path.join(profiles_dir, f"{profile_id}.json"), "w") as f:
+            json.dump(synthetic_profile(rng, profile_id, name), f, indent=2)
+
+
+def bench_startup(args: argparse.Namespace) -> None:
+    """Compare sequential, parallel and snapshot loading of the profiles directory."""
+    import profile_io
+    from profile_snapshot import build_snapshot
+    from query_processor import ProfileQueryProcessor
+
+    decoders = [("json", None)]
+    if profile_io.orjson is not None:
+        decoders.append(("orjson", profile_io.orjson))
+
+    with tempfile.TemporaryDirectory() as profiles_dir:
+        write_synthetic_corpus(profiles_dir, args.profiles)
+
+        print(f"{'profiles':>9} {'store':>6} {'decoder':>8} {'workers':>8} {'seconds':>8}")
+        for store in ("eager", "lazy"):
+            for decoder_name, decoder in decoders:
+                for workers in (1, profile_io.default_load_workers()):
+                    profile_io.orjson = decoder
+                    start = time.perf_counter()
+                    ProfileQueryProcessor(profiles_dir, profile_store=store, load_workers=workers)
+                    seconds = time.perf_counter() - start
+                    print(f"{args.profiles:>9} {store:>6} {decoder_name:>8} {workers:>8} {seconds:>8.2f}")
+
+        snapshot_path = os.path.join(profiles_dir, "profiles.snapshot")
+        build_snapshot(profiles_dir, snapshot_path)
+        for store in ("eager", "lazy"):
+            start = time.perf_counter()
+            ProfileQueryProcessor(profiles_dir, profile_store=store, snapshot_path=snapshot_path)
+            seconds = time.perf_counter() - start
+            print(f"{args.profiles:>9} {store:>6} {'snapshot':>8} {'-':>8} {seconds:>8.2f}")
+
+
+def bench_concurrency(args: argparse.Namespace) -> None:
+    """Measure query latency under a mix of fast and slow queries for each execution mode."""
+    import asyncio
+    from query_executor import QueryExecutor
+    from query_processor import ProfileQueryProcessor
+
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory() as profiles_dir:
+        write_synthetic_corpus(profiles_dir, args.profiles)
+        processor_options = {"profiles_dir": profiles_dir}
+        processor = ProfileQueryProcessor(**processor_options)
+        names = [processor.name_index._names[profile_id] for profile_id in rng.sample(list(processor.loaded_profiles), 200)]
+
+        # Fast: exact-name lookups. Slow: batches of misspelled names needing fuzzy matching.
+        fast_queries = [f"Where is {name} located?" for name in names]
+        slow_batches = [[f"Where did {_typo(rng, name, 2)} study?" for name in rng.choices(names, k=1000)]
+                        for _ in range(20)]
+
+        async def request(executor: QueryExecutor, queries: List[str], scheduled: float,
+                          latencies: List[float]) -> None:
+            await executor.process_queries(queries)
+            latencies.append(time.perf_counter() - scheduled)
+
+        async def run(executor: QueryExecutor, seconds: float) -> Dict[str, List[float]]:
+            # Open-loop load: requests arrive on a fixed schedule, and latency includes
+            # any time spent waiting for a blocked event loop
+            arrivals = [(offset / 200.0, "fast") for offset in range(int(seconds * 200))]
+            arrivals += [(offset / 2.0, "slow") for offset in range(int(seconds * 2))]
+            arrivals.sort()
+
+            latencies: Dict[str, List[float]] = {"fast": [], "slow": []}
+            tasks = []
+            start = time.perf_counter()
+            for position, (offset, kind) in enumerate(arrivals):
+                delay = start + offset - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                queries = [fast_queries[position % len(fast_queries)]] if kind == "fast" else \
+                    slow_batches[position % len(slow_batches)]
+                tasks.append(asyncio.ensure_future(request(executor, queries, start + offset, latencies[kind])))
+            await asyncio.gather(*tasks)
+            return latencies
+
+        print(f"{'mode':>8} {'workers':>8} {'fast p50 ms':>12} {'fast p99 ms':>12} {'slow p50 ms':>12} {'slow p99 ms':>12}")
+        for mode, workers in (("inline", 1), ("thread", 4), ("process", 2), ("process", 4)):
+            executor = QueryExecutor(processor, mode=mode, workers=workers, processor_options=processor_options)
+            if mode == "process":
+                # Worker processes load their own corpus before taking queries
+                asyncio.run(executor.process_query(fast_queries[0]))
+                time.sleep(processor.last_load_seconds * workers)
+            latencies = asyncio.run(run(executor, max(args.seconds, 5.0)))
+            executor.shutdown()
+
+            fast = sorted(latencies["fast"])
+            slow = sorted(latencies["slow"])
+            print(f"{mode:>8} {workers:>8} {fast[len(fast) // 2] * 1e3:>12.2f} {fast[int(len(fast) * 0.99)] * 1e3:>12.2f} "
+                  f"{slow[len(slow) // 2] * 1e3:>12.2f} {slow[int(len(slow) * 0.99)] * 1e3:>12.2f}")
+
+
+def bench_ingest(args: argparse.Namespace) -> None:
+    """Compare synchronous write-and-reload ingestion with in-memory upserts and write-behind."""
+    from profile_writer import ProfileWriter
+    from query_processor import ProfileQueryProcessor
+
+    rng = random.Random(5)
+    count = min(args.profiles, 5000)
+    names = _synthetic_names(rng, count // 2)
+    # Every profile is updated twice, as when a client re-sends a profile
+    updates = [synthetic_profile(rng, f"profile-{position % len(names)}", names[position % len(names)])
+               for position in range(count)]
+
+    print(f"{'method':>12} {'profiles':>9} {'request us':>11} {'total s':>8} {'file writes':>12}")
+    with tempfile.TemporaryDirectory() as profiles_dir:
+        processor = ProfileQueryProcessor(profiles_dir)
+        start = time.perf_counter()
+        for profile_data in updates:
+            with open(os.path.join(profiles_dir, f"{profile_data['profile_id']}.json"), "w") as f:
+                json.dump(profile_data, f, indent=2)
+            processor._load_profile(profile_data["profile_id"])
+        seconds = time.perf_counter() - start
+        print(f"{'sync':>12} {count:>9} {seconds / count * 1e6:>11.1f} {seconds:>8.2f} {count:>12}")
+
+    with tempfile.TemporaryDirectory() as profiles_dir:
+        processor = ProfileQueryProcessor(profiles_dir)
+        writer = ProfileWriter(profiles_dir)
+        start = time.perf_counter()
+        for profile_data in updates:
+            processor.upsert_profile(profile_data["profile_id"], profile_data)
+            writer.write(profile_data["profile_id"], profile_data)
+        request_seconds = time.perf_counter() - start
+        writer.close()
+        seconds = time.perf_counter() - start
+        print(f"{'write-behind':>12} {count:>9} {request_seconds / count * 1e6:>11.1f} {seconds:>8.2f} "
+              f"{writer.stats()['written']:>12}")
+
+
+def _measure_bulk_ingest(count: int, connection) -> None:
+    """Stream an NDJSON upload of count records in a fresh process and report time and peak RSS growth."""
+    import asyncio
+    from profile_ingest import BulkIngestor
+    from profile_writer import ProfileWriter
+    from query_processor import ProfileQueryProcessor
+
+    rng = random.Random(13)
+    names = _synthetic_names(rng, 1000)
+    # A fixed set of profiles is sent repeatedly, so the corpus size does not depend on the upload size
+    lines = [json.dumps(synthetic_profile(rng, f"profile-{position}", name)).encode("utf-8") + b"\n"
+             for position, name in enumerate(names)]
+
+    async def upload(records: int):
+        for position in range(records):
+            yield lines[position % len(lines)]
+
+    with tempfile.TemporaryDirectory() as profiles_dir:
+        processor = ProfileQueryProcessor(profiles_dir)
+        writer = ProfileWriter(profiles_dir, fsync=False)
+        ingestor = BulkIngestor(processor, writer)
+        # Warm up with one pass over the profiles so the corpus is already resident
+        asyncio.run(ingestor.ingest(upload(len(lines))))
+        writer.flush()
+        baseline = _peak_rss_bytes()
+
+        start = time.perf_counter()
+        summary = asyncio.run(ingestor.ingest(upload(count)))
+        writer.close()
+        seconds = time.perf_counter() - start
+
+    connection.send((summary["inserted"], seconds, _peak_rss_bytes() - baseline))
+    connection.close()
+
+
+def bench_bulk(args: argparse.Namespace) -> None:
+    """Check that streamed bulk ingestion runs in flat memory as uploads grow."""
+    print(f"{'records':>9} {'inserted':>9} {'records/s':>10} {'peak RSS growth MB':>19}")
+    for count in (1000, 10000, 100000):
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        worker = multiprocessing.Process(target=_measure_bulk_ingest, args=(count, sender))
+        worker.start()
+        inserted, seconds, growth = receiver.recv()
+        worker.join()
+        print(f"{count:>9} {inserted:>9} {count / seconds:>10.0f} {growth / 2 ** 20:>19.1f}")
+
+
+def bench_serialization(args: argparse.Namespace) -> None:
+    """Compare JSON encoders, compression and webhook response modes by time and bytes on the wire."""
+    import gzip
+    from profile_io import orjson
+    from query_processor import ProfileQueryProcessor
+
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    rng = random.Random(17)
+    count = min(args.profiles, 5000)
+    with tempfile.TemporaryDirectory() as profiles_dir:
+        write_synthetic_corpus(profiles_dir, count)
+        processor = ProfileQueryProcessor(profiles_dir)
+        names = [processor.name_index._names[profile_id] for profile_id in rng.sample(list(processor.loaded_profiles), 1000)]
+        categories = ["study", "work", "skills", "languages", "located", "contact"]
+        batch = processor.process_queries([f"What about {name} {rng.choice(categories)}?" for name in names])
+        result = batch[0]
+        payloads = {
+            "profiles": processor.list_profile_summaries(),
+            "batch": batch,
+            "webhook": {"status": "success", "response": result.get("response"),
+                        "whatsapp_number": "15551234567", "query_result": result},
+            "webhook slim": {"status": "success", "response": result.get("response"),
+                             "whatsapp_number": "15551234567"},
+        }
+
+    encoders = [("json", lambda content: json.dumps(content, ensure_ascii=False, allow_nan=False,
+                                                    separators=(",", ":")).encode("utf-8"))]
+    if orjson is not None:
+        encoders.append(("orjson", orjson.dumps))
+    compressors = [("identity", lambda body: body), ("gzip-6", lambda body: gzip.compress(body, 6))]
+    if brotli is not None:
+        compressors.append(("br-4", lambda body: brotli.compress(body, quality=4)))
+
+    print(f"{'payload':>13} {'encoder':>8} {'encode us':>10} {'encoding':>9} {'bytes':>9} {'compress us':>12}")
+    for payload_name, content in payloads.items():
+        for encoder_name, encode in encoders:
+            encode_us = time_per_call(lambda: encode(content), args.seconds) * 1e6
+            body = encode(content)
+            for compressor_name, compress in compressors:
+                compress_us = time_per_call(lambda: compress(body), args.seconds) * 1e6 if compressor_name != "identity" else 0.0
+                print(f"{payload_name:>13} {encoder_name:>8} {encode_us:>10.1f} {compressor_name:>9} "
+                      f"{len(compress(body)):>9} {compress_us:>12.1f}")
+
+
+def bench_metrics(args: argparse.Namespace) -> None:
+    """Measure the cost of recording stage metrics relative to a query."""
+    from metrics import MetricsRegistry
+    from query_processor import ProfileQueryProcessor
+
+    histogram = MetricsRegistry().histogram("bench_seconds", "Benchmark histogram", ("stage",)).labels("bench")
+    timed_ns = time_per_call(lambda: histogram.observe(time.perf_counter() - time.perf_counter()), args.seconds) * 1e9
+
+    rng = random.Random(19)
+    with tempfile.TemporaryDirectory() as profiles_dir:
+        write_synthetic_corpus(profiles_dir, min(args.profiles, 5000))
+        processor = ProfileQueryProcessor(profiles_dir)
+    names = [processor.name_index._names[profile_id] for profile_id in rng.sample(list(processor.loaded_profiles), 500)]
+    queries = iter([f"Where did {name.title()} study?" for name in names] * 10 ** 4)
+    query_us = time_per_call(lambda: processor.process_query(next(queries)), args.seconds) * 1e6
+    # Four stage timings are recorded for a query that reaches response generation
+    overhead = 4 * timed_ns / 1e3 / query_us
+
+    print(f"{'timed observe ns':>17} {'query us':>9} {'overhead':>9}")
+    print(f"{timed_ns:>17.0f} {query_us:>9.1f} {overhead:>9.2%}")
+
+
+def _drive_queries(port: int, queries: List[str], seconds: float, connection) -> None:
+    """Send queries over one keep-alive connection for a fixed time and report the number answered."""
+    import http.client
+
+    client = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    answered = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        body = json.dumps({"query": queries[answered % len(queries)]})
+        client.request("POST", "/query", body, {"Content-Type": "application/json"})
+        response = client.getresponse()
+        response.read()
+        if response.status == 200:
+            answered += 1
+    client.close()
+    connection.send(answered)
+    connection.close()
+
+
+def _private_bytes(pid: int) -> int:
+    """Get the memory of a process that is not shared with other processes."""
+    total = 0
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                total += int(line.split()[1]) * 1024
+    return total
+
+
+def bench_workers(args: argparse.Namespace) -> None:
+    """Measure API throughput and per-worker private memory as worker processes are added."""
+    import http.client
+    import subprocess
+
+    cpus = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, cpus} | {count for count in (4, 8, 16) if count <= cpus})
+    port = 8765
+    rng = random.Random(17)
+
+    print(f"CPUs: {cpus}")
+    print(f"{'workers':>8} {'clients':>8} {'requests/s':>11} {'speedup':>8} {'startup s':>10} {'private MB/worker':>18}")
+    with tempfile.TemporaryDirectory() as profiles_dir:
+        write_synthetic_corpus(profiles_dir, args.profiles)
+        with open(os.path.join(profiles_dir, "profile-0.json")) as f:
+            name = json.load(f)["basics"]["name"]
+        queries = [f"Where is {name} located?", f"What skills does {name} have?",
+                   f"Where did {_typo(rng, name)} study?"]
+
+        env = dict(os.environ, PROFILES_DIR=profiles_dir, PORT=str(port), HOST="127.0.0.1", SKIP_WATI="1")
+        baseline = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            server = subprocess.Popen([sys.executable, "main.py", "--mode", "api", "--workers", str(workers)],
+                                      env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                      cwd=os.path.dirname(os.path.abspath(__file__)))
+            try:
+                while True:
+                    if server.poll() is not None:
+                        raise RuntimeError("API server exited during startup; are fastapi and uvicorn installed?")
+                    try:
+                        client = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                        client.request("GET", "/")
+                        client.getresponse().read()
+                        client.close()
+                        break
+                    except OSError:
+                        time.sleep(0.1)
+                startup = time.perf_counter() - start
+
+                # Enough concurrent clients to keep every worker busy
+                clients = workers * 4
+                pipes = []
+                for _ in range(clients):
+                    receiver, sender = multiprocessing.Pipe(duplex=False)
+                    process = multiprocessing.Process(target=_drive_queries,
+                                                      args=(port, queries, max(args.seconds, 5.0), sender))
+                    process.start()
+                    pipes.append((receiver, process))
+                answered = 0
+                for receiver, process in pipes:
+                    answered += receiver.recv()
+                    process.join()
+                rate = answered / max(args.seconds, 5.0)
+
+                # With one worker, uvicorn serves from the main process itself
+                with open(f"/proc/{server.pid}/task/{server.pid}/children") as f:
+                    pids = [int(pid) for pid in f.read().split()] or [server.pid]
+                private = sum(_private_bytes(pid) for pid in pids) / len(pids)
+            finally:
+                server.terminate()
+                server.wait()
+
+            baseline = baseline or rate
+            print(f"{workers:>8} {clients:>8} {rate:>11.0f} {rate / baseline:>8.2f} {startup:>10.2f} "
+                  f"{private / 1e6:>18.1f}")
+
+
+def bench_reload(args: argparse.Namespace) -> None:
+    """Compare a full reload of the profiles directory with applying only the changed files."""
+    import threading
+    from profile_watcher import ProfileWatcher
+    from query_processor import ProfileQueryProcessor
+
+    rng = random.Random(19)
+    with tempfile.TemporaryDirectory() as profiles_dir:
+        write_synthetic_corpus(profiles_dir, args.profiles)
+        processor = ProfileQueryProcessor(profiles_dir)
+        watcher = ProfileWatcher(processor)
+        name = processor.name_index._names[next(iter(processor.loaded_profiles))]
+        query = f"Where is {name} located?"
+
+        start = time.perf_counter()
+        ProfileQueryProcessor(profiles_dir)
+        full_seconds = time.perf_counter() - start
+
+        # Cost of a poll that finds the directory unchanged, and of stating every file
+        time.sleep(2.5)
+        print(f"unchanged poll: {time_per_call(watcher.poll, args.seconds) * 1e6:.0f} us, "
+              f"full scan: {time_per_call(lambda: watcher.poll(full_scan=True), args.seconds) * 1e3:.1f} ms")
+
+        print(f"{'changed files':>14} {'reload s':>9} {'full reload s':>14} {'query p99 us':>13}")
+        for changed in (0, 10, 100, 1000):
+            profile_ids = rng.sample(list(processor.loaded_profiles), changed)
+            for profile_id in profile_ids[:changed // 2]:
+                with open(os.path.join(profiles_dir, f"{profile_id}.json")) as f:
+                    profile_data = json.load(f)
+                profile_data["basics"]["headline"] = "Updated"
+                with open(os.path.join(profiles_dir, f"{profile_id}.json"), "w") as f:
+                    json.dump(profile_data, f)
+            for profile_id in profile_ids[changed // 2:]:
+                os.unlink(os.path.join(profiles_dir, f"{profile_id}.json"))
+
+            # Query latency on another thread while the changes are applied
+            latencies: List[float] = []
+            done = threading.Event()
+
+            def query_loop():
+                while not done.is_set():
+                    query_start = time.perf_counter()
+                    processor.process_query(query)
+                    latencies.append(time.perf_counter() - query_start)
+
+            thread = threading.Thread(target=query_loop)
+            thread.start()
+            start = time.perf_counter()
+            watcher.poll()
+            reload_seconds = time.perf_counter() - start
+            done.set()
+            thread.join()
+
+            latencies.sort()
+            print(f"{changed:>14} {reload_seconds:>9.3f} {full_seconds:>14.3f} "
+                  f"{latencies[int(len(latencies) * 0.99)] * 1e6:>13.0f}")
+
+
+def _run_stub_wati_server(port: int, delay: float = 0.0, rate_limit: int = 0) -> None:
+    """
+    Serve a minimal Wati API on asyncio that answers every request with a small JSON body.
+
+    Connections are kept alive, and every response is delayed by delay seconds
+    to stand in for the latency of the real API. With a rate_limit, requests
+    beyond rate_limit within the same second are answered with HTTP 429.
+    """
+    import asyncio
+
+    body = b'{"result": true}'
+    reply = (b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+             b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+    limited_body = b'{"result": false, "info": "Too many requests"}'
+    limited_reply = (b"HTTP/1.1 429 Too Many Requests\r\nContent-Type: application/json\r\n"
+                     b"Content-Length: " + str(len(limited_body)).encode() + b"\r\n\r\n" + limited_body)
+    # [current second, requests received in it]
+    window = [0, 0]
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                await reader.readexactly(length)
+                limited = False
+                if rate_limit:
+                    second = int(time.monotonic())
+                    if window[0] != second:
+                        window[:] = [second, 0]
+                    window[1] += 1
+                    limited = window[1] > rate_limit
+                if delay:
+                    await asyncio.sleep(delay)
+                writer.write(limited_reply if limited else reply)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve() -> None:
+        server = await asyncio.start_server(handle, "127.0.0.1", port, backlog=1024)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+def bench_wati(args: argparse.Namespace) -> None:
+    """Compare outbound Wati messages per second without pooling, with a pooled session and with the async client."""
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    import requests
+    from wati_integration import AsyncWatiAPIClient, WatiAPIClient
+
+    seconds = max(args.seconds, 2.0)
+
+    def run_threads(send: Callable[[str], None], threads: int) -> float:
+        sent = 0
+        start = time.perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            while time.perf_counter() - start < seconds:
+                list(pool.map(send, (f"1555000{position:04d}" for position in range(threads * 20))))
+                sent += threads * 20
+        return sent / (time.perf_counter() - start)
+
+    async def run_async(client: AsyncWatiAPIClient, concurrency: int) -> float:
+        async def send(number: str) -> None:
+            if "error" in await client.send_message(number, "Hello"):
+                raise RuntimeError("Stub server request failed")
+
+        sent = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            await asyncio.gather(*(send(f"1555000{position:04d}") for position in range(concurrency * 20)))
+            sent += concurrency * 20
+        return sent / (time.perf_counter() - start)
+
+    async def measure_async(base_url: str, concurrency: int) -> Tuple[float, int]:
+        client = AsyncWatiAPIClient("token", base_url, pool_size=concurrency)
+        try:
+            rate = await run_async(client, concurrency)
+            return rate, client.pool_stats()["connections_opened"]
+        finally:
+            await client.close()
+
+    print(f"{'API latency ms':>15} {'client':>10} {'concurrency':>12} {'messages/s':>11} {'connections':>12}")
+    for port, delay, rows in ((8766, 0.0, (("unpooled", 1), ("unpooled", 8), ("pooled", 1), ("pooled", 8),
+                                           ("async", 1), ("async", 8), ("async", 64))),
+                              (8767, 0.05, (("pooled", 8), ("async", 8), ("async", 64)))):
+        server = multiprocessing.Process(target=_run_stub_wati_server, args=(port, delay), daemon=True)
+        server.start()
+        base_url = f"http://127.0.0.1:{port}/api/v1"
+        for _ in range(50):
+            try:
+                requests.get(base_url, timeout=1)
+                break
+            except requests.exceptions.ConnectionError:
+                time.sleep(0.1)
+
+        try:
+            for name, concurrency in rows:
+                if name == "async":
+                    rate, connections = asyncio.run(measure_async(base_url, concurrency))
+                elif name == "pooled":
+                    pooled = WatiAPIClient("token", base_url, pool_size=concurrency)
+
+                    def pooled_send(number: str) -> None:
+                        if "error" in pooled.send_message(number, "Hello"):
+                            raise RuntimeError("Stub server request failed")
+
+                    rate = run_threads(pooled_send, concurrency)
+                    connections = pooled.pool_stats()["connections_opened"]
+                    pooled.close()
+                else:
+                    headers = {"Authorization": "Bearer token", "Content-Type": "application/json"}
+
+                    def unpooled_send(number: str) -> None:
+                        # The client before connection pooling: one connection per message
+                        requests.post(f"{base_url}/sendSessionMessage/{number}", headers=headers,
+                                      json={"messageText": "Hello"}).raise_for_status()
+
+                    rate = run_threads(unpooled_send, concurrency)
+                    connections = None
+                print(f"{delay * 1e3:>15.0f} {name:>10} {concurrency:>12} {rate:>11.0f} "
+                      f"{connections if connections is not None else 'per message':>12}")
+        finally:
+            server.terminate()
+            server.join()
+
+
+def bench_outbound(args: argparse.Namespace) -> None:
+    """Compare sending a burst of replies directly with sending it through the rate-limited dispatcher."""
+    import asyncio
+    import requests
+    from outbound_dispatcher import OutboundDispatcher
+    from wati_integration import AsyncWatiAPIClient
+
+    # Rate limited sends are expected here; keep their error logs out of the table
+    logging.getLogger("wati_integration").setLevel(logging.CRITICAL)
+    logging.getLogger("outbound_dispatcher").setLevel(logging.CRITICAL)
+
+    port, limit, messages, recipients = 8768, 100, 600, 200
+    numbers = [f"1555000{position % recipients:04d}" for position in range(messages)]
+
+    async def send_directly(client: AsyncWatiAPIClient) -> Dict[str, int]:
+        results = await asyncio.gather(*(client.send_message(number, "Hello") for number in numbers))
+        failed = sum(1 for result in results if "error" in result)
+        return {"sent": messages - failed, "failed": failed, "retries": 0}
+
+    async def send_dispatched(client: AsyncWatiAPIClient, rate: float) -> Dict[str, int]:
+        dispatcher = OutboundDispatcher(client.send_message, rate=rate, burst=20, concurrency=10,
+                                        name=f"bench_{rate:.0f}")
+        dispatcher.start()
+        for number in numbers:
+            dispatcher.submit(number, "Hello")
+        await dispatcher.close()
+        stats = dispatcher.stats()
+        return {"sent": stats["sent"], "failed": sum(stats["dropped"].values()), "retries": stats["retries"]}
+
+    async def measure(mode: str, rate: float) -> Tuple[Dict[str, int], float]:
+        # Start each run in a fresh rate limit window
+        await asyncio.sleep(1 - time.monotonic() % 1)
+        client = AsyncWatiAPIClient("token", f"http://127.0.0.1:{port}/api/v1", pool_size=10)
+        start = time.perf_counter()
+        try:
+            if mode == "direct":
+                counts = await send_directly(client)
+            else:
+                counts = await send_dispatched(client, rate)
+            return counts, time.perf_counter() - start
+        finally:
+            await client.close()
+
+    server = multiprocessing.Process(target=_run_stub_wati_server, args=(port, 0.02, limit), daemon=True)
+    server.start()
+    for _ in range(50):
+        try:
+            requests.get(f"http://127.0.0.1:{port}/", timeout=1)
+            break
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.1)
+
+    print(f"{messages} replies to {recipients} numbers, API limit {limit}/s, 20ms API latency")
+    print(f"{'mode':>12} {'send rate':>10} {'sent':>6} {'failed':>7} {'retries':>8} {'seconds':>8}")
+    try:
+        for mode, rate in (("direct", 0.0), ("dispatcher", 90.0), ("dispatcher", 150.0)):
+            counts, elapsed = asyncio.run(measure(mode, rate))
+            print(f"{mode:>12} {rate or '-':>10} {counts['sent']:>6} {counts['failed']:>7} "
+                  f"{counts['retries']:>8} {elapsed:>8.2f}")
+    finally:
+        server.terminate()
+        server.join()
+
+
+def bench_integration(args: argparse.Namespace) -> None:
+    """Compare per-message latency of the Wati integration querying the bot API over HTTP and in-process."""
+    import http.client
+    import subprocess
+    from query_processor import ProfileQueryProcessor
+    from wati_integration import LinkedInBotWatiIntegration
+
+    api_port, wati_port = 8770, 8771
+    messages = 2000
+    with tempfile.TemporaryDirectory() as profiles_dir:
+        write_synthetic_corpus(profiles_dir, args.profiles)
+        with open(os.path.join(profiles_dir, "profile-0.json")) as f:
+            name = json.load(f)["basics"]["name"]
+        queries = [f"Where is {name} located?", f"What skills does {name} have?", f"Tell me about {name}"]
+
+        env = dict(os.environ, PROFILES_DIR=profiles_dir, PORT=str(api_port), HOST="127.0.0.1", SKIP_WATI="1",
+                   PROFILE_SNAPSHOT="")
+        server = subprocess.Popen([sys.executable, "main.py", "--mode", "api"], env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                  cwd=os.path.dirname(os.path.abspath(__file__)))
+        wati = multiprocessing.Process(target=_run_stub_wati_server, args=(wati_port,), daemon=True)
+        wati.start()
+        try:
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError("API server exited during startup; are fastapi and uvicorn installed?")
+                try:
+                    client = http.client.HTTPConnection("127.0.0.1", api_port, timeout=1)
+                    client.request("GET", "/")
+                    client.getresponse().read()
+                    client.close()
+                    break
+                except OSError:
+                    time.sleep(0.1)
+
+            processor = ProfileQueryProcessor(profiles_dir)
+            print(f"{'mode':>11} {'p50 ms':>8} {'p99 ms':>8} {'messages/s':>11}")
+            for mode in ("http", "in-process"):
+                integration = LinkedInBotWatiIntegration(
+                    "token", f"http://127.0.0.1:{api_port}", f"http://127.0.0.1:{wati_port}/api/v1",
+                    dispatcher_options={"rate": 1e6, "burst": messages, "name": f"bench_{mode}"},
+                    processor=processor if mode == "in-process" else None
+                )
+                latencies = []
+                try:
+                    for position in range(messages):
+                        message = {"payload": {"text": queries[position % len(queries)]},
+                                   "userData": {"waId": f"1555000{position % 100:04d}"}}
+                        start = time.perf_counter()
+                        if "error" in integration.process_incoming_message(message):
+                            raise RuntimeError("Message processing failed")
+                        latencies.append(time.perf_counter() - start)
+                finally:
+                    integration.close()
+
+                latencies.sort()
+                print(f"{mode:>11} {latencies[len(latencies) // 2] * 1e3:>8.3f} "
+                      f"{latencies[int(len(latencies) * 0.99)] * 1e3:>8.3f} {len(latencies) / sum(latencies):>11.0f}")
+        finally:
+            server.terminate()
+            server.wait()
+            wati.terminate()
+            wati.join()
+
+
+SUITES = {
+    "bulk": bench_bulk,
+    "concurrency": bench_concurrency,
+    "fuzzy": bench_fuzzy,
+    "ingest": bench_ingest,
+    "integration": bench_integration,
+    "keywords": bench_keywords,
+    "memory": bench_memory,
+    "metrics": bench_metrics,
+    "outbound": bench_outbound,
+    "reload": bench_reload,
+    "serialization": bench_serialization,
+    "startup": bench_startup,
+    "wati": bench_wati,
+    "workers": bench_workers,
+}
+
+
+def main():
+    """Main entry point for the benchmarks."""
+    parser = argparse.ArgumentParser(description="LinkedIn Profile Query Bot benchmarks")
+    parser.add_argument("suite", choices=sorted(SUITES), help="Benchmark suite to run")
+    parser.add_argument("--seconds", type=float, default=0.2,
+                        help="Minimum measurement time per data point")
+    parser.add_argument("--profiles", type=int, default=20000,
+                        help="Number of synthetic profiles for corpus benchmarks")
+    args = parser.parse_args()
+
+    SUITES[args.suite](args)
+
+
+if __name__ == "__main__":
+    main()
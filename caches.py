@@ -0,0 +1,321 @@
+"""
+Caches for the LinkedIn Profile Query Bot
+
+This module provides small, thread-safe in-memory caches used by the query
+processor to skip repeated work, and by the webhook to recognize repeated
+deliveries of the same message.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+
+class LRUCache:
+    def __init__(self, max_size: int):
+        """
+        Initialize a bounded least-recently-used cache.
+
+        Args:
+            max_size: Maximum number of entries to keep
+        """
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up an entry and mark it as recently used.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value if present, None otherwise
+        """
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store an entry, evicting the least recently used one if full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with size, capacity, hits, misses, evictions and invalidations
+        """
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+class ResponseCache:
+    # Rough per-entry bookkeeping cost (key tuple, dict slot, entry tuple)
+    ENTRY_OVERHEAD = 200
+
+    def __init__(self, max_bytes: int):
+        """
+        Initialize a response cache bounded by an approximate byte budget.
+
+        Entries are keyed by (profile_id, category, specific_request) and
+        tagged with the profile version they were generated from.
+
+        Args:
+            max_bytes: Approximate memory budget for cached responses
+        """
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[Tuple[str, str, Optional[str]], Tuple[int, str, int]]" = OrderedDict()
+        self._keys_by_profile: Dict[str, Set[Tuple[str, str, Optional[str]]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: Tuple[str, str, Optional[str]]) -> None:
+        """Remove an entry; the caller must hold the lock."""
+        _, _, size = self._entries.pop(key)
+        self.current_bytes -= size
+        keys = self._keys_by_profile.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_profile[key[0]]
+
+    def get(self, key: Tuple[str, str, Optional[str]], version: int) -> Optional[str]:
+        """
+        Look up a response generated from the given profile version.
+
+        Args:
+            key: (profile_id, category, specific_request)
+            version: Current version of the profile
+
+        Returns:
+            Cached response if present and current, None otherwise
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                if entry is not None:
+                    self._remove(key)
+                    self.invalidations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Tuple[str, str, Optional[str]], version: int, response: str) -> None:
+        """
+        Store a response, evicting least recently used entries to stay in budget.
+
+        Args:
+            key: (profile_id, category, specific_request)
+            version: Version of the profile the response was generated from
+            response: Response text
+        """
+        size = sys.getsizeof(response) + self.ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (version, response, size)
+            self._keys_by_profile.setdefault(key[0], set()).add(key)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_profile(self, profile_id: str) -> None:
+        """
+        Drop every cached response for one profile.
+
+        Args:
+            profile_id: Profile identifier
+        """
+        with self._lock:
+            for key in list(self._keys_by_profile.get(profile_id, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._keys_by_profile.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with size, byte usage, hits, misses, evictions and invalidations
+        """
+        return {
+            "size": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+class DedupCache:
+    def __init__(self, max_size: int, ttl: float):
+        """
+        Initialize a cache of recently seen keys, used to recognize repeated deliveries.
+
+        Keys are forgotten ttl seconds after they were added, or earlier, oldest
+        first, once more than max_size keys are held.
+
+        Args:
+            max_size: Maximum number of keys to keep
+            ttl: Seconds a key is remembered
+        """
+        if max_size <= 0 or ttl <= 0:
+            raise ValueError("max_size and ttl must be positive")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        # Key -> expiry time; insertion order is expiry order, since every key lives for ttl
+        self._entries: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.duplicates = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expire(self, now: float) -> None:
+        """Drop expired keys; the caller must hold the lock."""
+        while self._entries:
+            key, expires = next(iter(self._entries.items()))
+            if expires > now:
+                break
+            del self._entries[key]
+            self.expirations += 1
+
+    def seen(self, key: Hashable) -> bool:
+        """
+        Check whether a key was added within the last ttl seconds, counting it as a duplicate if so.
+
+        Args:
+            key: Key to check
+
+        Returns:
+            True if the key is remembered, False otherwise
+        """
+        with self._lock:
+            self._expire(time.monotonic())
+            if key in self._entries:
+                self.duplicates += 1
+                return True
+            return False
+
+    def add(self, key: Hashable) -> bool:
+        """
+        Remember a key for ttl seconds, forgetting the oldest keys if full.
+
+        Args:
+            key: Key to remember
+
+        Returns:
+            True if the key was added, False if it is already remembered, which counts as a duplicate
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            if key in self._entries:
+                self.duplicates += 1
+                return False
+            self._entries[key] = now + self.ttl
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def discard(self, key: Hashable) -> None:
+        """
+        Forget a key, e.g. when processing it failed and a redelivery should be processed.
+
+        Args:
+            key: Key to forget
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with size, capacity, TTL, duplicates seen, evictions and expirations
+        """
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "duplicates": self.duplicates,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
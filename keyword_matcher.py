@@ -0,0 +1,125 @@
+"""
+Multi-Keyword Matcher
+
+This module provides an Aho-Corasick automaton that finds every occurrence of
+a set of keywords in a single pass over the input text. Each keyword carries
+one or more tags, so several keyword tables can share one automaton.
+"""
+
+from collections import deque
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+
+class KeywordMatcher:
+    def __init__(self, tables: Dict[Hashable, Iterable[str]] = None):
+        """
+        Initialize the matcher.
+
+        Args:
+            tables: Optional mapping of tag to keywords to add immediately
+        """
+        self._keywords: Dict[str, Set[Hashable]] = {}
+        self._transitions: List[Dict[str, int]] = []
+        self._outputs: List[Tuple[str, ...]] = []
+        self._compiled = False
+
+        if tables:
+            for tag, keywords in tables.items():
+                for keyword in keywords:
+                    self.add(keyword, tag)
+            self.compile()
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    def add(self, keyword: str, tag: Hashable) -> None:
+        """
+        Register a keyword under a tag.
+
+        Args:
+            keyword: Lowercase keyword or phrase to search for
+            tag: Tag reported when the keyword is found
+        """
+        if not keyword:
+            return
+        self._keywords.setdefault(keyword, set()).add(tag)
+        self._compiled = False
+
+    def compile(self) -> None:
+        """Build the automaton from the registered keywords."""
+        trie: List[Dict[str, int]] = [{}]
+        outputs: List[Set[str]] = [set()]
+
+        for keyword in self._keywords:
+            node = 0
+            for char in keyword:
+                child = trie[node].get(char)
+                if child is None:
+                    child = len(trie)
+                    trie[node][char] = child
+                    trie.append({})
+                    outputs.append(set())
+                node = child
+            outputs[node].add(keyword)
+
+        # Breadth-first construction of failure links, folded directly into a
+        # deterministic transition table so scanning never has to backtrack.
+        # Transitions that lead back to the root are left implicit.
+        fail = [0] * len(trie)
+        transitions: List[Dict[str, int]] = [dict(trie[0])]
+        transitions.extend({} for _ in range(len(trie) - 1))
+        queue = deque(trie[0].values())
+
+        while queue:
+            node = queue.popleft()
+            transitions[node] = dict(transitions[fail[node]])
+            outputs[node] |= outputs[fail[node]]
+            for char, child in trie[node].items():
+                fail[child] = transitions[fail[node]].get(char, 0)
+                transitions[node][char] = child
+                queue.append(child)
+
+        self._transitions = transitions
+        self._outputs = [tuple(found) for found in outputs]
+        self._compiled = True
+
+    def find_keywords(self, text: str) -> Set[str]:
+        """
+        Find every registered keyword occurring in the text.
+
+        Args:
+            text: Lowercase text to scan
+
+        Returns:
+            Set of distinct keywords found
+        """
+        if not self._compiled:
+            self.compile()
+
+        transitions = self._transitions
+        outputs = self._outputs
+        found: Set[str] = set()
+        node = 0
+
+        for char in text:
+            node = transitions[node].get(char, 0)
+            if outputs[node]:
+                found.update(outputs[node])
+
+        return found
+
+    def find(self, text: str) -> Dict[Hashable, Set[str]]:
+        """
+        Find every registered keyword in the text, grouped by tag.
+
+        Args:
+            text: Lowercase text to scan
+
+        Returns:
+            Mapping of tag to the distinct keywords found for it
+        """
+        hits: Dict[Hashable, Set[str]] = {}
+        for keyword in self.find_keywords(text):
+            for tag in self._keywords[keyword]:
+                hits.setdefault(tag, set()).add(keyword)
+        return hits
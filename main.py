@@ -13,6 +13,7 @@ import time
 import threading
 import uvicorn
 from dotenv import load_dotenv
+from profile_snapshot import DEFAULT_SNAPSHOT_PATH
 
 # Configure logging
 logging.basicConfig(
@@ -31,9 +32,19 @@ def load_config():
         "wati_api_key": os.environ.get("WATI_API_KEY"),
         "bot_api_url": os.environ.get("BOT_API_URL", "http://localhost:8000"),
         "profiles_dir": os.environ.get("PROFILES_DIR", "profiles"),
+        "snapshot_path": os.environ.get("PROFILE_SNAPSHOT", DEFAULT_SNAPSHOT_PATH),
         "wati_api_url": os.environ.get("WATI_API_URL", "https://api.wati.io/api/v1"),
         "host": os.environ.get("HOST", "0.0.0.0"),
-        "port": int(os.environ.get("PORT", "8000"))
+        "port": int(os.environ.get("PORT", "8000")),
+        "workers": int(os.environ.get("WEB_CONCURRENCY", "1")),
+        "http_pool_size": int(os.environ.get("HTTP_POOL_SIZE", "10")),
+        "http_timeout": float(os.environ.get("HTTP_TIMEOUT", "10")),
+        "wati_send_rate": float(os.environ.get("WATI_SEND_RATE", "10")),
+        "wati_send_burst": int(os.environ.get("WATI_SEND_BURST", "20")),
+        "wati_send_queue_size": int(os.environ.get("WATI_SEND_QUEUE_SIZE", "10000")),
+        "wati_send_retries": int(os.environ.get("WATI_SEND_RETRIES", "5")),
+        "webhook_dedup_size": int(os.environ.get("WEBHOOK_DEDUP_SIZE", "50000")),
+        "webhook_dedup_ttl": float(os.environ.get("WEBHOOK_DEDUP_TTL", "600"))
     }
     
     # Try to load from config.json if it exists
@@ -63,6 +74,24 @@ def run_api_server(config):
     logger.info(f"Starting API server on {config['host']}:{config['port']}")
     uvicorn.run(app, host=config["host"], port=config["port"])
 
+def run_prefork_api_server(config):
+    """Run the FastAPI server in worker processes sharing the profiles loaded before forking."""
+    from prefork import PreforkServer
+    
+    def load_app():
+        from api_server import app
+        return app
+    
+    logger.info(f"Starting API server on {config['host']}:{config['port']} with {config['workers']} workers")
+    PreforkServer(load_app, config["host"], config["port"], config["workers"]).serve()
+
+def build_profile_snapshot(config):
+    """Build a snapshot of the profiles directory for faster startup."""
+    from profile_snapshot import build_snapshot
+    
+    count = build_snapshot(config["profiles_dir"], config["snapshot_path"])
+    logger.info(f"Snapshot of {count} profiles written to {config['snapshot_path']}")
+
 def run_wati_integration(config):
     """Run the Wati integration."""
     from wati_integration import LinkedInBotWatiIntegration
@@ -75,7 +104,17 @@ def run_wati_integration(config):
     integration = LinkedInBotWatiIntegration(
         config["wati_api_key"],
         config["bot_api_url"],
-        config["wati_api_url"]
+        config["wati_api_url"],
+        pool_size=config["http_pool_size"],
+        timeout=config["http_timeout"],
+        dispatcher_options={
+            "rate": config["wati_send_rate"],
+            "burst": config["wati_send_burst"],
+            "max_queue": config["wati_send_queue_size"],
+            "max_retries": config["wati_send_retries"]
+        },
+        dedup_size=config["webhook_dedup_size"],
+        dedup_ttl=config["webhook_dedup_ttl"]
     )
     
     # Set up webhook
@@ -89,28 +128,50 @@ def run_wati_integration(config):
             time.sleep(1)
     except KeyboardInterrupt:
         logger.info("Shutting down Wati integration...")
+    finally:
+        integration.close()
 
 def main():
     """Main entry point for the application."""
     parser = argparse.ArgumentParser(description="LinkedIn Profile Query Bot")
     parser.add_argument(
         "--mode", 
-        choices=["api", "wati", "all"], 
+        choices=["api", "wati", "all", "snapshot"], 
         default="all",
-        help="Run mode: api (API server only), wati (Wati integration only), all (both)"
+        help="Run mode: api (API server only), wati (Wati integration only), all (both), "
+             "snapshot (build a profile snapshot and exit)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of API server worker processes (default: WEB_CONCURRENCY or 1); "
+             "profiles are loaded once and shared by the workers"
     )
     args = parser.parse_args()
     
     # Load configuration
     config = load_config()
+    if args.workers is not None:
+        config["workers"] = args.workers
+    if config["workers"] < 1:
+        parser.error("--workers must be at least 1")
     
     if args.mode == "api":
         # Run API server only
-        run_api_server(config)
+        if config["workers"] > 1:
+            run_prefork_api_server(config)
+        else:
+            run_api_server(config)
+    elif args.mode == "snapshot":
+        # Build a profile snapshot only
+        build_profile_snapshot(config)
     elif args.mode == "wati":
         # Run Wati integration only
         run_wati_integration(config)
     else:
+        if config["workers"] > 1:
+            logger.warning("Multiple workers are only supported in api mode; starting a single API server")
+        
         # Run both in separate threads
         api_thread = threading.Thread(target=run_api_server, args=(config,))
         api_thread.daemon = True
@@ -0,0 +1,330 @@
+"""
+Outbound Message Dispatcher
+
+This module queues outbound WhatsApp replies and sends them on background
+asyncio tasks. Sends are rate limited by a token bucket, failed sends are
+retried with exponential backoff when the failure is transient (HTTP 429,
+5xx or a network error), and messages to the same recipient are sent one
+at a time in the order they were queued, while different recipients are
+served concurrently.
+
+The queue is bounded: when it is full, new messages are dropped and
+counted rather than buffered without limit.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set, Union
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+OUTBOUND_SEND_SECONDS = REGISTRY.histogram(
+    "outbound_send_seconds", "Duration of outbound message send attempts", ("dispatcher",)
+)
+OUTBOUND_DELIVERY_SECONDS = REGISTRY.histogram(
+    "outbound_delivery_seconds", "Time from queueing an outbound message until it was sent", ("dispatcher",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+)
+OUTBOUND_SENT = REGISTRY.counter("outbound_sent_total", "Outbound messages sent", ("dispatcher",))
+OUTBOUND_RETRIES = REGISTRY.counter("outbound_retries_total", "Outbound send attempts retried", ("dispatcher",))
+OUTBOUND_DROPPED = REGISTRY.counter(
+    "outbound_dropped_total", "Outbound messages dropped without being sent", ("dispatcher", "reason")
+)
+
+# Dispatchers by name, reported on /metrics
+_dispatchers: "weakref.WeakValueDictionary[str, OutboundDispatcher]" = weakref.WeakValueDictionary()
+
+REGISTRY.callback("outbound_queue_depth", "Outbound messages queued or being sent", "gauge", ("dispatcher",),
+                  lambda: [((name,), dispatcher.queued) for name, dispatcher in list(_dispatchers.items())])
+
+SendFunction = Callable[[str, str], Union[Dict[str, Any], Awaitable[Dict[str, Any]]]]
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        """
+        Initialize a token bucket that starts full.
+
+        Only use a bucket from the event loop that created it.
+
+        Args:
+            rate: Tokens added per second
+            burst: Maximum number of tokens, i.e. sends allowed back to back
+        """
+        if rate <= 0 or burst <= 0:
+            raise ValueError("rate and burst must be positive")
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def drain(self) -> None:
+        """Take every available token, e.g. after the remote side reported a rate limit."""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class OutboundMessage:
+    __slots__ = ("recipient", "text", "queued_at")
+
+    def __init__(self, recipient: str, text: str):
+        self.recipient = recipient
+        self.text = text
+        self.queued_at = time.perf_counter()
+
+
+class OutboundDispatcher:
+    def __init__(self, send: SendFunction, rate: float = 10.0, burst: int = 20, concurrency: int = 8,
+                 max_queue: int = 10000, max_retries: int = 5, backoff_base: float = 0.5,
+                 backoff_max: float = 30.0, name: str = "wati"):
+        """
+        Initialize the dispatcher. Call start() from the event loop that should run it.
+
+        Args:
+            send: Function sending one message, called with (recipient, text). It may be a
+                coroutine function or a blocking function, which is run on the loop's default
+                executor. It returns the API response, which holds "error" and "status_code"
+                keys when the send failed, as returned by WatiAPIClient.send_message.
+            rate: Maximum sustained sends per second, retries included
+            burst: Maximum number of sends allowed back to back
+            concurrency: Number of messages sent at the same time
+            max_queue: Maximum number of messages queued or being sent; further messages are dropped
+            max_retries: Maximum number of retries of a message after transient failures
+            backoff_base: Delay before the first retry, doubled for each further retry
+            backoff_max: Maximum delay between retries
+            name: Dispatcher name used as metrics label
+        """
+        if concurrency <= 0 or max_queue <= 0:
+            raise ValueError("concurrency and max_queue must be positive")
+
+        self.send = send
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.name = name
+        # Recipient -> messages not yet sent, oldest first
+        self._pending: Dict[str, Deque[OutboundMessage]] = {}
+        # Recipients waiting for a sender or being served; each is served by one sender at a time
+        self._scheduled: Set[str] = set()
+        self._ready: Optional[asyncio.Queue] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._workers = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.queued = 0
+        self.sent = 0
+        self.retries = 0
+        self.dropped: Dict[str, int] = {}
+
+        self._send_seconds = OUTBOUND_SEND_SECONDS.labels(name)
+        self._delivery_seconds = OUTBOUND_DELIVERY_SECONDS.labels(name)
+        self._sent_counter = OUTBOUND_SENT.labels(name)
+        self._retries_counter = OUTBOUND_RETRIES.labels(name)
+        _dispatchers[name] = self
+
+    def start(self) -> None:
+        """Start the sender tasks on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Queue()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._workers = [asyncio.ensure_future(self._work()) for _ in range(self.concurrency)]
+
+    def start_in_thread(self) -> None:
+        """Start the dispatcher on its own event loop in a background thread, for synchronous callers."""
+        started = threading.Event()
+
+        def run() -> None:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.call_soon(lambda: (self.start(), started.set()))
+            loop.run_forever()
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name=f"{self.name}-dispatcher", daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def submit(self, recipient: str, text: str) -> bool:
+        """
+        Queue a message. Must be called from the dispatcher's event loop.
+
+        Args:
+            recipient: Recipient WhatsApp number
+            text: Message text
+
+        Returns:
+            True if the message was queued, False if it was dropped
+        """
+        if self._closed:
+            self._drop("closed")
+            return False
+        if self.queued >= self.max_queue:
+            self._drop("queue_full")
+            return False
+
+        self._pending.setdefault(recipient, deque()).append(OutboundMessage(recipient, text))
+        self.queued += 1
+        self._idle.clear()
+        if recipient not in self._scheduled:
+            self._scheduled.add(recipient)
+            self._ready.put_nowait(recipient)
+        return True
+
+    def submit_threadsafe(self, recipient: str, text: str) -> bool:
+        """
+        Queue a message from a thread other than the dispatcher's event loop.
+
+        Args:
+            recipient: Recipient WhatsApp number
+            text: Message text
+
+        Returns:
+            True if the message was queued, False if it was dropped
+        """
+        async def submit() -> bool:
+            return self.submit(recipient, text)
+
+        return asyncio.run_coroutine_threadsafe(submit(), self._loop).result()
+
+    async def _work(self) -> None:
+        """Send the oldest message of one ready recipient at a time."""
+        while True:
+            recipient = await self._ready.get()
+            messages = self._pending[recipient]
+            try:
+                await self._deliver(messages[0])
+            except Exception as e:
+                logger.error(f"Unexpected error sending to {recipient}: {str(e)}")
+                self._drop("error")
+            finally:
+                messages.popleft()
+                self.queued -= 1
+                if messages:
+                    # Back of the line, so one busy recipient does not starve the others
+                    self._ready.put_nowait(recipient)
+                else:
+                    del self._pending[recipient]
+                    self._scheduled.discard(recipient)
+                if not self.queued:
+                    self._idle.set()
+
+    async def _deliver(self, message: OutboundMessage) -> None:
+        """Send a message, retrying transient failures with exponential backoff."""
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            start = time.perf_counter()
+            try:
+                if asyncio.iscoroutinefunction(self.send):
+                    result = await self.send(message.recipient, message.text)
+                else:
+                    result = await self._loop.run_in_executor(None, self.send, message.recipient, message.text)
+            except Exception as e:
+                result = {"error": str(e), "status_code": None}
+            self._send_seconds.observe(time.perf_counter() - start)
+
+            if "error" not in result:
+                self.sent += 1
+                self._sent_counter.inc()
+                self._delivery_seconds.observe(time.perf_counter() - message.queued_at)
+                return
+
+            status_code = result.get("status_code")
+            if status_code == 429:
+                # Every sender backs off, not just this one
+                self.bucket.drain()
+            elif status_code is not None and status_code < 500:
+                logger.error(f"Message to {message.recipient} rejected with status {status_code}, not retrying")
+                self._drop("rejected")
+                return
+
+            if attempt == self.max_retries:
+                logger.error(f"Giving up on message to {message.recipient} after {attempt + 1} attempts")
+                self._drop("retries_exhausted")
+                return
+
+            self.retries += 1
+            self._retries_counter.inc()
+            delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+            # Jitter keeps retries of a burst from arriving together
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    def _drop(self, reason: str) -> None:
+        self.dropped[reason] = self.dropped.get(reason, 0) + 1
+        OUTBOUND_DROPPED.labels(self.name, reason).inc()
+
+    async def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop accepting messages, wait for queued messages to be sent and stop the senders.
+
+        Messages still queued after the timeout are dropped.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+        """
+        self._closed = True
+        if self._idle is None:
+            return
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self.queued} outbound messages that were not sent before shutdown")
+            for _ in range(self.queued):
+                self._drop("shutdown")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def close_threadsafe(self, timeout: Optional[float] = None) -> None:
+        """
+        Close a dispatcher started with start_in_thread() and stop its thread.
+
+        Args:
+            timeout: Maximum seconds to wait for queued messages
+        """
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.close(timeout), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get dispatcher counters.
+
+        Returns:
+            Dictionary with queued, sent and retried messages and drops by reason
+        """
+        return {
+            "queued": self.queued,
+            "sent": self.sent,
+            "retries": self.retries,
+            "dropped": dict(self.dropped)
+        }
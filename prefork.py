@@ -0,0 +1,184 @@
+"""
+Pre-fork Server
+
+This module serves the API from several worker processes that share one
+copy of the profile corpus. The parent process loads the application, and
+with it the corpus and indexes, then forks the workers, which inherit the
+loaded data copy-on-write instead of each loading their own. The workers
+accept connections from one listening socket bound by the parent.
+
+The garbage collector is disabled while the corpus loads and the loaded
+objects are moved to the permanent generation with gc.freeze() before
+forking, so collections in the workers do not write to, and thereby copy,
+the pages holding the shared data.
+"""
+
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Workers exiting sooner than this after starting are restarted after RESTART_DELAY,
+# so a worker failing at startup does not restart in a tight loop
+MIN_WORKER_UPTIME = 5.0
+RESTART_DELAY = 1.0
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """
+    Bind a listening TCP socket to be shared by the worker processes.
+
+    Args:
+        host: Host address
+        port: Port number
+        backlog: Maximum number of connections waiting to be accepted
+
+    Returns:
+        Listening socket
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    # asyncio only disables Nagle's algorithm on accepted connections whose protocol
+    # is explicitly TCP; without it small responses wait for delayed ACKs
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_uvicorn_worker(app: Any, sock: socket.socket) -> None:
+    """
+    Serve an ASGI application with uvicorn on an already bound socket.
+
+    Args:
+        app: ASGI application
+        sock: Listening socket
+    """
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app))
+    server.run(sockets=[sock])
+
+
+class PreforkServer:
+    def __init__(self, load_app: Callable[[], Any], host: str, port: int, workers: int,
+                 run_worker: Callable[[Any, socket.socket], None] = run_uvicorn_worker):
+        """
+        Initialize the pre-fork server.
+
+        Args:
+            load_app: Function returning the application; called once, in the parent
+            host: Host address
+            port: Port number
+            workers: Number of worker processes
+            run_worker: Function serving the application on the socket in a worker process
+        """
+        if workers <= 0:
+            raise ValueError("workers must be positive")
+
+        self.load_app = load_app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.run_worker = run_worker
+        # Worker PID -> start time
+        self._children: Dict[int, float] = {}
+        self._stopping = False
+        self.restarts = 0
+
+    def serve(self) -> None:
+        """Load the application, fork the workers and restart them until a stop signal arrives."""
+        if not hasattr(os, "fork"):
+            raise RuntimeError("Multiple workers require os.fork(), which is not available on this platform")
+
+        sock = bind_socket(self.host, self.port)
+
+        # Objects created while loading stay put: no collection runs until they are frozen
+        gc.disable()
+        start = time.perf_counter()
+        app = self.load_app()
+        gc.freeze()
+        logger.info(f"Loaded application in {time.perf_counter() - start:.2f}s; "
+                    f"{gc.get_freeze_count()} objects shared with {self.workers} workers")
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        for _ in range(self.workers):
+            self._spawn(app, sock)
+
+        try:
+            self._supervise(app, sock)
+        finally:
+            sock.close()
+        logger.info("All workers stopped")
+
+    def _spawn(self, app: Any, sock: socket.socket) -> None:
+        """Fork a worker process serving the application."""
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                gc.enable()
+                self.run_worker(app, sock)
+            except BaseException:
+                logger.exception(f"Worker {os.getpid()} failed")
+                exit_code = 1
+            finally:
+                # Skip the parent's atexit handlers and buffered output
+                os._exit(exit_code)
+
+        self._children[pid] = time.monotonic()
+        logger.info(f"Started worker {pid}")
+
+    def _supervise(self, app: Any, sock: socket.socket) -> None:
+        """Wait for workers to exit, restarting them unless the server is stopping."""
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+
+            started = self._children.pop(pid, None)
+            if started is None:
+                continue
+            if self._stopping:
+                continue
+
+            logger.warning(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}; restarting")
+            if time.monotonic() - started < MIN_WORKER_UPTIME:
+                time.sleep(RESTART_DELAY)
+            if not self._stopping:
+                self.restarts += 1
+                self._spawn(app, sock)
+
+    def _handle_stop(self, signum: int, frame: Any) -> None:
+        """Stop the workers on SIGTERM or SIGINT; uvicorn lets them finish running requests."""
+        if not self._stopping:
+            logger.info(f"Received signal {signum}, stopping {len(self._children)} workers")
+        self._stopping = True
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get supervisor counters.
+
+        Returns:
+            Dictionary with configured and running workers and restarts
+        """
+        return {
+            "workers": self.workers,
+            "running": len(self._children),
+            "restarts": self.restarts
+        }
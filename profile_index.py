@@ -0,0 +1,360 @@
+"""
+Profile Name Index
+
+This module provides an inverted index over profile names and profile IDs,
+so resolving a name mentioned in a query does not require scanning every
+loaded profile.
+"""
+
+import re
+from collections import Counter
+from itertools import islice
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+_POSSESSIVE_RE = re.compile(r"['’]s\b")
+_NAME_TOKEN_RE = re.compile(r"[^\W_]+")
+_ID_TOKEN_RE = re.compile(r"[\w-]+")
+
+
+def tokenize_name(text: str) -> List[str]:
+    """
+    Split a name into normalized tokens.
+
+    Args:
+        text: Name or free text
+
+    Returns:
+        Lowercase alphanumeric tokens with possessives removed
+    """
+    return _NAME_TOKEN_RE.findall(_POSSESSIVE_RE.sub("", text.lower()))
+
+
+def normalize_name(text: str) -> str:
+    """
+    Normalize a name for exact comparison.
+
+    Args:
+        text: Name or free text
+
+    Returns:
+        Space-joined normalized tokens
+    """
+    return " ".join(tokenize_name(text))
+
+
+def name_trigrams(text: str) -> FrozenSet[str]:
+    """
+    Compute the character trigrams of a name.
+
+    Each token is padded with two leading spaces and one trailing space, so
+    word starts carry more weight than word ends.
+
+    Args:
+        text: Name or free text
+
+    Returns:
+        Set of character trigrams
+    """
+    trigrams = set()
+    for token in tokenize_name(text):
+        padded = f"  {token} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(trigrams)
+
+
+class ProfileNameIndex:
+    def __init__(self):
+        """Initialize an empty name index."""
+        # token -> profile IDs whose name contains the token
+        self._token_postings: Dict[str, Set[str]] = {}
+        # normalized full name -> profile IDs with that name
+        self._full_names: Dict[str, Set[str]] = {}
+        # lowercase profile ID -> profile ID
+        self._ids: Dict[str, str] = {}
+        # profile ID -> normalized name
+        self._names: Dict[str, str] = {}
+        # trigram -> profile IDs whose name contains the trigram
+        self._trigram_postings: Dict[str, Set[str]] = {}
+        # profile ID -> trigrams of its name
+        self._trigrams: Dict[str, FrozenSet[str]] = {}
+        # profile ID -> insertion sequence, used to break ties deterministically
+        self._order: Dict[str, int] = {}
+        self._next_seq = 0
+        self._max_name_tokens = 0
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, profile_id: str) -> bool:
+        return profile_id in self._names
+
+    def clear(self) -> None:
+        """Remove every entry from the index."""
+        self._token_postings.clear()
+        self._full_names.clear()
+        self._ids.clear()
+        self._names.clear()
+        self._trigram_postings.clear()
+        self._trigrams.clear()
+        self._order.clear()
+        self._max_name_tokens = 0
+
+    def add(self, profile_id: str, name: str) -> None:
+        """
+        Index a profile, replacing any previous entry for the same ID.
+
+        Args:
+            profile_id: Profile identifier
+            name: Display name of the profile
+        """
+        # Tokenized first, so an invalid name leaves any previous entry in place
+        tokens = tokenize_name(name)
+        normalized = " ".join(tokens)
+
+        if profile_id in self._names:
+            self.remove(profile_id)
+
+        self._names[profile_id] = normalized
+        self._ids[profile_id.lower()] = profile_id
+        self._order[profile_id] = self._next_seq
+        self._next_seq += 1
+
+        for token in set(tokens):
+            self._token_postings.setdefault(token, set()).add(profile_id)
+        if normalized:
+            self._full_names.setdefault(normalized, set()).add(profile_id)
+
+        trigrams = name_trigrams(normalized)
+        self._trigrams[profile_id] = trigrams
+        for trigram in trigrams:
+            self._trigram_postings.setdefault(trigram, set()).add(profile_id)
+        self._max_name_tokens = max(self._max_name_tokens, len(tokens))
+
+    def remove(self, profile_id: str) -> None:
+        """
+        Remove a profile from the index.
+
+        Args:
+            profile_id: Profile identifier
+        """
+        normalized = self._names.pop(profile_id, None)
+        if normalized is None:
+            return
+
+        self._order.pop(profile_id, None)
+        if self._ids.get(profile_id.lower()) == profile_id:
+            del self._ids[profile_id.lower()]
+
+        for token in set(normalized.split()):
+            postings = self._token_postings.get(token)
+            if postings is not None:
+                postings.discard(profile_id)
+                if not postings:
+                    del self._token_postings[token]
+
+        owners = self._full_names.get(normalized)
+        if owners is not None:
+            owners.discard(profile_id)
+            if not owners:
+                del self._full_names[normalized]
+
+        for trigram in self._trigrams.pop(profile_id, ()):
+            postings = self._trigram_postings.get(trigram)
+            if postings is not None:
+                postings.discard(profile_id)
+                if not postings:
+                    del self._trigram_postings[trigram]
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        Export the index contents as plain containers, e.g. for a snapshot.
+
+        Returns:
+            Dictionary accepted by set_state
+        """
+        return {
+            "token_postings": self._token_postings,
+            "full_names": self._full_names,
+            "ids": self._ids,
+            "names": self._names,
+            "trigram_postings": self._trigram_postings,
+            "trigrams": self._trigrams,
+            "order": self._order,
+            "next_seq": self._next_seq,
+            "max_name_tokens": self._max_name_tokens
+        }
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """
+        Replace the index contents with a state exported by get_state.
+
+        Args:
+            state: Index state
+        """
+        self._token_postings = state["token_postings"]
+        self._full_names = state["full_names"]
+        self._ids = state["ids"]
+        self._names = state["names"]
+        self._trigram_postings = state["trigram_postings"]
+        self._trigrams = state["trigrams"]
+        self._order = state["order"]
+        self._next_seq = state["next_seq"]
+        self._max_name_tokens = state["max_name_tokens"]
+
+    def _first(self, candidates: Iterable[str]) -> Optional[str]:
+        """Return the earliest indexed profile among the candidates."""
+        return min(candidates, key=self._order.__getitem__, default=None)
+
+    def match_name(self, text: str) -> Optional[str]:
+        """
+        Find a profile whose name contains the given name as a phrase.
+
+        Args:
+            text: Name fragment, e.g. "John" or "John Smith's"
+
+        Returns:
+            Profile ID if found, None otherwise
+        """
+        tokens = tokenize_name(text)
+        if not tokens:
+            return None
+
+        postings = [self._token_postings.get(token) for token in set(tokens)]
+        if not all(postings):
+            return None
+
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for other in postings[1:]:
+            candidates &= other
+            if not candidates:
+                return None
+
+        if len(tokens) > 1:
+            phrase = f" {' '.join(tokens)} "
+            candidates = {pid for pid in candidates if phrase in f" {self._names[pid]} "}
+
+        return self._first(candidates)
+
+    def _best_trigram_match(self, query: FrozenSet[str], candidates: Iterable[str],
+                            min_similarity: float) -> Optional[Tuple[str, float]]:
+        """Score candidates by trigram Jaccard similarity and return the best one."""
+        best_match = None
+        best_score = 0.0
+        best_order = 0
+
+        for profile_id in candidates:
+            trigrams = self._trigrams[profile_id]
+            shared = len(query & trigrams)
+            score = shared / (len(query) + len(trigrams) - shared)
+            order = self._order[profile_id]
+            if score >= min_similarity and (score > best_score or (score == best_score and order < best_order)):
+                best_match = profile_id
+                best_score = score
+                best_order = order
+
+        if best_match is None:
+            return None
+        return best_match, best_score
+
+    def match_similar_name(self, text: str, min_similarity: float = 0.4, max_candidates: int = 1024,
+                           posting_budget: int = 2048) -> Optional[Tuple[str, float]]:
+        """
+        Find the profile whose name is most similar to the given name.
+
+        Similarity is the Jaccard coefficient of the name trigrams. Only a
+        small candidate set is scored: names sharing a correctly spelled word
+        with the query, or failing that, the names sharing the most trigrams
+        across the rarest trigram postings. Names sharing a word are scored
+        again without the query words found in no name, so words around a
+        name, as in "Does Priya", do not push the correct profile below
+        min_similarity.
+
+        Args:
+            text: Possibly misspelled name, e.g. "Jhon Smith"
+            min_similarity: Minimum Jaccard similarity for a match
+            max_candidates: Maximum number of candidates to score
+            posting_budget: Maximum number of trigram posting entries to visit
+
+        Returns:
+            Tuple of (profile ID, similarity) if found, None otherwise
+        """
+        query = name_trigrams(text)
+        if not query:
+            return None
+
+        # A typo usually leaves at least one word intact, and the profiles
+        # sharing that word are the natural candidates.
+        tokens = tokenize_name(text)
+        known = [token for token in tokens if token in self._token_postings]
+        candidates: List[str] = []
+        for posting in sorted((self._token_postings[token] for token in set(known)), key=len):
+            if candidates and len(candidates) + len(posting) > max_candidates:
+                break
+            candidates.extend(islice(posting, max_candidates))
+
+        match = self._best_trigram_match(query, candidates, min_similarity)
+        if match:
+            return match
+
+        if candidates and len(known) < len(tokens):
+            match = self._best_trigram_match(name_trigrams(" ".join(known)), candidates, min_similarity)
+            if match:
+                return match
+
+        # Otherwise count shared trigrams, visiting the rarest postings first.
+        postings = sorted((self._trigram_postings.get(trigram, ()) for trigram in query), key=len)
+        counts: Counter = Counter()
+        visited = 0
+        for posting in postings:
+            if visited and visited + len(posting) > posting_budget:
+                break
+            counts.update(posting)
+            visited += len(posting)
+
+        candidates = [profile_id for profile_id, _ in counts.most_common(max_candidates // 32)]
+        return self._best_trigram_match(query, candidates, min_similarity)
+
+    def match_contained_name(self, text: str) -> Optional[str]:
+        """
+        Find a profile whose full name appears inside the given text.
+
+        Args:
+            text: Free text that may contain a full profile name
+
+        Returns:
+            Profile ID if found, None otherwise
+        """
+        tokens = tokenize_name(text)
+        candidates = set()
+
+        for start in range(len(tokens)):
+            stop = min(len(tokens), start + self._max_name_tokens)
+            for end in range(start + 1, stop + 1):
+                owners = self._full_names.get(" ".join(tokens[start:end]))
+                if owners:
+                    candidates.update(owners)
+
+        return self._first(candidates)
+
+    def match_profile_id(self, text: str) -> Optional[str]:
+        """
+        Find a profile ID mentioned verbatim in the given text.
+
+        Args:
+            text: Free text that may contain a profile ID such as "john-smith"
+
+        Returns:
+            Profile ID if found, None otherwise
+        """
+        candidates = set()
+
+        for token in _ID_TOKEN_RE.findall(text.lower()):
+            parts = token.split("-")
+            for start in range(len(parts)):
+                for end in range(start + 1, len(parts) + 1):
+                    profile_id = self._ids.get("-".join(parts[start:end]))
+                    if profile_id is not None:
+                        candidates.add(profile_id)
+
+        return self._first(candidates)
@@ -0,0 +1,206 @@
+"""
+Bulk Profile Ingestion
+
+This module ingests profiles from a streamed NDJSON upload, one profile per
+line. Lines are split off the stream as it arrives and handled in bounded
+batches: each batch is parsed and validated, applied to the processor
+under one index update and queued for write-behind persistence. Memory use
+therefore depends on the batch size, not on the size of the upload.
+"""
+
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from profile_io import json_loads
+from profile_model import CompactProfile
+from profile_writer import ProfileWriter
+
+# Records longer than this are rejected without being buffered
+MAX_RECORD_BYTES = 1024 * 1024
+
+# Batches are applied once they hold this many records or bytes
+BATCH_SIZE = 500
+MAX_BATCH_BYTES = 4 * 1024 * 1024
+
+
+def validate_profile_data(profile_data: Any) -> str:
+    """
+    Check the fields required to store a profile.
+
+    Args:
+        profile_data: Decoded profile payload
+
+    Returns:
+        Profile identifier
+
+    Raises:
+        ValueError: If a required field is missing or the profile ID is not a plain file name
+    """
+    if not isinstance(profile_data, dict):
+        raise ValueError("profile must be a JSON object")
+
+    profile_id = profile_data.get("profile_id")
+    if not profile_id:
+        raise ValueError("profile_id is required")
+
+    basics = profile_data.get("basics")
+    if not basics or not isinstance(basics, dict) or not basics.get("name"):
+        raise ValueError("basics.name is required")
+    if not isinstance(basics["name"], str):
+        raise ValueError("basics.name must be a string")
+
+    if not isinstance(profile_id, str) or os.path.basename(profile_id) != profile_id or profile_id.startswith("."):
+        raise ValueError("profile_id must be a valid file name")
+
+    return profile_id
+
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes],
+                            max_record_bytes: int = MAX_RECORD_BYTES) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Split a byte stream into lines without buffering more than one line.
+
+    Args:
+        chunks: Byte chunks of the stream
+        max_record_bytes: Maximum length of a line
+
+    Returns:
+        Async iterator of (line number, line), where line is None if it was too long
+    """
+    buffer = bytearray()
+    line_number = 0
+    oversized = False
+
+    async for chunk in chunks:
+        start = 0
+        while True:
+            newline = chunk.find(b"\n", start)
+            if newline < 0:
+                if not oversized:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_record_bytes:
+                        # Drop the rest of this line instead of buffering it
+                        oversized = True
+                        buffer.clear()
+                break
+
+            line_number += 1
+            if not oversized:
+                buffer += chunk[start:newline]
+            if oversized or len(buffer) > max_record_bytes:
+                yield line_number, None
+            else:
+                yield line_number, bytes(buffer)
+            buffer.clear()
+            oversized = False
+            start = newline + 1
+
+    if buffer or oversized:
+        line_number += 1
+        yield line_number, None if oversized else bytes(buffer)
+
+
+class BulkIngestor:
+    def __init__(self, processor, writer: ProfileWriter, batch_size: int = BATCH_SIZE,
+                 max_errors: int = 100):
+        """
+        Initialize the bulk ingestor.
+
+        Args:
+            processor: ProfileQueryProcessor receiving the profiles
+            writer: Writer persisting the profiles
+            batch_size: Maximum number of records applied to the processor at once
+            max_errors: Maximum number of failed records listed in the summary
+        """
+        self.processor = processor
+        self.writer = writer
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+
+    async def ingest(self, chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """
+        Ingest an NDJSON stream of profiles.
+
+        Blank lines are ignored. Invalid records are skipped and reported;
+        they do not stop the upload.
+
+        Args:
+            chunks: Byte chunks of the upload
+
+        Returns:
+            Summary with status, counts of received, inserted and failed
+            records, and the line number and error of the first failed records
+        """
+        summary: Dict[str, Any] = {
+            "status": "success",
+            "received": 0,
+            "inserted": 0,
+            "failed": 0,
+            "errors": [],
+            "errors_truncated": False
+        }
+        loop = asyncio.get_running_loop()
+        batch: List[Tuple[int, Optional[bytes]]] = []
+        batch_bytes = 0
+
+        async for line_number, line in iter_ndjson_lines(chunks):
+            if line is not None and not line.strip():
+                continue
+
+            summary["received"] += 1
+            batch.append((line_number, line))
+            batch_bytes += len(line) if line else 0
+            if len(batch) >= self.batch_size or batch_bytes >= MAX_BATCH_BYTES:
+                # Parsing, indexing and queueing writes happen off the event loop
+                self._record(summary, await loop.run_in_executor(None, self._apply_batch, batch))
+                batch = []
+                batch_bytes = 0
+
+        if batch:
+            self._record(summary, await loop.run_in_executor(None, self._apply_batch, batch))
+
+        if summary["failed"]:
+            summary["status"] = "partial" if summary["inserted"] else "failed"
+        return summary
+
+    def _apply_batch(self, batch: List[Tuple[int, Optional[bytes]]]) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Parse, validate and store a batch of records.
+
+        Returns:
+            Tuple of (number of stored profiles, errors of the failed records)
+        """
+        profiles = []
+        payloads = []
+        errors = []
+        for line_number, line in batch:
+            if line is None:
+                errors.append({"line": line_number, "error": f"Record exceeds {MAX_RECORD_BYTES} bytes"})
+                continue
+            try:
+                profile_data = json_loads(line)
+                profile_id = validate_profile_data(profile_data)
+                profile = CompactProfile.from_dict(profile_id, profile_data)
+                # Rejected here rather than by the upsert, which would refuse the whole batch
+                self.processor.validate_profile(profile)
+                profiles.append(profile)
+                payloads.append(profile_data)
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                errors.append({"line": line_number, "error": f"Invalid profile data: {str(e)}"})
+
+        # Queued first, so the profile watcher does not reload older files over the new profiles
+        for profile, profile_data in zip(profiles, payloads):
+            self.writer.write(profile.profile_id, profile_data)
+        self.processor.upsert_compact_profiles(profiles)
+        return len(profiles), errors
+
+    def _record(self, summary: Dict[str, Any], outcome: Tuple[int, List[Dict[str, Any]]]) -> None:
+        """Add the outcome of a batch to the summary."""
+        inserted, errors = outcome
+        summary["inserted"] += inserted
+        summary["failed"] += len(errors)
+        room = self.max_errors - len(summary["errors"])
+        summary["errors"].extend(errors[:room])
+        if len(errors) > room:
+            summary["errors_truncated"] = True
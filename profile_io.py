@@ -0,0 +1,192 @@
+"""
+Profile File I/O
+
+This module provides helpers for reading profile files from the profiles
+directory, including a parallel loader used at startup.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from metrics import DEFAULT_BUCKETS, REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Duration of loading the corpus at startup and of loading single profiles on demand
+PROFILE_LOAD_SECONDS = REGISTRY.histogram(
+    "profile_load_seconds", "Duration of profile loads", ("source",),
+    DEFAULT_BUCKETS + (30.0, 60.0, 120.0, 300.0, 600.0)
+)
+
+T = TypeVar("T")
+
+# Name of the JSON decoder in use, reported in load logs
+JSON_DECODER = "orjson" if orjson is not None else "json"
+
+# Number of profile files handled by one worker task
+LOAD_CHUNK_SIZE = 256
+
+
+def json_loads(data: bytes) -> Any:
+    """
+    Decode JSON with the fastest available decoder.
+
+    Args:
+        data: Raw JSON bytes
+
+    Returns:
+        Decoded value
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def profile_path(profiles_dir: str, profile_id: str) -> str:
+    """
+    Get the path of a profile file.
+
+    Args:
+        profiles_dir: Directory containing profile data
+        profile_id: Profile identifier
+
+    Returns:
+        Path to the profile's JSON file
+    """
+    return os.path.join(profiles_dir, f"{profile_id}.json")
+
+
+def read_profile_file(profiles_dir: str, profile_id: str) -> Dict[str, Any]:
+    """
+    Read and decode a single profile file.
+
+    Args:
+        profiles_dir: Directory containing profile data
+        profile_id: Profile identifier
+
+    Returns:
+        Profile data dictionary
+    """
+    with open(profile_path(profiles_dir, profile_id), "rb") as f:
+        return json_loads(f.read())
+
+
+def write_profile_file(profiles_dir: str, profile_id: str, profile_data: Dict[str, Any],
+                       fsync: bool = True) -> None:
+    """
+    Write a profile file atomically.
+
+    The profile is written to a temporary file that is renamed over the
+    profile file, so readers never see a partially written profile.
+
+    Args:
+        profiles_dir: Directory containing profile data
+        profile_id: Profile identifier
+        profile_data: Profile data dictionary
+        fsync: Whether to flush the file to disk before renaming it
+    """
+    fd, temp_path = tempfile.mkstemp(prefix=f".{profile_id}.", suffix=".tmp", dir=profiles_dir)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(profile_data, f, indent=2)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_path, profile_path(profiles_dir, profile_id))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def list_profile_ids(profiles_dir: str) -> List[str]:
+    """
+    List the IDs of all profile files in a directory.
+
+    Args:
+        profiles_dir: Directory containing profile data
+
+    Returns:
+        Profile identifiers, in directory order
+    """
+    with os.scandir(profiles_dir) as entries:
+        return [entry.name[:-5] for entry in entries
+                if entry.name.endswith(".json") and entry.is_file()]
+
+
+def default_load_workers() -> int:
+    """Get the default number of loader threads."""
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def load_profiles(
+    profiles_dir: str,
+    profile_ids: List[str],
+    transform: Callable[[str, Dict[str, Any]], T],
+    workers: Optional[int] = None,
+    progress_interval: float = 5.0
+) -> Dict[str, T]:
+    """
+    Read, decode and transform many profile files on a thread pool.
+
+    Files that cannot be read or decoded are logged and skipped.
+
+    Args:
+        profiles_dir: Directory containing profile data
+        profile_ids: Profile identifiers to load
+        transform: Function turning (profile_id, profile data) into the stored value
+        workers: Number of loader threads (defaults to default_load_workers())
+        progress_interval: Seconds between progress log lines
+
+    Returns:
+        Mapping of profile ID to transformed value, in the order of profile_ids
+    """
+    workers = workers or default_load_workers()
+    total = len(profile_ids)
+    progress = {"done": 0, "logged_at": time.monotonic()}
+    progress_lock = threading.Lock()
+
+    def load_chunk(chunk: List[str]) -> List[Tuple[str, Optional[T]]]:
+        loaded = []
+        for profile_id in chunk:
+            try:
+                loaded.append((profile_id, transform(profile_id, read_profile_file(profiles_dir, profile_id))))
+            except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                logger.error(f"Could not load profile {profile_id}: {str(e)}")
+                loaded.append((profile_id, None))
+
+        with progress_lock:
+            progress["done"] += len(chunk)
+            now = time.monotonic()
+            if now - progress["logged_at"] >= progress_interval:
+                progress["logged_at"] = now
+                logger.info(f"Loaded {progress['done']}/{total} profiles")
+        return loaded
+
+    chunks = [profile_ids[i:i + LOAD_CHUNK_SIZE] for i in range(0, total, LOAD_CHUNK_SIZE)]
+    results: Dict[str, T] = {}
+
+    executor = None
+    if workers > 1 and len(chunks) > 1:
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="profile-loader")
+
+    try:
+        loaded_chunks = executor.map(load_chunk, chunks) if executor else map(load_chunk, chunks)
+        for loaded in loaded_chunks:
+            results.update((profile_id, value) for profile_id, value in loaded if value is not None)
+    finally:
+        if executor:
+            executor.shutdown()
+
+    return results
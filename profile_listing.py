@@ -0,0 +1,175 @@
+"""
+Profile Listing
+
+This module serves the profile listing behind GET /profiles. Summaries are
+sorted by profile ID and serialized once per corpus version; pages are
+cached with an ETag derived from their content, so repeated polls of an
+unchanged corpus can be answered without rebuilding or re-serializing
+anything.
+"""
+
+import base64
+import binascii
+import bisect
+import hashlib
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from caches import LRUCache
+
+# Fields of a profile summary, in output order
+LISTING_FIELDS = ("profile_id", "name", "headline")
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """
+    Parse a comma-separated field projection.
+
+    Args:
+        fields: Requested fields, e.g. "profile_id,name", or None for all fields
+
+    Returns:
+        Requested fields in output order
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    if not fields:
+        return LISTING_FIELDS
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested.difference(LISTING_FIELDS)
+    if unknown or not requested:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown)) or fields}. "
+                         f"Available fields: {', '.join(LISTING_FIELDS)}")
+    return tuple(field for field in LISTING_FIELDS if field in requested)
+
+
+def encode_cursor(profile_id: str) -> str:
+    """Encode the last profile ID of a page as an opaque cursor."""
+    return base64.urlsafe_b64encode(profile_id.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return base64.b64decode(padded, altchars=b"-_", validate=True).decode("utf-8")
+    except (binascii.Error, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}") from None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag, using weak comparison.
+
+    Args:
+        if_none_match: Header value, possibly a comma-separated list or "*"
+        etag: Current entity tag
+
+    Returns:
+        True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ProfileListing:
+    def __init__(self, processor, max_pages: int = 256):
+        """
+        Initialize the profile listing.
+
+        Args:
+            processor: ProfileQueryProcessor whose profiles are listed
+            max_pages: Maximum number of serialized pages kept per corpus version
+        """
+        self.processor = processor
+        self.max_pages = max_pages
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._ids: List[str] = []
+        self._summaries: List[Tuple[str, str, Optional[str]]] = []
+        # fields -> serialized JSON object of every summary, in ID order
+        self._rows: Dict[Tuple[str, ...], List[bytes]] = {}
+        # (fields, cursor, limit) -> (body, etag, next cursor)
+        self._pages = LRUCache(max_pages)
+
+    def _refresh(self) -> None:
+        """Rebuild the sorted summaries if the corpus changed; the caller must hold the lock."""
+        version = self.processor.corpus_version
+        if version == self._version:
+            return
+
+        summaries = sorted(
+            (summary["profile_id"], summary["name"], summary["headline"])
+            for summary in self.processor.list_profile_summaries()
+        )
+        self._summaries = summaries
+        self._ids = [summary[0] for summary in summaries]
+        self._rows = {}
+        self._pages.clear()
+        self._version = version
+
+    def _serialized_rows(self, fields: Tuple[str, ...]) -> List[bytes]:
+        """Serialize every summary with the given fields; the caller must hold the lock."""
+        rows = self._rows.get(fields)
+        if rows is None:
+            positions = [LISTING_FIELDS.index(field) for field in fields]
+            rows = [
+                json.dumps({fields[i]: summary[position] for i, position in enumerate(positions)},
+                           ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                for summary in self._summaries
+            ]
+            self._rows[fields] = rows
+        return rows
+
+    def page(self, fields: Tuple[str, ...] = LISTING_FIELDS, cursor: Optional[str] = None,
+             limit: Optional[int] = None) -> Tuple[bytes, str, Optional[str]]:
+        """
+        Get one page of profile summaries, sorted by profile ID.
+
+        Args:
+            fields: Fields to include, as returned by parse_fields
+            cursor: Cursor returned with the previous page, or None for the first page
+            limit: Maximum number of summaries, or None for all remaining summaries
+
+        Returns:
+            Tuple of (JSON array body, ETag, cursor of the next page or None)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        with self._lock:
+            self._refresh()
+            key = (fields, cursor, limit)
+            cached = self._pages.get(key)
+            if cached is not None:
+                return cached
+
+            # Keyset pagination: pages stay stable while profiles are added
+            start = bisect.bisect_right(self._ids, decode_cursor(cursor)) if cursor else 0
+            end = len(self._ids) if limit is None else min(start + limit, len(self._ids))
+            body = b"[" + b",".join(self._serialized_rows(fields)[start:end]) + b"]"
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            next_cursor = encode_cursor(self._ids[end - 1]) if end < len(self._ids) else None
+
+            page = (body, etag, next_cursor)
+            self._pages.put(key, page)
+            return page
@@ -0,0 +1,224 @@
+"""
+Compact Profile Model
+
+This module provides a compact in-memory representation of LinkedIn profile
+data. Records use __slots__ instead of per-instance dicts, lists are stored
+as tuples, and values that repeat across profiles (company names, skills,
+languages, ...) are interned so every profile shares one string object.
+"""
+
+import sys
+from typing import Any, Dict, Optional, Tuple
+
+
+def _shared(value: Any) -> Any:
+    """Intern a string value that is likely to repeat across profiles."""
+    if type(value) is str:
+        return sys.intern(value)
+    return value
+
+
+def _record_tuple(record: Any) -> Tuple[Any, ...]:
+    """Get the slot values of a record, in constructor argument order."""
+    return tuple(getattr(record, slot) for slot in record.__slots__)
+
+
+class Basics:
+    __slots__ = ("name", "headline", "location", "summary", "profile_url", "captured_at")
+
+    def __init__(self, name: str, headline: Optional[str] = None, location: Optional[str] = None,
+                 summary: Optional[str] = None, profile_url: Optional[str] = None,
+                 captured_at: Optional[str] = None):
+        self.name = name
+        self.headline = headline
+        self.location = location
+        self.summary = summary
+        self.profile_url = profile_url
+        self.captured_at = captured_at
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Basics":
+        name = data["name"]
+        if not isinstance(name, str):
+            raise TypeError(f"basics.name must be a string, not {type(name).__name__}")
+        return cls(
+            name,
+            _shared(data.get("headline")),
+            _shared(data.get("location")),
+            data.get("summary"),
+            data.get("profile_url"),
+            data.get("captured_at")
+        )
+
+
+class ContactInfo:
+    __slots__ = ("email", "phone", "websites", "twitter")
+
+    def __init__(self, email: Optional[str] = None, phone: Optional[str] = None,
+                 websites: Tuple[str, ...] = (), twitter: Optional[str] = None):
+        self.email = email
+        self.phone = phone
+        self.websites = websites
+        self.twitter = twitter
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ContactInfo":
+        return cls(
+            data.get("email"),
+            data.get("phone"),
+            tuple(data.get("websites") or ()),
+            data.get("twitter")
+        )
+
+
+class Position:
+    __slots__ = ("title", "company", "location", "duration", "description")
+
+    def __init__(self, title: str, company: str, location: Optional[str] = None,
+                 duration: Optional[str] = None, description: Optional[str] = None):
+        self.title = title
+        self.company = company
+        self.location = location
+        self.duration = duration
+        self.description = description
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Position":
+        return cls(
+            _shared(data.get("title")),
+            _shared(data.get("company")),
+            _shared(data.get("location")),
+            _shared(data.get("duration")),
+            data.get("description")
+        )
+
+
+class Education:
+    __slots__ = ("degree", "institution", "date_range", "description")
+
+    def __init__(self, degree: str, institution: str, date_range: Optional[str] = None,
+                 description: Optional[str] = None):
+        self.degree = degree
+        self.institution = institution
+        self.date_range = date_range
+        self.description = description
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Education":
+        return cls(
+            _shared(data.get("degree")),
+            _shared(data.get("institution")),
+            _shared(data.get("date_range")),
+            data.get("description")
+        )
+
+
+class Language:
+    __slots__ = ("language", "proficiency")
+
+    def __init__(self, language: str, proficiency: Optional[str] = None):
+        self.language = language
+        self.proficiency = proficiency
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Language":
+        return cls(_shared(data.get("language")), _shared(data.get("proficiency")))
+
+
+class Certification:
+    __slots__ = ("name", "issuer", "date")
+
+    def __init__(self, name: str, issuer: Optional[str] = None, date: Optional[str] = None):
+        self.name = name
+        self.issuer = issuer
+        self.date = date
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Certification":
+        return cls(_shared(data.get("name")), _shared(data.get("issuer")), _shared(data.get("date")))
+
+
+class CompactProfile:
+    __slots__ = ("profile_id", "basics", "contact_info", "experience", "education", "skills",
+                 "languages", "certifications")
+
+    def __init__(self, profile_id: str, basics: Basics, contact_info: Optional[ContactInfo] = None,
+                 experience: Tuple[Position, ...] = (), education: Tuple[Education, ...] = (),
+                 skills: Tuple[str, ...] = (), languages: Tuple[Language, ...] = (),
+                 certifications: Tuple[Certification, ...] = ()):
+        self.profile_id = profile_id
+        self.basics = basics
+        self.contact_info = contact_info
+        self.experience = experience
+        self.education = education
+        self.skills = skills
+        self.languages = languages
+        self.certifications = certifications
+
+    @classmethod
+    def from_dict(cls, profile_id: str, data: Dict[str, Any]) -> "CompactProfile":
+        """
+        Build a compact profile from the JSON profile schema.
+
+        Sections outside the schema used for answering queries (projects,
+        publications, recommendations) are not kept in memory.
+
+        Args:
+            profile_id: Profile identifier
+            data: Profile data dictionary as stored in the profiles directory
+
+        Returns:
+            Compact profile
+        """
+        contact_info = data.get("contact_info")
+        return cls(
+            sys.intern(profile_id),
+            Basics.from_dict(data["basics"]),
+            ContactInfo.from_dict(contact_info) if contact_info else None,
+            tuple(Position.from_dict(item) for item in data.get("experience") or ()),
+            tuple(Education.from_dict(item) for item in data.get("education") or ()),
+            tuple(_shared(skill) for skill in data.get("skills") or ()),
+            tuple(Language.from_dict(item) for item in data.get("languages") or ()),
+            tuple(Certification.from_dict(item) for item in data.get("certifications") or ())
+        )
+
+    def to_tuple(self) -> Tuple[Any, ...]:
+        """
+        Convert the profile to nested tuples of plain values, e.g. for marshal.
+
+        Returns:
+            Tuple accepted by from_tuple
+        """
+        return (
+            self.profile_id,
+            _record_tuple(self.basics),
+            _record_tuple(self.contact_info) if self.contact_info else None,
+            tuple(_record_tuple(item) for item in self.experience),
+            tuple(_record_tuple(item) for item in self.education),
+            self.skills,
+            tuple(_record_tuple(item) for item in self.languages),
+            tuple(_record_tuple(item) for item in self.certifications)
+        )
+
+    @classmethod
+    def from_tuple(cls, values: Tuple[Any, ...]) -> "CompactProfile":
+        """
+        Rebuild a profile from the output of to_tuple.
+
+        Args:
+            values: Nested tuples produced by to_tuple
+
+        Returns:
+            Compact profile
+        """
+        profile_id, basics, contact_info, experience, education, skills, languages, certifications = values
+        return cls(
+            profile_id,
+            Basics(*basics),
+            ContactInfo(*contact_info) if contact_info else None,
+            tuple(Position(*item) for item in experience),
+            tuple(Education(*item) for item in education),
+            skills,
+            tuple(Language(*item) for item in languages),
+            tuple(Certification(*item) for item in certifications)
+        )
@@ -0,0 +1,239 @@
+"""
+Profile Corpus Snapshot
+
+This module packs the whole profile corpus and its name index into a single
+file that is memory-mapped at startup. Only a small header (profile IDs,
+names, headlines, offsets and the name index) is decoded up front; profile
+bodies are decoded from the mapping on demand.
+
+File layout:
+    MAGIC | header length (8 bytes, little endian) | header | profile bodies
+
+The header and bodies are encoded with marshal, which is fast but specific
+to the Python version, so a snapshot written by another Python version is
+treated as stale. Snapshots are only ever read from paths configured by the
+operator; they are not meant to be exchanged with untrusted parties.
+"""
+
+import hashlib
+import logging
+import marshal
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from profile_index import ProfileNameIndex
+from profile_io import list_profile_ids, load_profiles
+from profile_model import CompactProfile
+
+logger = logging.getLogger(__name__)
+
+# Snapshot path used by main.py --mode snapshot and the API server unless PROFILE_SNAPSHOT is set
+DEFAULT_SNAPSHOT_PATH = "profiles.snapshot"
+
+MAGIC = b"LIQBSNAP"
+FORMAT_VERSION = 1
+_LENGTH = struct.Struct("<Q")
+
+
+def directory_fingerprint(profiles_dir: str) -> Tuple[int, str]:
+    """
+    Fingerprint the profile files of a directory from their names, sizes and mtimes.
+
+    Args:
+        profiles_dir: Directory containing profile data
+
+    Returns:
+        Tuple of (number of profile files, hex digest)
+    """
+    entries = []
+    with os.scandir(profiles_dir) as scan:
+        for entry in scan:
+            if entry.name.endswith(".json") and entry.is_file():
+                stat = entry.stat()
+                entries.append(f"{entry.name}:{stat.st_size}:{stat.st_mtime_ns}")
+
+    digest = hashlib.sha1()
+    for line in sorted(entries):
+        digest.update(line.encode("utf-8"))
+        digest.update(b"\n")
+    return len(entries), digest.hexdigest()
+
+
+def _runtime_tag() -> Tuple[int, int, int]:
+    """Identify the interpreter that can read a snapshot."""
+    return sys.version_info[0], sys.version_info[1], marshal.version
+
+
+def build_snapshot(profiles_dir: str, snapshot_path: str, workers: Optional[int] = None) -> int:
+    """
+    Build a snapshot of a profiles directory.
+
+    The snapshot is written to a temporary file and atomically renamed into
+    place, so readers never see a partially written snapshot.
+
+    Args:
+        profiles_dir: Directory containing profile data
+        snapshot_path: Path of the snapshot file to write
+        workers: Number of loader threads
+
+    Returns:
+        Number of profiles in the snapshot
+    """
+    start = time.perf_counter()
+
+    # Fingerprint before reading, so files changed during the build make the snapshot stale
+    fingerprint = directory_fingerprint(profiles_dir)
+    profiles = load_profiles(profiles_dir, list_profile_ids(profiles_dir), CompactProfile.from_dict, workers)
+
+    name_index = ProfileNameIndex()
+    entries = []
+    bodies = []
+    offset = 0
+    for profile_id, profile in profiles.items():
+        name_index.add(profile_id, profile.basics.name)
+        body = marshal.dumps(profile.to_tuple())
+        entries.append((profile_id, offset, len(body), profile.basics.name, profile.basics.headline))
+        bodies.append(body)
+        offset += len(body)
+
+    header = marshal.dumps({
+        "format": FORMAT_VERSION,
+        "runtime": _runtime_tag(),
+        "fingerprint": fingerprint,
+        "created_at": time.time(),
+        "profiles": entries,
+        "name_index": name_index.get_state()
+    })
+
+    directory = os.path.dirname(os.path.abspath(snapshot_path))
+    fd, temp_path = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(_LENGTH.pack(len(header)))
+            f.write(header)
+            for body in bodies:
+                f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, snapshot_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+    logger.info(f"Wrote snapshot of {len(entries)} profiles to {snapshot_path} "
+                f"in {time.perf_counter() - start:.2f}s")
+    return len(entries)
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file cannot be used."""
+
+
+class ProfileSnapshot:
+    def __init__(self, snapshot_path: str):
+        """
+        Open and memory-map a snapshot file.
+
+        Args:
+            snapshot_path: Path of the snapshot file
+
+        Raises:
+            SnapshotError: If the file is not a readable snapshot for this Python version
+        """
+        self.path = snapshot_path
+        self._file = open(snapshot_path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            self._file.close()
+            raise SnapshotError(f"Empty snapshot file {snapshot_path}") from e
+
+        try:
+            prefix_length = len(MAGIC) + _LENGTH.size
+            if self._map[:len(MAGIC)] != MAGIC:
+                raise SnapshotError(f"{snapshot_path} is not a profile snapshot")
+
+            (header_length,) = _LENGTH.unpack(self._map[len(MAGIC):prefix_length])
+            header = marshal.loads(self._map[prefix_length:prefix_length + header_length])
+            if header.get("format") != FORMAT_VERSION or tuple(header.get("runtime", ())) != _runtime_tag():
+                raise SnapshotError(f"{snapshot_path} was written by an incompatible version")
+        except (SnapshotError, ValueError, EOFError, TypeError, struct.error) as e:
+            self.close()
+            if isinstance(e, SnapshotError):
+                raise
+            raise SnapshotError(f"Corrupt snapshot {snapshot_path}: {str(e)}") from e
+
+        self._body_start = prefix_length + header_length
+        self.fingerprint: Tuple[int, str] = tuple(header["fingerprint"])
+        self.created_at: float = header["created_at"]
+        self._name_index_state: Dict[str, Any] = header["name_index"]
+        # profile ID -> (offset, length, name, headline)
+        self._entries: Dict[str, Tuple[int, int, str, Optional[str]]] = {
+            profile_id: (offset, length, name, headline)
+            for profile_id, offset, length, name, headline in header["profiles"]
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, profile_id: object) -> bool:
+        return profile_id in self._entries
+
+    def is_current(self, profiles_dir: str) -> bool:
+        """
+        Check whether the snapshot still matches a profiles directory.
+
+        Args:
+            profiles_dir: Directory containing profile data
+
+        Returns:
+            True if no profile file was added, removed or modified since the snapshot was built
+        """
+        return directory_fingerprint(profiles_dir) == self.fingerprint
+
+    def summaries(self) -> Iterator[Tuple[str, str, Optional[str]]]:
+        """
+        Iterate over profile metadata without decoding any bodies.
+
+        Returns:
+            Iterator of (profile_id, name, headline)
+        """
+        for profile_id, (_, _, name, headline) in self._entries.items():
+            yield profile_id, name, headline
+
+    def read(self, profile_id: str) -> CompactProfile:
+        """
+        Decode one profile from the snapshot.
+
+        Args:
+            profile_id: Profile identifier
+
+        Returns:
+            Compact profile
+        """
+        offset, length, _, _ = self._entries[profile_id]
+        start = self._body_start + offset
+        return CompactProfile.from_tuple(marshal.loads(self._map[start:start + length]))
+
+    def name_index(self) -> ProfileNameIndex:
+        """
+        Restore the precomputed name index.
+
+        Returns:
+            Name index covering every profile in the snapshot
+        """
+        name_index = ProfileNameIndex()
+        name_index.set_state(self._name_index_state)
+        return name_index
+
+    def close(self) -> None:
+        """Unmap and close the snapshot file."""
+        self._map.close()
+        self._file.close()
@@ -0,0 +1,190 @@
+"""
+Lazy Profile Store
+
+This module provides a dictionary-like profile store that keeps only
+lightweight metadata (name and headline) for every profile in memory and
+loads full profiles on demand into a bounded LRU cache.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from profile_io import PROFILE_LOAD_SECONDS, list_profile_ids, load_profiles, read_profile_file
+from profile_model import Basics, CompactProfile
+from profile_snapshot import ProfileSnapshot
+
+logger = logging.getLogger(__name__)
+
+_ON_DEMAND_LOAD_SECONDS = PROFILE_LOAD_SECONDS.labels("on_demand")
+
+
+def _read_summary(profile_id: str, data: Dict) -> Tuple[str, Optional[str]]:
+    """Get the name and headline of a profile file, validated like a full profile."""
+    basics = Basics.from_dict(data["basics"])
+    return basics.name, basics.headline
+
+
+class LazyProfileStore(MutableMapping):
+    def __init__(self, profiles_dir: str, max_loaded: int = 1024):
+        """
+        Initialize the lazy profile store.
+
+        Args:
+            profiles_dir: Directory containing profile data
+            max_loaded: Maximum number of full profile bodies kept in memory
+        """
+        if max_loaded <= 0:
+            raise ValueError("max_loaded must be positive")
+
+        self.profiles_dir = profiles_dir
+        self.max_loaded = max_loaded
+        # profile ID -> (name, headline)
+        self._metadata: Dict[str, Tuple[str, Optional[str]]] = {}
+        self._bodies: "OrderedDict[str, CompactProfile]" = OrderedDict()
+        # Snapshot holding current bodies for the profiles in _snapshot_ids
+        self._snapshot: Optional[ProfileSnapshot] = None
+        self._snapshot_ids: Set[str] = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def scan(self, workers: Optional[int] = None) -> None:
+        """
+        Read metadata for every profile in the profiles directory, discarding the bodies.
+
+        Args:
+            workers: Number of loader threads
+        """
+        metadata = load_profiles(
+            self.profiles_dir,
+            list_profile_ids(self.profiles_dir),
+            _read_summary,
+            workers
+        )
+
+        with self._lock:
+            self._metadata = metadata
+            self._bodies.clear()
+            self._snapshot = None
+            self._snapshot_ids = set()
+
+    def attach_snapshot(self, snapshot: ProfileSnapshot) -> None:
+        """
+        Serve metadata and profile bodies from a snapshot instead of the JSON files.
+
+        Profiles replaced after attaching are read from their JSON files again.
+
+        Args:
+            snapshot: Open ProfileSnapshot that is current for the profiles directory
+        """
+        metadata = {profile_id: (name, headline) for profile_id, name, headline in snapshot.summaries()}
+
+        with self._lock:
+            self._metadata = metadata
+            self._bodies.clear()
+            self._snapshot = snapshot
+            self._snapshot_ids = set(metadata)
+
+    def summary(self, profile_id: str) -> Tuple[str, Optional[str]]:
+        """
+        Get the metadata of a profile without loading its body.
+
+        Args:
+            profile_id: Profile identifier
+
+        Returns:
+            Tuple of (name, headline)
+        """
+        return self._metadata[profile_id]
+
+    def summaries(self) -> Iterator[Tuple[str, str, Optional[str]]]:
+        """
+        Iterate over profile metadata without loading any bodies.
+
+        Returns:
+            Iterator of (profile_id, name, headline)
+        """
+        for profile_id, (name, headline) in list(self._metadata.items()):
+            yield profile_id, name, headline
+
+    def __getitem__(self, profile_id: str) -> CompactProfile:
+        with self._lock:
+            body = self._bodies.get(profile_id)
+            if body is not None:
+                self._bodies.move_to_end(profile_id)
+                self.hits += 1
+                return body
+            if profile_id not in self._metadata:
+                raise KeyError(profile_id)
+            self.misses += 1
+
+            snapshot = self._snapshot if profile_id in self._snapshot_ids else None
+
+        # Read outside the lock so slow disks do not serialize cache hits
+        start = time.perf_counter()
+        if snapshot is not None:
+            body = snapshot.read(profile_id)
+        else:
+            try:
+                body = CompactProfile.from_dict(profile_id, read_profile_file(self.profiles_dir, profile_id))
+            except FileNotFoundError:
+                raise KeyError(profile_id) from None
+            except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                # Malformed files are treated like missing ones, as at startup
+                logger.error(f"Could not load profile {profile_id}: {str(e)}")
+                raise KeyError(profile_id) from e
+        _ON_DEMAND_LOAD_SECONDS.observe(time.perf_counter() - start)
+
+        with self._lock:
+            self._store_body(profile_id, body)
+        return body
+
+    def _store_body(self, profile_id: str, body: CompactProfile) -> None:
+        """Cache a profile body; the caller must hold the lock."""
+        self._bodies[profile_id] = body
+        self._bodies.move_to_end(profile_id)
+        while len(self._bodies) > self.max_loaded:
+            self._bodies.popitem(last=False)
+            self.evictions += 1
+
+    def __setitem__(self, profile_id: str, profile: CompactProfile) -> None:
+        with self._lock:
+            self._metadata[profile_id] = (profile.basics.name, profile.basics.headline)
+            self._snapshot_ids.discard(profile_id)
+            self._store_body(profile_id, profile)
+
+    def __delitem__(self, profile_id: str) -> None:
+        with self._lock:
+            del self._metadata[profile_id]
+            self._snapshot_ids.discard(profile_id)
+            self._bodies.pop(profile_id, None)
+
+    def __contains__(self, profile_id: object) -> bool:
+        return profile_id in self._metadata
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._metadata))
+
+    def __len__(self) -> int:
+        return len(self._metadata)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get store counters.
+
+        Returns:
+            Dictionary with profile count, resident bodies, hits, misses and evictions
+        """
+        return {
+            "profiles": len(self._metadata),
+            "loaded": len(self._bodies),
+            "max_loaded": self.max_loaded,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,283 @@
+"""
+Profile Watcher
+
+This module keeps the processor in sync with the profiles directory while
+the server runs. A background thread polls the directory, comparing the
+modification time and size of every profile file with the previous scan,
+and applies only the added, changed and deleted files: changed files are
+parsed outside the index lock and then applied in batches, so queries keep
+running during a reload.
+
+Polling needs no platform support and copes with files written in place,
+renamed into the directory or changed by other hosts on a shared volume.
+Stating every file is the expensive part, so a poll first checks the
+modification time of the directory itself, which changes whenever a file
+is created, renamed or deleted; files rewritten in place, which leave the
+directory untouched, are found by a full scan every full_scan_interval.
+
+Profiles the server itself is still writing are left alone: their file may
+be older than the version already in memory, and the writer records the
+file as current once the write is done.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from metrics import REGISTRY
+from profile_io import load_profiles
+from profile_model import CompactProfile
+
+logger = logging.getLogger(__name__)
+
+PROFILE_RELOAD_SECONDS = REGISTRY.histogram(
+    "profile_reload_seconds", "Duration of applying changes detected in the profiles directory",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+PROFILE_RELOAD_FILES = REGISTRY.counter(
+    "profile_reload_files_total", "Added, changed and deleted files detected in the profiles directory", ("change",)
+)
+PROFILE_RELOAD_ERRORS = REGISTRY.counter(
+    "profile_reload_errors_total", "Changed profile files that could not be loaded"
+)
+
+# Maximum number of profiles applied under one acquisition of the index lock
+APPLY_BATCH_SIZE = 500
+
+# Modification time and size of a profile file
+FileState = Tuple[int, int]
+
+# Directories modified this recently are scanned again, in case the file system
+# records modification times too coarsely to tell two changes apart
+RECENT_CHANGE_NS = 2_000_000_000
+
+
+def scan_profile_files(profiles_dir: str) -> Dict[str, FileState]:
+    """
+    Get the modification time and size of every profile file in a directory.
+
+    Args:
+        profiles_dir: Directory containing profile data
+
+    Returns:
+        Mapping of profile ID to (modification time in nanoseconds, size)
+    """
+    states = {}
+    with os.scandir(profiles_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                # Deleted between listing and stat
+                continue
+            if entry.is_file():
+                states[entry.name[:-5]] = (stat.st_mtime_ns, stat.st_size)
+    return states
+
+
+class ProfileWatcher:
+    def __init__(self, processor, interval: float = 2.0, full_scan_interval: float = 30.0,
+                 on_change: Optional[Callable[[str], None]] = None, load_workers: int = 4,
+                 is_writing: Optional[Callable[[str], bool]] = None):
+        """
+        Initialize the watcher, taking the current directory contents as already loaded.
+
+        Create the watcher right after the processor has loaded the directory, so
+        files changed in between are picked up by the first poll.
+
+        Args:
+            processor: ProfileQueryProcessor to keep in sync
+            interval: Seconds between polls
+            full_scan_interval: Seconds between full scans when the directory itself is unchanged
+            on_change: Optional callback invoked with the ID of every applied profile change
+            load_workers: Number of threads used to parse changed files
+            is_writing: Optional function telling whether a profile has a write in progress,
+                such as ProfileWriter.is_writing; such profiles are not reloaded from disk.
+                Queue the write before applying the profile to the processor.
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+
+        self.processor = processor
+        self.profiles_dir = processor.profiles_dir
+        self.interval = interval
+        self.full_scan_interval = full_scan_interval
+        self.on_change = on_change
+        self.load_workers = load_workers
+        self.is_writing = is_writing
+        self._directory_mtime = self._get_directory_mtime()
+        self._states = scan_profile_files(self.profiles_dir) if os.path.isdir(self.profiles_dir) else {}
+        self._scanned_at = time.monotonic()
+        # Guards _states, which mark_current updates from other threads
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.scans = 0
+        self.last_scan_seconds = 0.0
+        self.last_reload_seconds = 0.0
+        self.changes = {"added": 0, "changed": 0, "deleted": 0}
+        self.errors = 0
+
+    def start(self) -> None:
+        """Start polling on a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profile-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop polling.
+
+        Args:
+            timeout: Maximum seconds to wait for a running poll, or None to wait indefinitely
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Profile directory poll failed: {str(e)}")
+
+    def mark_current(self, profile_id: str) -> None:
+        """
+        Record a profile file that the processor already holds, so it is not reloaded.
+
+        Call this after writing a profile that was applied to the processor directly.
+
+        Args:
+            profile_id: Profile identifier
+        """
+        try:
+            stat = os.stat(os.path.join(self.profiles_dir, f"{profile_id}.json"))
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._states[profile_id] = (stat.st_mtime_ns, stat.st_size)
+
+    def _get_directory_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.profiles_dir).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def poll(self, full_scan: bool = False) -> Dict[str, int]:
+        """
+        Scan the profiles directory and apply the changes found.
+
+        Files are only stated if the directory changed, was changed recently,
+        or full_scan_interval has passed since the last full scan.
+
+        Args:
+            full_scan: Whether to state every file even if the directory is unchanged
+
+        Returns:
+            Number of added, changed and deleted profile files
+        """
+        counts = {"added": 0, "changed": 0, "deleted": 0}
+        directory_mtime = self._get_directory_mtime()
+        if (not full_scan and directory_mtime == self._directory_mtime
+                and (directory_mtime is None or time.time_ns() - directory_mtime > RECENT_CHANGE_NS)
+                and time.monotonic() - self._scanned_at < self.full_scan_interval):
+            return counts
+
+        # Taken before scanning, so changes made during the scan are seen by the next poll
+        self._directory_mtime = directory_mtime
+        self._scanned_at = time.monotonic()
+        start = time.perf_counter()
+        current = scan_profile_files(self.profiles_dir) if directory_mtime is not None else {}
+        self.scans += 1
+        self.last_scan_seconds = time.perf_counter() - start
+
+        with self._lock:
+            previous = self._states
+            added = [profile_id for profile_id in current if profile_id not in previous]
+            changed = [profile_id for profile_id, state in current.items()
+                       if profile_id in previous and previous[profile_id] != state]
+            deleted = [profile_id for profile_id in previous if profile_id not in current]
+
+        counts.update(added=len(added), changed=len(changed), deleted=len(deleted))
+        if not (added or changed or deleted):
+            return counts
+
+        # Parse outside the index lock; queries only wait while batches are applied
+        profiles = load_profiles(self.profiles_dir, added + changed, CompactProfile.from_dict, self.load_workers)
+        failed = len(added) + len(changed) - len(profiles)
+        loaded = list(profiles.values())
+        skipped = set()
+        skip = self._skip_writing(skipped) if self.is_writing else None
+        for position in range(0, len(loaded), APPLY_BATCH_SIZE):
+            self.processor.upsert_compact_profiles(loaded[position:position + APPLY_BATCH_SIZE], skip)
+        for position in range(0, len(deleted), APPLY_BATCH_SIZE):
+            self.processor.remove_profiles(deleted[position:position + APPLY_BATCH_SIZE], skip)
+
+        with self._lock:
+            # Files that failed to parse are retried once they change again; files still
+            # being written are recorded by mark_current once the write is done
+            for profile_id in added + changed:
+                if profile_id not in skipped:
+                    self._states[profile_id] = current[profile_id]
+            for profile_id in deleted:
+                if profile_id not in skipped:
+                    self._states.pop(profile_id, None)
+
+        self.last_reload_seconds = time.perf_counter() - start
+        PROFILE_RELOAD_SECONDS.observe(self.last_reload_seconds)
+        for change, count in counts.items():
+            self.changes[change] += count
+            if count:
+                PROFILE_RELOAD_FILES.labels(change).inc(count)
+        if failed:
+            self.errors += failed
+            PROFILE_RELOAD_ERRORS.inc(failed)
+
+        if self.on_change:
+            applied = [profile_id for profile_id in list(profiles) + deleted if profile_id not in skipped]
+            for profile_id in applied:
+                try:
+                    self.on_change(profile_id)
+                except Exception as e:
+                    logger.error(f"Profile change callback failed for {profile_id}: {str(e)}")
+
+        logger.info(f"Reloaded profiles directory in {self.last_reload_seconds:.3f}s: {counts['added']} added, "
+                    f"{counts['changed']} changed, {counts['deleted']} deleted, {failed} failed")
+        return counts
+
+    def _skip_writing(self, skipped: Set[str]) -> Callable[[str], bool]:
+        """Build the skip function for the processor, collecting the profiles it skips."""
+        def skip(profile_id: str) -> bool:
+            if self.is_writing(profile_id):
+                skipped.add(profile_id)
+                return True
+            return False
+
+        return skip
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Get watcher counters.
+
+        Returns:
+            Dictionary with tracked files, scans, durations of the last scan and
+            reload, applied changes by kind and files that failed to load
+        """
+        with self._lock:
+            tracked = len(self._states)
+        return {
+            "tracked_files": tracked,
+            "scans": self.scans,
+            "last_scan_seconds": self.last_scan_seconds,
+            "last_reload_seconds": self.last_reload_seconds,
+            "changes": dict(self.changes),
+            "errors": self.errors
+        }
@@ -0,0 +1,182 @@
+"""
+Profile Writer
+
+This module persists profiles to the profiles directory on a background
+thread. Writes are queued per profile ID, so repeated updates of the same
+profile before it is written are coalesced into a single file write.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Set
+
+from profile_io import write_profile_file
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileWriter:
+    def __init__(self, profiles_dir: str, fsync: bool = True, coalesce_delay: float = 0.05,
+                 on_written: Optional[Callable[[str], None]] = None, max_pending: int = 10000):
+        """
+        Initialize the profile writer.
+
+        Args:
+            profiles_dir: Directory containing profile data
+            fsync: Whether to flush each profile file to disk before it replaces the old one
+            coalesce_delay: Seconds to wait after the first queued write before writing,
+                so bursts of updates to the same profile are written once
+            on_written: Optional callback invoked with the profile ID after each successful write
+            max_pending: Maximum number of queued profiles; write() blocks while the queue is full
+        """
+        if max_pending <= 0:
+            raise ValueError("max_pending must be positive")
+
+        self.profiles_dir = profiles_dir
+        self.fsync = fsync
+        self.coalesce_delay = coalesce_delay
+        self.on_written = on_written
+        self.max_pending = max_pending
+        # profile ID -> latest data not yet written
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # profile IDs taken off the queue whose write or on_written callback has not finished
+        self._writing: Set[str] = set()
+        self._closed = False
+        self._condition = threading.Condition()
+        self.written = 0
+        self.coalesced = 0
+        self.errors = 0
+
+        # Started on first write, so a writer created before fork() works in the child processes
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+
+        os.makedirs(profiles_dir, exist_ok=True)
+
+    def write(self, profile_id: str, profile_data: Dict[str, Any]) -> None:
+        """
+        Queue a profile to be written, replacing any queued data for the same profile.
+
+        Blocks while max_pending other profiles are queued, so producers cannot
+        outrun the disk without bound.
+
+        Args:
+            profile_id: Profile identifier
+            profile_data: Profile data dictionary; it must not be modified afterwards
+        """
+        with self._condition:
+            if profile_id not in self._pending:
+                self._condition.wait_for(lambda: len(self._pending) < self.max_pending or self._closed)
+            if self._closed:
+                raise RuntimeError("Profile writer is closed")
+            if profile_id in self._pending:
+                self.coalesced += 1
+            self._pending[profile_id] = profile_data
+            self._condition.notify_all()
+
+            if self._thread is None or self._thread_pid != os.getpid():
+                self._thread = threading.Thread(target=self._run, name="profile-writer", daemon=True)
+                self._thread_pid = os.getpid()
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Write queued profiles until the writer is closed."""
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+
+            if self.coalesce_delay and not self._closed:
+                time.sleep(self.coalesce_delay)
+
+            with self._condition:
+                batch = self._pending
+                self._pending = {}
+                self._writing = set(batch)
+                # Wake producers waiting for queue space
+                self._condition.notify_all()
+
+            for profile_id, profile_data in batch.items():
+                try:
+                    write_profile_file(self.profiles_dir, profile_id, profile_data, self.fsync)
+                except (OSError, TypeError, ValueError) as e:
+                    logger.error(f"Could not write profile {profile_id}: {str(e)}")
+                    with self._condition:
+                        self.errors += 1
+                        self._writing.discard(profile_id)
+                    continue
+
+                with self._condition:
+                    self.written += 1
+                if self.on_written:
+                    try:
+                        self.on_written(profile_id)
+                    except Exception as e:
+                        logger.error(f"Profile write callback failed for {profile_id}: {str(e)}")
+                with self._condition:
+                    self._writing.discard(profile_id)
+
+            with self._condition:
+                self._condition.notify_all()
+
+    def is_writing(self, profile_id: str) -> bool:
+        """
+        Check whether a profile is queued or being written.
+
+        A profile stays in this state until its on_written callback returned, so
+        its file on disk may be older than the data last passed to write().
+
+        Args:
+            profile_id: Profile identifier
+
+        Returns:
+            True if a write of the profile has not finished
+        """
+        with self._condition:
+            return profile_id in self._pending or profile_id in self._writing
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued profile has been written.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            True if the queue was drained, False on timeout
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._writing, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Write the remaining queued profiles and stop the background thread.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread if self._thread_pid == os.getpid() else None
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get writer counters.
+
+        Returns:
+            Dictionary with pending, written, coalesced and failed writes
+        """
+        with self._condition:
+            return {
+                "pending": len(self._pending) + len(self._writing),
+                "written": self.written,
+                "coalesced": self.coalesced,
+                "errors": self.errors
+            }
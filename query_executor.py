@@ -0,0 +1,238 @@
+"""
+Query Executor
+
+This module runs query processing off the asyncio event loop. Queries are
+dispatched to a bounded thread or process pool, so a slow query does not
+block every other request served by the same event loop, and the number of
+queued queries is capped so overload is reported instead of piling up.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from query_processor import ProfileQueryProcessor
+from request_profiler import profile_call
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_MODES = ("inline", "thread", "process")
+
+# Number of profile changes replayed to worker processes before the pool is
+# restarted so the workers reload the corpus from disk
+MAX_REPLAYED_CHANGES = 1000
+
+# Per-process state of process pool workers
+_worker_processor: Optional[ProfileQueryProcessor] = None
+_worker_applied_changes = 0
+
+
+def _init_worker(processor_options: Dict[str, Any]) -> None:
+    """Load the profile corpus in a worker process."""
+    global _worker_processor, _worker_applied_changes
+    _worker_processor = ProfileQueryProcessor(**processor_options)
+    _worker_applied_changes = 0
+
+
+def _process_in_worker(queries: List[str], changes: Tuple[str, ...]) -> List[Dict[str, Any]]:
+    """Apply pending profile changes, then process queries in a worker process."""
+    global _worker_applied_changes
+    for profile_id in changes[_worker_applied_changes:]:
+        if not _worker_processor._load_profile(profile_id):
+            # The profile file was deleted
+            _worker_processor.remove_profiles([profile_id])
+    _worker_applied_changes = len(changes)
+    return _worker_processor.process_queries(queries)
+
+
+class ExecutorOverloaded(Exception):
+    """Raised when too many queries are already waiting to be processed."""
+
+
+class QueryExecutor:
+    def __init__(self, processor: ProfileQueryProcessor, mode: str = "thread", workers: int = 4,
+                 max_pending: int = 0, processor_options: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the query executor.
+
+        Args:
+            processor: Processor used in inline and thread mode
+            mode: "inline" runs queries on the event loop, "thread" on a thread pool,
+                "process" on a process pool where every worker loads its own corpus
+            workers: Number of pool threads or processes
+            max_pending: Maximum number of submitted tasks not yet finished
+                (0 for no limit); further submissions raise ExecutorOverloaded
+            processor_options: Keyword arguments used to build the processor of
+                each worker process (required in process mode)
+        """
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {mode}")
+        if mode == "process" and processor_options is None:
+            raise ValueError("processor_options are required in process mode")
+        if workers <= 0:
+            raise ValueError("workers must be positive")
+
+        self.processor = processor
+        self.mode = mode
+        self.workers = workers
+        self.max_pending = max_pending
+        self.processor_options = processor_options
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        # Profile IDs reloaded by the main process, replayed in worker processes
+        self._changes: List[str] = []
+        # Guards the pool and change log, which profile_changed may replace from another thread
+        self._lock = threading.Lock()
+        # Created on first use, so an executor created before fork() gets its own pool
+        # in every child process instead of sharing the parent's queues and workers
+        self._pool: Optional[Executor] = None
+        self._pool_pid: Optional[int] = None
+        self._closed = False
+
+    def _create_pool(self) -> Optional[Executor]:
+        """Create the worker pool for the configured mode."""
+        if self.mode == "thread":
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="query-worker")
+        if self.mode == "process":
+            return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                       initargs=(self.processor_options,))
+        return None
+
+    def _get_pool(self) -> Optional[Executor]:
+        """Get the worker pool of the current process, creating it if needed; the caller must hold the lock."""
+        if self._closed:
+            raise RuntimeError("Query executor is shut down")
+        if self._pool is None or self._pool_pid != os.getpid():
+            self._pool = self._create_pool()
+            self._pool_pid = os.getpid()
+            # New worker processes load the current corpus
+            self._changes = []
+        return self._pool
+
+    async def process_query(self, query: str) -> Dict[str, Any]:
+        """
+        Process a single query.
+
+        Args:
+            query: User query
+
+        Returns:
+            Query result, as returned by ProfileQueryProcessor.process_query
+        """
+        results = await self.process_queries([query])
+        return results[0]
+
+    async def process_queries(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """
+        Process a batch of queries as one task.
+
+        Args:
+            queries: User queries
+
+        Returns:
+            Query results, in the same order as the queries
+
+        Raises:
+            ExecutorOverloaded: If max_pending tasks are already waiting
+        """
+        return await self._run(queries, profiled=False)
+
+    @property
+    def overloaded(self) -> bool:
+        """Whether a task submitted now would be rejected with ExecutorOverloaded."""
+        return bool(self.max_pending) and self.pending >= self.max_pending
+
+    async def process_queries_profiled(self, queries: List[str]) -> Tuple[List[Dict[str, Any]], Dict]:
+        """
+        Process a batch of queries under cProfile, on the thread or process that runs them.
+
+        Args:
+            queries: User queries
+
+        Returns:
+            Tuple of (query results, raw cProfile statistics)
+
+        Raises:
+            ExecutorOverloaded: If max_pending tasks are already waiting
+        """
+        return await self._run(queries, profiled=True)
+
+    async def _run(self, queries: List[str], profiled: bool) -> Any:
+        """Run process_queries in the configured mode, optionally wrapped in profile_call."""
+        if self.overloaded:
+            self.rejected += 1
+            raise ExecutorOverloaded(f"{self.pending} queries are already pending")
+
+        with self._lock:
+            pool, changes = self._get_pool(), tuple(self._changes)
+        if self.mode == "process":
+            call: Tuple[Any, ...] = (_process_in_worker, queries, changes)
+        else:
+            call = (self.processor.process_queries, queries)
+        if profiled:
+            call = (profile_call,) + call
+
+        self.pending += 1
+        try:
+            if self.mode == "inline":
+                results = call[0](*call[1:])
+            else:
+                results = await asyncio.get_running_loop().run_in_executor(pool, *call)
+            self.completed += 1
+            return results
+        finally:
+            self.pending -= 1
+
+    def profile_changed(self, profile_id: str) -> None:
+        """
+        Propagate a changed or deleted profile file to worker processes, which reload it from disk.
+
+        Args:
+            profile_id: Profile identifier
+        """
+        if self.mode != "process":
+            return
+
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                # No workers in this process yet; the first query starts them with the current corpus
+                return
+            self._changes.append(profile_id)
+            if len(self._changes) <= MAX_REPLAYED_CHANGES:
+                return
+
+            # Fresh workers load the current corpus, so the change log can start over
+            logger.info("Restarting query worker processes to reload profiles")
+            old_pool = self._pool
+            self._pool = self._create_pool()
+            self._changes = []
+        old_pool.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get executor counters.
+
+        Returns:
+            Dictionary with mode, pool size, pending, completed and rejected tasks
+        """
+        return {
+            "mode": self.mode,
+            "workers": self.workers if self.mode != "inline" else 0,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker pool after running tasks finish."""
+        with self._lock:
+            self._closed = True
+            pool = self._pool if self._pool_pid == os.getpid() else None
+            self._pool = None
+        if pool:
+            pool.shutdown()
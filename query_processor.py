@@ -6,9 +6,79 @@ and extracts relevant information from stored profile data.
 """
 
 import re
-import json
 import os
-from typing import Dict, List, Any, Optional, Tuple
+import logging
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Any, Optional, Set, Tuple
+
+from caches import LRUCache, ResponseCache
+from keyword_matcher import KeywordMatcher
+from metrics import REGISTRY
+from profile_index import ProfileNameIndex
+from profile_io import JSON_DECODER, PROFILE_LOAD_SECONDS, default_load_workers, list_profile_ids, load_profiles, read_profile_file
+from profile_model import CompactProfile
+from profile_snapshot import ProfileSnapshot, SnapshotError
+from profile_store import LazyProfileStore
+
+logger = logging.getLogger(__name__)
+
+QUERY_STAGE_SECONDS = REGISTRY.histogram(
+    "query_stage_seconds", "Duration of query processing stages", ("stage",)
+)
+# Children are looked up once, so recording a stage is a bisect and two additions
+_EXTRACT_PROFILE_SECONDS = QUERY_STAGE_SECONDS.labels("extract_profile")
+_IDENTIFY_CATEGORY_SECONDS = QUERY_STAGE_SECONDS.labels("identify_category")
+_EXTRACT_SPECIFIC_REQUEST_SECONDS = QUERY_STAGE_SECONDS.labels("extract_specific_request")
+_GENERATE_RESPONSE_SECONDS = QUERY_STAGE_SECONDS.labels("generate_response")
+
+
+class ReadWriteLock:
+    """
+    Lock that lets any number of readers in at once, or a single writer.
+
+    Waiting writers take precedence over new readers, so a steady stream of
+    queries cannot starve profile updates. The lock is not reentrant.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """Hold the lock shared with other readers."""
+        with self._condition:
+            while self._writing or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Hold the lock exclusively."""
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
 
 # Simple NLP replacement for demo purposes
 class SimpleNLP:
@@ -35,15 +105,45 @@ class SimpleEntity:
 nlp = SimpleNLP()
 
 class ProfileQueryProcessor:
-    def __init__(self, profiles_dir: str = "profiles"):
+    def __init__(self, profiles_dir: str = "profiles", parse_cache_size: int = 0,
+                 response_cache_bytes: int = 0, profile_store: str = "eager",
+                 max_loaded_profiles: int = 1024, load_workers: Optional[int] = None,
+                 snapshot_path: Optional[str] = None):
         """
         Initialize the profile query processor.
 
         Args:
             profiles_dir: Directory containing profile data
+            parse_cache_size: Number of parsed queries to cache (0 disables the cache)
+            response_cache_bytes: Memory budget for generated responses (0 disables the cache)
+            profile_store: "eager" to keep every profile in memory, or "lazy" to keep
+                only names and headlines and load profile bodies on demand
+            max_loaded_profiles: Number of profile bodies kept in memory by the lazy store
+            load_workers: Number of threads used to read the profiles directory at startup
+            snapshot_path: Optional corpus snapshot to start from; the profiles directory
+                is loaded instead when the snapshot is missing or stale
         """
+        if profile_store not in ("eager", "lazy"):
+            raise ValueError(f"Unknown profile store: {profile_store}")
+
         self.profiles_dir = profiles_dir
-        self.loaded_profiles = {}
+        self.load_workers = load_workers or default_load_workers()
+        self.snapshot_path = snapshot_path
+        self.snapshot: Optional[ProfileSnapshot] = None
+        self.last_load_seconds = 0.0
+        if profile_store == "lazy":
+            self.loaded_profiles = LazyProfileStore(profiles_dir, max_loaded_profiles)
+        else:
+            self.loaded_profiles = {}
+        self.profile_versions: Dict[str, int] = {}
+        # Incremented whenever any profile is added, replaced or removed
+        self.corpus_version = 0
+        self.name_index = ProfileNameIndex()
+        # Held for writing while profiles and the name index change, and for reading by queries
+        # looking them up, which run concurrently with each other on other threads
+        self._index_lock = ReadWriteLock()
+        self.parse_cache = LRUCache(parse_cache_size) if parse_cache_size > 0 else None
+        self.response_cache = ResponseCache(response_cache_bytes) if response_cache_bytes > 0 else None
         self._load_all_profiles()
 
         # Define query categories and their related keywords
@@ -76,16 +176,117 @@ class ProfileQueryProcessor:
                        "introduction", "who is", "tell me about", "information"]
         }
 
+        # Keywords that narrow a category down to a specific request, in priority order
+        self.specific_request_keywords = {
+            "experience": [("current", ["current", "latest", "most recent"]),
+                           ("previous", ["previous", "past", "before", "former"])],
+
+            "education": [("highest", ["highest", "latest", "most recent"])] +
+                         [(f"degree:{degree}", [degree])
+                          for degree in ["bachelor", "master", "phd", "doctorate", "mba"]]
+        }
+
+        self.compile_keywords()
+
+    def compile_keywords(self) -> None:
+        """
+        Compile the category and specific request keyword tables into one matcher.
+
+        Call this again after modifying query_categories or specific_request_keywords.
+        """
+        matcher = KeywordMatcher()
+
+        for category, keywords in self.query_categories.items():
+            for keyword in keywords:
+                matcher.add(keyword, ("category", category))
+
+        for category, requests in self.specific_request_keywords.items():
+            for request, keywords in requests:
+                for keyword in keywords:
+                    matcher.add(keyword, ("specific", category, request))
+
+        matcher.compile()
+        self.keyword_matcher = matcher
+
+    def _scan_keywords(self, query: str) -> Dict[Tuple[str, ...], Set[str]]:
+        """
+        Find all category and specific request keywords in a single pass.
+
+        Args:
+            query: User query text
+
+        Returns:
+            Mapping of matcher tag to the keywords found for it
+        """
+        return self.keyword_matcher.find(query.lower())
+
     def _load_all_profiles(self) -> None:
         """Load all available profiles from the profiles directory."""
         if not os.path.exists(self.profiles_dir):
             print(f"Profiles directory {self.profiles_dir} does not exist.")
             return
 
-        for filename in os.listdir(self.profiles_dir):
-            if filename.endswith(".json"):
-                profile_id = filename[:-5]  # Remove .json extension
-                self._load_profile(profile_id)
+        start = time.perf_counter()
+
+        if self.snapshot_path and self._load_snapshot():
+            source = f"snapshot {self.snapshot_path}"
+            load_source = "snapshot"
+            self.corpus_version += 1
+        else:
+            source = f"{self.profiles_dir} ({self.load_workers} workers, {JSON_DECODER} decoder)"
+            load_source = "directory"
+            self.name_index.clear()
+
+            if isinstance(self.loaded_profiles, LazyProfileStore):
+                # Only names are needed up front; bodies are loaded on demand
+                self.loaded_profiles.scan(self.load_workers)
+                for profile_id, name, _ in self.loaded_profiles.summaries():
+                    self.name_index.add(profile_id, name)
+                    self._profile_changed(profile_id)
+            else:
+                profile_ids = list_profile_ids(self.profiles_dir)
+                profiles = load_profiles(self.profiles_dir, profile_ids, CompactProfile.from_dict, self.load_workers)
+                for profile_id, profile in profiles.items():
+                    self.loaded_profiles[profile_id] = profile
+                    self.name_index.add(profile_id, profile.basics.name)
+                    self._profile_changed(profile_id)
+
+        self.last_load_seconds = time.perf_counter() - start
+        PROFILE_LOAD_SECONDS.labels(load_source).observe(self.last_load_seconds)
+        logger.info(f"Loaded {len(self.loaded_profiles)} profiles from {source} in {self.last_load_seconds:.2f}s")
+
+    def _load_snapshot(self) -> bool:
+        """
+        Load profiles and the name index from the configured snapshot.
+
+        Returns:
+            True if the snapshot was current and has been loaded, False otherwise
+        """
+        try:
+            snapshot = ProfileSnapshot(self.snapshot_path)
+        except FileNotFoundError:
+            logger.info(f"No snapshot at {self.snapshot_path}, loading {self.profiles_dir}")
+            return False
+        except (OSError, SnapshotError) as e:
+            logger.warning(f"Not using snapshot {self.snapshot_path}: {str(e)}")
+            return False
+
+        if not snapshot.is_current(self.profiles_dir):
+            logger.warning(f"Snapshot {self.snapshot_path} is stale, loading {self.profiles_dir} instead")
+            snapshot.close()
+            return False
+
+        if isinstance(self.loaded_profiles, LazyProfileStore):
+            # Bodies stay in the memory-mapped snapshot until they are requested
+            self.loaded_profiles.attach_snapshot(snapshot)
+            self.snapshot = snapshot
+        else:
+            for profile_id, _, _ in snapshot.summaries():
+                self.loaded_profiles[profile_id] = snapshot.read(profile_id)
+            snapshot.close()
+
+        self.name_index = snapshot.name_index()
+        return True
 
     def _load_profile(self, profile_id: str) -> bool:
         """
@@ -97,16 +298,156 @@ class ProfileQueryProcessor:
         Returns:
             True if profile was loaded successfully, False otherwise
         """
-        filename = os.path.join(self.profiles_dir, f"{profile_id}.json")
-
-        if not os.path.exists(filename):
+        try:
+            profile_data = read_profile_file(self.profiles_dir, profile_id)
+        except FileNotFoundError:
             return False
 
-        with open(filename, "r") as f:
-            self.loaded_profiles[profile_id] = json.load(f)
-
+        self.upsert_profile(profile_id, profile_data)
         return True
 
+    def upsert_profile(self, profile_id: str, profile_data: Dict[str, Any]) -> CompactProfile:
+        """
+        Add or replace a profile in memory and in the name index.
+
+        The profiles directory is not touched; persisting the profile is up to the caller.
+
+        Args:
+            profile_id: Profile identifier
+            profile_data: Profile data dictionary in the profiles directory schema
+
+        Returns:
+            The stored compact profile
+
+        Raises:
+            KeyError: If basics or basics.name is missing
+            TypeError, AttributeError: If a section does not have the expected shape
+        """
+        profile = CompactProfile.from_dict(profile_id, profile_data)
+        self.upsert_compact_profiles([profile])
+        return profile
+
+    def upsert_compact_profiles(self, profiles: List[CompactProfile],
+                                skip: Optional[Callable[[str], bool]] = None) -> None:
+        """
+        Add or replace a batch of profiles in memory and in the name index.
+
+        The batch is applied under a single acquisition of the index lock.
+        Every profile is validated first, so nothing is stored if one is invalid.
+
+        Args:
+            profiles: Compact profiles to store
+            skip: Optional function called with each profile ID under the index lock;
+                profiles for which it returns True are left unchanged
+
+        Raises:
+            TypeError: If the name of a profile is not a string
+        """
+        for profile in profiles:
+            self.validate_profile(profile)
+
+        with self._index_lock.write():
+            for profile in profiles:
+                if skip is not None and skip(profile.profile_id):
+                    continue
+                self.name_index.add(profile.profile_id, profile.basics.name)
+                self.loaded_profiles[profile.profile_id] = profile
+                self._profile_changed(profile.profile_id)
+
+    def validate_profile(self, profile: CompactProfile) -> None:
+        """
+        Check that a profile can be stored and indexed.
+
+        Args:
+            profile: Compact profile
+
+        Raises:
+            TypeError: If the profile name is not a string
+        """
+        name = profile.basics.name
+        if not isinstance(name, str):
+            raise TypeError(f"basics.name must be a string, not {type(name).__name__}")
+
+    def remove_profiles(self, profile_ids: List[str], skip: Optional[Callable[[str], bool]] = None) -> int:
+        """
+        Remove profiles from memory and from the name index.
+
+        The batch is applied under a single acquisition of the index lock.
+        The profiles directory is not touched.
+
+        Args:
+            profile_ids: Profile identifiers; unknown IDs are ignored
+            skip: Optional function called with each profile ID under the index lock;
+                profiles for which it returns True are kept
+
+        Returns:
+            Number of profiles removed
+        """
+        removed = 0
+        with self._index_lock.write():
+            for profile_id in profile_ids:
+                if profile_id not in self.loaded_profiles or (skip is not None and skip(profile_id)):
+                    continue
+                del self.loaded_profiles[profile_id]
+                self.name_index.remove(profile_id)
+                self._profile_changed(profile_id)
+                removed += 1
+        return removed
+
+    def list_profile_summaries(self) -> List[Dict[str, Optional[str]]]:
+        """
+        List the ID, name and headline of every profile without loading profile bodies.
+
+        Returns:
+            List of profile summary dictionaries
+        """
+        if isinstance(self.loaded_profiles, LazyProfileStore):
+            summaries = self.loaded_profiles.summaries()
+        else:
+            # Profiles are added and removed by other threads while the index lock is held
+            with self._index_lock.read():
+                summaries = [(profile_id, profile.basics.name, profile.basics.headline)
+                             for profile_id, profile in self.loaded_profiles.items()]
+
+        return [{"profile_id": profile_id, "name": name, "headline": headline}
+                for profile_id, name, headline in summaries]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get corpus and cache counters.
+
+        Returns:
+            Dictionary with the profile count, last startup load duration and the
+            counters of the parse cache, response cache and lazy profile store
+            (None for components that are disabled)
+        """
+        return {
+            "profiles": len(self.loaded_profiles),
+            "last_load_seconds": self.last_load_seconds,
+            "parse_cache": self.parse_cache.stats() if self.parse_cache is not None else None,
+            "response_cache": self.response_cache.stats() if self.response_cache is not None else None,
+            "profile_store": (self.loaded_profiles.stats()
+                              if isinstance(self.loaded_profiles, LazyProfileStore) else None)
+        }
+
+    def _profile_changed(self, profile_id: str) -> None:
+        """
+        Invalidate cached work after a profile was added, replaced or removed.
+
+        Args:
+            profile_id: Profile identifier
+        """
+        self.profile_versions[profile_id] = self.profile_versions.get(profile_id, 0) + 1
+        self.corpus_version += 1
+
+        # Any query may now resolve to a different profile
+        if self.parse_cache is not None:
+            self.parse_cache.clear()
+
+        # Only responses generated from this profile are affected
+        if self.response_cache is not None:
+            self.response_cache.invalidate_profile(profile_id)
+
     def extract_profile_name_from_query(self, query: str) -> Optional[str]:
         """
         Extract profile name or ID from a query.
@@ -120,29 +461,38 @@ class ProfileQueryProcessor:
         # Process query with spaCy
         doc = nlp(query)
 
+        with self._index_lock.read():
+            return self._match_profile_name(query, doc)
+
+    def _match_profile_name(self, query: str, doc) -> Optional[str]:
+        """
+        Match the names in a query against the name index; the caller must hold the index lock for reading.
+
+        Args:
+            query: User query text
+            doc: Query processed with spaCy
+
+        Returns:
+            Profile ID if found, None otherwise
+        """
         # Look for entities that could be person names
         person_entities = [ent.text for ent in doc.ents if ent.label_ == "PERSON"]
 
         if person_entities:
             # Try to match person names with our loaded profiles
             for person in person_entities:
-                for profile_id, profile_data in self.loaded_profiles.items():
-                    profile_name = profile_data["basics"]["name"]
-                    if person.lower() in profile_name.lower():
-                        return profile_id
+                profile_id = self.name_index.match_name(person)
+                if profile_id:
+                    return profile_id
 
-            # If no exact match, look for partial matches
+            # If no exact match, look for close matches on name trigrams
             best_match = None
             best_score = 0
 
             for person in person_entities:
-                for profile_id, profile_data in self.loaded_profiles.items():
-                    profile_name = profile_data["basics"]["name"]
-                    # Simple string similarity - percentage of characters that match
-                    similarity = len(set(person.lower()) & set(profile_name.lower())) / max(len(person), len(profile_name))
-                    if similarity > 0.5 and similarity > best_score:
-                        best_match = profile_id
-                        best_score = similarity
+                match = self.name_index.match_similar_name(person)
+                if match and match[1] > best_score:
+                    best_match, best_score = match
 
             if best_match:
                 return best_match
@@ -159,17 +509,12 @@ class ProfileQueryProcessor:
                 name = matches.group(1).strip()
 
                 # Try to match this name against our profiles
-                for profile_id, profile_data in self.loaded_profiles.items():
-                    profile_name = profile_data["basics"]["name"]
-                    if name.lower() in profile_name.lower() or profile_name.lower() in name.lower():
-                        return profile_id
+                profile_id = self.name_index.match_name(name) or self.name_index.match_contained_name(name)
+                if profile_id:
+                    return profile_id
 
         # Direct check for profile IDs in the query
-        for profile_id in self.loaded_profiles.keys():
-            if profile_id.lower() in query.lower():
-                return profile_id
-
-        return None
+        return self.name_index.match_profile_id(query)
 
     def identify_query_category(self, query: str) -> str:
         """
@@ -181,14 +526,16 @@ class ProfileQueryProcessor:
         Returns:
             Category name (education, experience, skills, etc.)
         """
-        query_lower = query.lower()
+        return self._category_from_hits(self._scan_keywords(query))
 
+    def _category_from_hits(self, hits: Dict[Tuple[str, ...], Set[str]]) -> str:
+        """Pick the category with the most distinct keyword hits."""
         # Check each category's keywords
         max_matches = 0
         best_category = "general"  # Default category
 
-        for category, keywords in self.query_categories.items():
-            matches = sum(keyword in query_lower for keyword in keywords)
+        for category in self.query_categories:
+            matches = len(hits.get(("category", category), ()))
             if matches > max_matches:
                 max_matches = matches
                 best_category = category
@@ -206,34 +553,72 @@ class ProfileQueryProcessor:
         Returns:
             Specific request detail if found, None otherwise
         """
-        # This function would implement more sophisticated extraction
-        # For now, we'll return a simplified approach
-
-        if category == "experience":
-            for keyword in ["current", "latest", "most recent"]:
-                if keyword in query.lower():
-                    return "current"
+        return self._specific_request_from_hits(query, category, self._scan_keywords(query))
 
-            for keyword in ["previous", "past", "before", "former"]:
-                if keyword in query.lower():
-                    return "previous"
+    def _specific_request_from_hits(self, query: str, category: str,
+                                    hits: Dict[Tuple[str, ...], Set[str]]) -> Optional[str]:
+        """Resolve the specific request for a category from keyword hits."""
+        for request, _ in self.specific_request_keywords.get(category, []):
+            if ("specific", category, request) in hits:
+                return request
 
+        if category == "experience":
             # Check for specific company mentions
             doc = nlp(query)
             for ent in doc.ents:
                 if ent.label_ == "ORG":
                     return f"company:{ent.text}"
 
-        elif category == "education":
-            for keyword in ["highest", "latest", "most recent"]:
-                if keyword in query.lower():
-                    return "highest"
+        return None
 
-            for degree in ["bachelor", "master", "phd", "doctorate", "mba"]:
-                if degree in query.lower():
-                    return f"degree:{degree}"
+    def _parse_query(self, query: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """
+        Resolve the profile, category and specific request of a query.
 
-        return None
+        Args:
+            query: Whitespace-normalized query text
+
+        Returns:
+            Tuple of (profile ID, category, specific request); all None if no profile was found
+        """
+        if self.parse_cache is not None:
+            cached = self.parse_cache.get(query)
+            if cached is not None:
+                return cached
+
+        # Extract profile ID from query; only the name index lookups need the lock
+        start = time.perf_counter()
+        doc = nlp(query)
+        with self._index_lock.read():
+            version = self.corpus_version
+            profile_id = self._match_profile_name(query, doc)
+        extracted = time.perf_counter()
+        _EXTRACT_PROFILE_SECONDS.observe(extracted - start)
+
+        if profile_id:
+            # Scan the query once for category and specific request keywords
+            hits = self._scan_keywords(query)
+
+            # Identify query category
+            category = self._category_from_hits(hits)
+            categorized = time.perf_counter()
+            _IDENTIFY_CATEGORY_SECONDS.observe(categorized - extracted)
+
+            # Extract specific request details
+            specific_request = self._specific_request_from_hits(query, category, hits)
+            _EXTRACT_SPECIFIC_REQUEST_SECONDS.observe(time.perf_counter() - categorized)
+
+            parsed = (profile_id, category, specific_request)
+        else:
+            parsed = (None, None, None)
+
+        if self.parse_cache is not None:
+            with self._index_lock.read():
+                # A profile change since the lookup cleared the cache; caching now could leave a stale entry
+                if self.corpus_version == version:
+                    self.parse_cache.put(query, parsed)
+
+        return parsed
 
     def process_query(self, query: str) -> Dict:
         """
@@ -245,167 +630,225 @@ class ProfileQueryProcessor:
         Returns:
             Dictionary with query analysis and response
         """
-        # Extract profile ID from query
-        profile_id = self.extract_profile_name_from_query(query)
-
-        if not profile_id:
-            return {
-                "success": False,
-                "error": "Could not identify a profile in your query",
-                "available_profiles": list(self.loaded_profiles.keys())
-            }
-
-        # Make sure profile is loaded
-        if profile_id not in self.loaded_profiles:
-            success = self._load_profile(profile_id)
-            if not success:
-                return {
-                    "success": False,
-                    "error": f"Profile {profile_id} not found",
-                    "available_profiles": list(self.loaded_profiles.keys())
-                }
+        return self.process_queries([query])[0]
 
-        profile_data = self.loaded_profiles[profile_id]
+    def process_queries(self, queries: List[str]) -> List[Dict]:
+        """
+        Process a batch of natural language queries about LinkedIn profiles.
 
-        # Identify query category
-        category = self.identify_query_category(query)
+        Identical queries (after whitespace normalization) are parsed once,
+        identical requests are answered once, and the list of available
+        profiles is built at most once per batch.
 
-        # Extract specific request details
-        specific_request = self.extract_specific_request(query, category)
+        Args:
+            queries: User query texts
 
-        # Generate response based on category and profile data
-        response = self._generate_response(profile_data, category, specific_request)
+        Returns:
+            List of result dictionaries, in the same order as the queries
+        """
+        parsed_queries: Dict[str, Tuple[Optional[str], Optional[str], Optional[str]]] = {}
+        responses: Dict[Tuple[str, Optional[str], Optional[str]], str] = {}
+        available_profiles = None
+        results = []
+
+        for query in queries:
+            # Collapse whitespace so repeated phrasings share parsing work
+            normalized = " ".join(query.split())
+            parsed = parsed_queries.get(normalized)
+            if parsed is None:
+                parsed = parsed_queries[normalized] = self._parse_query(normalized)
+
+            profile_id, category, specific_request = parsed
+
+            # Make sure profile is loaded, then generate response based on category and profile data
+            response = None
+            if profile_id and (profile_id in self.loaded_profiles or self._load_profile(profile_id)):
+                response = responses.get(parsed)
+                if response is None:
+                    # None if the profile was removed since the check
+                    response = self._cached_response(profile_id, category, specific_request)
+                    if response is not None:
+                        responses[parsed] = response
+
+            if response is None:
+                if available_profiles is None:
+                    # Profiles are added and removed by other threads while the index lock is held
+                    with self._index_lock.read():
+                        available_profiles = list(self.loaded_profiles.keys())
+                error = f"Profile {profile_id} not found" if profile_id else "Could not identify a profile in your query"
+                results.append({
+                    "success": False,
+                    "error": error,
+                    "available_profiles": available_profiles
+                })
+                continue
+
+            results.append({
+                "success": True,
+                "profile_id": profile_id,
+                "category": category,
+                "specific_request": specific_request,
+                "response": response
+            })
+
+        return results
+
+    def _cached_response(self, profile_id: str, category: str, specific_request: Optional[str]) -> Optional[str]:
+        """
+        Generate a response, reusing a cached one for the same profile version.
 
-        return {
-            "success": True,
-            "profile_id": profile_id,
-            "category": category,
-            "specific_request": specific_request,
-            "response": response
-        }
+        Args:
+            profile_id: Profile identifier
+            category: Query category
+            specific_request: Specific request details
 
-    def _generate_response(self, profile: Dict, category: str, specific_request: Optional[str] = None) -> str:
+        Returns:
+            Response text, or None if the profile is not loaded
+        """
+        if self.response_cache is not None:
+            key = (profile_id, category, specific_request)
+            version = self.profile_versions.get(profile_id, 0)
+            response = self.response_cache.get(key, version)
+            if response is not None:
+                return response
+
+        # Read after the version, so a response generated from a replaced profile is never
+        # cached under the new version; a single lookup, as the profile may be removed meanwhile
+        profile = self.loaded_profiles.get(profile_id)
+        if profile is None:
+            return None
+        start = time.perf_counter()
+        response = self._generate_response(profile, category, specific_request)
+        _GENERATE_RESPONSE_SECONDS.observe(time.perf_counter() - start)
+
+        if self.response_cache is not None:
+            self.response_cache.put(key, version, response)
+
+        return response
+
+    def _generate_response(self, profile: CompactProfile, category: str,
+                           specific_request: Optional[str] = None) -> str:
         """
         Generate a response based on profile data and query category.
 
         Args:
-            profile: Profile data dictionary
+            profile: Compact profile
             category: Query category
             specific_request: Specific request details
 
         Returns:
             Response text
         """
-        profile_name = profile["basics"]["name"]
+        basics = profile.basics
+        profile_name = basics.name
 
         if category == "education":
-            if not profile.get("education"):
+            if not profile.education:
                 return f"{profile_name} has no education information in their profile."
 
             if specific_request == "highest":
                 # Assuming education is listed in reverse chronological order
-                highest_edu = profile["education"][0]
-                return f"{profile_name}'s highest education is {highest_edu['degree']} from {highest_edu['institution']} ({highest_edu['date_range']})."
+                highest_edu = profile.education[0]
+                return f"{profile_name}'s highest education is {highest_edu.degree} from {highest_edu.institution} ({highest_edu.date_range})."
 
             # If looking for a specific degree
             if specific_request and specific_request.startswith("degree:"):
                 degree_type = specific_request.split(":", 1)[1]
-                matching_degrees = [edu for edu in profile["education"]
-                                   if degree_type.lower() in edu["degree"].lower()]
+                matching_degrees = [edu for edu in profile.education
+                                    if degree_type.lower() in edu.degree.lower()]
 
                 if matching_degrees:
                     edu = matching_degrees[0]
-                    return f"{profile_name} has a {edu['degree']} from {edu['institution']} ({edu['date_range']})."
+                    return f"{profile_name} has a {edu.degree} from {edu.institution} ({edu.date_range})."
                 else:
                     return f"Could not find a {degree_type} degree for {profile_name}."
 
             # Default: list all education
-            edu_list = [f"{edu['degree']} from {edu['institution']} ({edu['date_range']})"
-                        for edu in profile["education"]]
+            edu_list = [f"{edu.degree} from {edu.institution} ({edu.date_range})"
+                        for edu in profile.education]
             return f"{profile_name}'s education: {'; '.join(edu_list)}."
 
         elif category == "experience":
-            if not profile.get("experience"):
+            if not profile.experience:
                 return f"{profile_name} has no work experience information in their profile."
 
             if specific_request == "current":
                 # Assuming experience is listed in reverse chronological order
-                current_job = profile["experience"][0]
-                return f"{profile_name} currently works as {current_job['title']} at {current_job['company']} ({current_job['duration']})."
+                current_job = profile.experience[0]
+                return f"{profile_name} currently works as {current_job.title} at {current_job.company} ({current_job.duration})."
 
             if specific_request == "previous":
-                if len(profile["experience"]) > 1:
-                    prev_job = profile["experience"][1]
-                    return f"{profile_name} previously worked as {prev_job['title']} at {prev_job['company']} ({prev_job['duration']})."
+                if len(profile.experience) > 1:
+                    prev_job = profile.experience[1]
+                    return f"{profile_name} previously worked as {prev_job.title} at {prev_job.company} ({prev_job.duration})."
                 else:
                     return f"No previous job experience found for {profile_name} before their current role."
 
             # If looking for experience at a specific company
             if specific_request and specific_request.startswith("company:"):
                 company_name = specific_request.split(":", 1)[1]
-                matching_jobs = [job for job in profile["experience"]
-                                if company_name.lower() in job["company"].lower()]
+                matching_jobs = [job for job in profile.experience
+                                 if company_name.lower() in job.company.lower()]
 
                 if matching_jobs:
                     job = matching_jobs[0]
-                    return f"{profile_name} worked as {job['title']} at {job['company']} ({job['duration']})."
+                    return f"{profile_name} worked as {job.title} at {job.company} ({job.duration})."
                 else:
                     return f"Could not find experience at {company_name} for {profile_name}."
 
             # Default: list all experience
-            exp_list = [f"{job['title']} at {job['company']} ({job['duration']})"
-                       for job in profile["experience"]]
+            exp_list = [f"{job.title} at {job.company} ({job.duration})"
+                        for job in profile.experience]
             return f"{profile_name}'s work experience: {'; '.join(exp_list)}."
 
         elif category == "skills":
-            if not profile.get("skills"):
+            if not profile.skills:
                 return f"{profile_name} has no skills listed in their profile."
 
-            return f"{profile_name}'s skills include: {', '.join(profile['skills'])}."
+            return f"{profile_name}'s skills include: {', '.join(profile.skills)}."
 
         elif category == "languages":
-            if not profile.get("languages"):
+            if not profile.languages:
                 return f"{profile_name} has no language information in their profile."
 
-            lang_list = [f"{lang['language']} ({lang['proficiency']})" for lang in profile["languages"]]
+            lang_list = [f"{lang.language} ({lang.proficiency})" for lang in profile.languages]
             return f"{profile_name} speaks: {', '.join(lang_list)}."
 
         elif category == "certifications":
-            if not profile.get("certifications"):
+            if not profile.certifications:
                 return f"{profile_name} has no certifications listed in their profile."
 
-            cert_list = [f"{cert['name']} from {cert['issuer']} ({cert['date']})"
-                        for cert in profile["certifications"]]
+            cert_list = [f"{cert.name} from {cert.issuer} ({cert.date})"
+                         for cert in profile.certifications]
             return f"{profile_name}'s certifications: {'; '.join(cert_list)}."
 
         elif category == "location":
-            location = profile["basics"].get("location", "Unknown")
+            location = basics.location or "Unknown"
             return f"{profile_name} is located in {location}."
 
         elif category == "contact":
-            if not profile.get("contact_info"):
+            if not profile.contact_info:
                 return f"No contact information available for {profile_name}."
 
-            contact_info = profile["contact_info"]
-            return f"Contact information for {profile_name}: Email: {contact_info.get('email', 'Not provided')}, Phone: {contact_info.get('phone', 'Not provided')}."
+            contact_info = profile.contact_info
+            return f"Contact information for {profile_name}: Email: {contact_info.email or 'Not provided'}, Phone: {contact_info.phone or 'Not provided'}."
 
         else:  # General information
-            basics = profile["basics"]
             summary = [
-                f"{profile_name} is a {basics.get('headline', 'professional')}",
-                f"based in {basics.get('location', 'an unknown location')}."
+                f"{profile_name} is a {basics.headline or 'professional'}",
+                f"based in {basics.location or 'an unknown location'}."
             ]
 
-            if basics.get("summary"):
-                summary.append(f"Summary: {basics['summary']}")
+            if basics.summary:
+                summary.append(f"Summary: {basics.summary}")
 
-            if profile.get("experience") and len(profile["experience"]) > 0:
-                current_job = profile["experience"][0]
-                summary.append(f"Currently working as {current_job['title']} at {current_job['company']}.")
+            if profile.experience:
+                current_job = profile.experience[0]
+                summary.append(f"Currently working as {current_job.title} at {current_job.company}.")
 
-            if profile.get("education") and len(profile["education"]) > 0:
-                highest_edu = profile["education"][0]
-                summary.append(f"Has studied {highest_edu['degree']} at {highest_edu['institution']}.")
+            if profile.education:
+                highest_edu = profile.education[0]
+                summary.append(f"Has studied {highest_edu.degree} at {highest_edu.institution}.")
 
             return " ".join(summary)
 
@@ -0,0 +1,257 @@
+"""
+Request Profiler
+
+This module profiles a bounded number of upcoming requests on demand. An
+operator arms the profiler for the next N queries; each of those queries is
+run under cProfile on whichever thread or process executes it, and the
+statistics of all N are aggregated into one artifact. The artifact is saved
+in the pstats format (readable with `python -m pstats` or snakeviz) along
+with a JSON summary of the hottest functions.
+
+Requests are only routed through the profiler while it is armed, so there
+is no overhead when it is off.
+"""
+
+import cProfile
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Source files whose functions are summarized separately
+QUERY_PATH_FILES = ("query_processor.py",)
+
+
+def profile_call(func: Callable[..., Any], *args: Any) -> Tuple[Any, Dict]:
+    """
+    Call a function under cProfile.
+
+    This is a module-level function so it can run in worker processes.
+
+    Args:
+        func: Function to call
+        args: Positional arguments
+
+    Returns:
+        Tuple of (function result, raw cProfile statistics)
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = func(*args)
+    finally:
+        profiler.disable()
+    profiler.create_stats()
+    return result, profiler.stats
+
+
+class _RawStats:
+    """Adapter that lets pstats.Stats load raw statistics returned by profile_call."""
+
+    def __init__(self, stats: Dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class ProfilingSession:
+    def __init__(self, session_id: str, requests: int):
+        self.session_id = session_id
+        self.requests = requests
+        self.remaining = requests
+        self.recorded = 0
+        self.failed = 0
+        self.started_at = time.time()
+        self.stats = pstats.Stats()
+        self.queries: List[str] = []
+
+
+class RequestProfiler:
+    def __init__(self, artifacts_dir: str = "profiling", max_artifacts: int = 20, hot_functions: int = 30):
+        """
+        Initialize the request profiler.
+
+        Args:
+            artifacts_dir: Directory where profile artifacts are stored
+            max_artifacts: Number of most recent artifacts to keep
+            hot_functions: Number of functions listed in each summary
+        """
+        self.artifacts_dir = artifacts_dir
+        self.max_artifacts = max_artifacts
+        self.hot_functions = hot_functions
+        self._session: Optional[ProfilingSession] = None
+        self._lock = threading.Lock()
+        # Checked on every request; only True while a session still needs requests
+        self.armed = False
+
+    def arm(self, requests: int) -> str:
+        """
+        Profile the next requests, replacing any unfinished session.
+
+        Args:
+            requests: Number of requests to profile
+
+        Returns:
+            ID of the profiling session, which becomes the artifact ID
+        """
+        if requests <= 0:
+            raise ValueError("requests must be positive")
+
+        session = ProfilingSession(time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:8], requests)
+        with self._lock:
+            self._session = session
+            self.armed = True
+        logger.info(f"Profiling the next {requests} requests as {session.session_id}")
+        return session.session_id
+
+    def take(self) -> Optional[ProfilingSession]:
+        """
+        Claim a profiling slot for the current request.
+
+        Returns:
+            Session to record the request into, or None if no more requests are needed
+        """
+        with self._lock:
+            session = self._session
+            if session is None or session.remaining <= 0:
+                self.armed = False
+                return None
+            session.remaining -= 1
+            if session.remaining == 0:
+                self.armed = False
+            return session
+
+    def record(self, session: ProfilingSession, stats: Dict, queries: List[str]) -> None:
+        """
+        Add the statistics of a profiled request, saving the artifact once all requests are in.
+
+        Merging and saving block on CPU and disk, so call this off the event loop.
+
+        Args:
+            session: Session returned by take()
+            stats: Raw statistics returned by profile_call, or an empty dictionary
+                if the request failed before statistics were collected
+            queries: Queries of the request
+        """
+        with self._lock:
+            # pstats rejects empty statistics; the request still counts towards the session
+            if stats:
+                session.stats.add(_RawStats(stats))
+            else:
+                session.failed += 1
+            session.recorded += 1
+            session.queries.extend(queries[:10 - len(session.queries)])
+            complete = session.recorded == session.requests
+
+        if complete:
+            try:
+                self._save(session)
+            except OSError as e:
+                # The profiled request itself succeeded
+                logger.error(f"Could not save profile {session.session_id}: {str(e)}")
+
+    def _save(self, session: ProfilingSession) -> None:
+        """Write the pstats dump and summary of a finished session."""
+        os.makedirs(self.artifacts_dir, exist_ok=True)
+        session.stats.dump_stats(self._path(session.session_id, ".prof"))
+
+        summary = self._summarize(session)
+        with open(self._path(session.session_id, ".json"), "w") as f:
+            json.dump(summary, f, indent=2)
+        logger.info(f"Saved profile {session.session_id} of {session.recorded} requests")
+
+        with self._lock:
+            if self._session is session:
+                self._session = None
+        self._prune()
+
+    def _summarize(self, session: ProfilingSession) -> Dict[str, Any]:
+        """Aggregate the hottest functions of a session."""
+        entries = []
+        for (filename, line, function), (_, calls, own_time, cumulative_time, _) in session.stats.stats.items():
+            entries.append({
+                "function": function,
+                "file": os.path.basename(filename),
+                "line": line,
+                "calls": calls,
+                "own_seconds": round(own_time, 6),
+                "cumulative_seconds": round(cumulative_time, 6)
+            })
+
+        query_path = [entry for entry in entries if entry["file"] in QUERY_PATH_FILES]
+        return {
+            "profile_id": session.session_id,
+            "requests": session.recorded,
+            "failed_requests": session.failed,
+            "started_at": session.started_at,
+            "finished_at": time.time(),
+            "total_seconds": round(session.stats.total_tt, 6),
+            "sample_queries": session.queries,
+            "hot_functions": sorted(entries, key=lambda entry: entry["own_seconds"], reverse=True)[:self.hot_functions],
+            "query_processor_functions": sorted(query_path, key=lambda entry: entry["cumulative_seconds"],
+                                                reverse=True)[:self.hot_functions]
+        }
+
+    def _path(self, session_id: str, extension: str) -> str:
+        return os.path.join(self.artifacts_dir, session_id + extension)
+
+    def _prune(self) -> None:
+        """Delete the oldest artifacts beyond max_artifacts."""
+        for session_id in self.artifacts()[self.max_artifacts:]:
+            for extension in (".prof", ".json"):
+                try:
+                    os.unlink(self._path(session_id, extension))
+                except FileNotFoundError:
+                    pass
+
+    def artifacts(self) -> List[str]:
+        """
+        List saved artifacts.
+
+        Returns:
+            Artifact IDs, most recent first
+        """
+        if not os.path.isdir(self.artifacts_dir):
+            return []
+        return sorted((name[:-5] for name in os.listdir(self.artifacts_dir) if name.endswith(".json")),
+                      reverse=True)
+
+    def artifact_path(self, artifact_id: str, extension: str) -> Optional[str]:
+        """
+        Get the path of a saved artifact file.
+
+        Args:
+            artifact_id: Artifact ID as returned by artifacts()
+            extension: ".prof" for the pstats dump or ".json" for the summary
+
+        Returns:
+            Path of the file, or None if there is no such artifact
+        """
+        if artifact_id not in self.artifacts():
+            return None
+        path = self._path(artifact_id, extension)
+        return path if os.path.exists(path) else None
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Get the state of the current session and the saved artifacts.
+
+        Returns:
+            Dictionary with the active session (or None) and artifact IDs
+        """
+        with self._lock:
+            session = self._session
+            active = None if session is None else {
+                "profile_id": session.session_id,
+                "requests": session.requests,
+                "recorded": session.recorded,
+                "pending": session.requests - session.recorded - session.remaining
+            }
+        return {"active": active, "artifacts": self.artifacts()}
@@ -0,0 +1,44 @@
+"""Tests of bulk NDJSON profile ingestion."""
+
+import asyncio
+import json
+import os
+
+import pytest
+
+from profile_ingest import BulkIngestor, validate_profile_data
+from profile_writer import ProfileWriter
+from query_processor import ProfileQueryProcessor
+
+
+def ndjson(*records):
+    return "\n".join(json.dumps(record) for record in records).encode() + b"\n"
+
+
+async def chunks_of(data, size=64):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def test_validate_profile_data_requires_string_name():
+    with pytest.raises(ValueError, match="basics.name must be a string"):
+        validate_profile_data({"profile_id": "numbered", "basics": {"name": 42}})
+
+
+def test_invalid_record_does_not_abort_batch(tmp_path):
+    processor = ProfileQueryProcessor(str(tmp_path))
+    writer = ProfileWriter(str(tmp_path), fsync=False, coalesce_delay=0)
+    upload = ndjson(
+        {"profile_id": "ada-lovelace", "basics": {"name": "Ada Lovelace"}},
+        {"profile_id": "numbered", "basics": {"name": 42}},
+        {"profile_id": "bad-experience", "basics": {"name": "Bad Experience"}, "experience": ["x"]},
+        {"profile_id": "alan-turing", "basics": {"name": "Alan Turing"}}
+    )
+
+    summary = asyncio.run(BulkIngestor(processor, writer).ingest(chunks_of(upload)))
+    writer.close()
+
+    assert (summary["status"], summary["received"], summary["inserted"], summary["failed"]) == ("partial", 4, 2, 2)
+    assert [error["line"] for error in summary["errors"]] == [2, 3]
+    assert sorted(processor.loaded_profiles) == ["ada-lovelace", "alan-turing"]
+    assert sorted(os.listdir(tmp_path)) == ["ada-lovelace.json", "alan-turing.json"]
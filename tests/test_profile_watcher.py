@@ -0,0 +1,73 @@
+"""Tests of ProfileWatcher together with the write-behind ProfileWriter."""
+
+import json
+import threading
+
+from profile_model import CompactProfile
+from profile_watcher import ProfileWatcher
+from profile_writer import ProfileWriter
+from query_processor import ProfileQueryProcessor
+
+
+def profile_data(version):
+    return {"basics": {"name": "Ada Lovelace"}, "skills": [version]}
+
+
+def add_profile(processor, writer, version):
+    """Store a profile the way /add-profile does."""
+    writer.write("ada-lovelace", profile_data(version))
+    processor.upsert_compact_profiles([CompactProfile.from_dict("ada-lovelace", profile_data(version))])
+
+
+def test_poll_does_not_reload_profiles_being_written(tmp_path):
+    (tmp_path / "ada-lovelace.json").write_text(json.dumps(profile_data("v0")))
+    processor = ProfileQueryProcessor(str(tmp_path))
+    entered = threading.Event()
+    release = threading.Event()
+    watcher = None
+
+    def written(profile_id):
+        entered.set()
+        release.wait(5)
+        watcher.mark_current(profile_id)
+
+    writer = ProfileWriter(str(tmp_path), fsync=False, coalesce_delay=0, on_written=written)
+    watcher = ProfileWatcher(processor, is_writing=writer.is_writing)
+
+    # v1 is on disk, but its write callback has not run when v2 is added
+    add_profile(processor, writer, "v1")
+    assert entered.wait(5)
+    add_profile(processor, writer, "v2")
+
+    watcher.poll(full_scan=True)
+    assert processor.loaded_profiles["ada-lovelace"].skills == ("v2",)
+
+    release.set()
+    assert writer.flush(5)
+    writer.close()
+    assert json.loads((tmp_path / "ada-lovelace.json").read_text())["skills"] == ["v2"]
+    assert watcher.poll(full_scan=True) == {"added": 0, "changed": 0, "deleted": 0}
+    assert processor.loaded_profiles["ada-lovelace"].skills == ("v2",)
+
+
+def test_poll_reloads_files_changed_by_other_tools(tmp_path):
+    processor = ProfileQueryProcessor(str(tmp_path))
+    writer = ProfileWriter(str(tmp_path), fsync=False, coalesce_delay=0)
+    watcher = ProfileWatcher(processor, is_writing=writer.is_writing)
+
+    (tmp_path / "ada-lovelace.json").write_text(json.dumps(profile_data("v1")))
+
+    assert watcher.poll(full_scan=True)["added"] == 1
+    assert processor.loaded_profiles["ada-lovelace"].skills == ("v1",)
+
+
+def test_poll_skips_malformed_files(tmp_path):
+    processor = ProfileQueryProcessor(str(tmp_path))
+    watcher = ProfileWatcher(processor)
+
+    (tmp_path / "ada-lovelace.json").write_text(json.dumps(profile_data("v1")))
+    (tmp_path / "bad-experience.json").write_text(json.dumps({"basics": {"name": "Bad"}, "experience": ["x"]}))
+
+    assert watcher.poll(full_scan=True)["added"] == 2
+    assert sorted(processor.loaded_profiles) == ["ada-lovelace"]
+    assert watcher.stats()["errors"] == 1
@@ -0,0 +1,71 @@
+"""Tests of ProfileQueryProcessor against the sample profiles."""
+
+import json
+import os
+
+import pytest
+
+from profile_model import CompactProfile
+from query_processor import ProfileQueryProcessor
+
+PROFILES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profiles")
+
+
+@pytest.fixture(params=["eager", "lazy"])
+def processor(request):
+    return ProfileQueryProcessor(PROFILES_DIR, profile_store=request.param)
+
+
+def profile_data(name):
+    return {"basics": {"name": name, "headline": "Engineer"}, "skills": ["Python"]}
+
+
+def test_invalid_profile_leaves_batch_unapplied(processor):
+    version = processor.corpus_version
+    bad = CompactProfile.from_dict("bad-name", profile_data("Bad Name"))
+    bad.basics.name = 123
+    profiles = [CompactProfile.from_dict("new-person", profile_data("New Person")), bad]
+
+    with pytest.raises(TypeError):
+        processor.upsert_compact_profiles(profiles)
+
+    assert "new-person" not in processor.loaded_profiles
+    assert "bad-name" not in processor.loaded_profiles
+    assert "bad-name" not in processor.name_index
+    assert processor.corpus_version == version
+
+
+def test_invalid_name_keeps_previous_profile(processor):
+    with pytest.raises(TypeError):
+        processor.upsert_profile("priya-patel", profile_data(123))
+
+    assert processor.loaded_profiles["priya-patel"].basics.name == "Priya Patel"
+    assert processor.process_query("What languages does Priya Patel speak?")["profile_id"] == "priya-patel"
+
+
+@pytest.mark.parametrize("query, profile_id", [
+    ("Does Priya speak Spanish?", "priya-patel"),
+    ("Does Zhang have a master degree", "michael-zhang"),
+    ("Does John speak Spanish?", "john-smith"),
+    ("Does Patel have a master degree?", "priya-patel"),
+    ("Where did Jhon Smith study?", "john-smith"),
+    ("What is Micheal Zhang's current job?", "michael-zhang")
+])
+def test_names_next_to_other_words_and_typos_are_resolved(processor, query, profile_id):
+    result = processor.process_query(query)
+
+    assert result["success"]
+    assert result["profile_id"] == profile_id
+
+
+@pytest.mark.parametrize("profile_store", ["eager", "lazy"])
+def test_malformed_profile_files_are_skipped(tmp_path, profile_store):
+    (tmp_path / "ada-lovelace.json").write_text(json.dumps(profile_data("Ada Lovelace")))
+    (tmp_path / "bad-experience.json").write_text(json.dumps({"basics": {"name": "Bad"}, "experience": ["x"]}))
+    (tmp_path / "bad-name.json").write_text(json.dumps({"basics": {"name": 42}}))
+
+    processor = ProfileQueryProcessor(str(tmp_path), profile_store=profile_store)
+
+    assert "bad-name" not in processor.loaded_profiles
+    assert processor.process_query("Tell me about Ada Lovelace")["profile_id"] == "ada-lovelace"
+    assert not processor.process_query("Tell me about bad-experience")["success"]
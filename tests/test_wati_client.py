@@ -0,0 +1,170 @@
+"""Tests of AsyncWatiAPIClient against a local stub of the Wati API."""
+
+import asyncio
+import json
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from outbound_dispatcher import OutboundDispatcher
+from wati_integration import AsyncWatiAPIClient, aiohttp
+
+pytestmark = pytest.mark.skipif(aiohttp is None, reason="requires aiohttp")
+
+REASONS = {200: "OK", 429: "Too Many Requests", 500: "Internal Server Error"}
+
+
+class StubWatiServer:
+    """Wati API stub on asyncio that records requests and answers with queued responses."""
+
+    def __init__(self, responses: List[Tuple[int, Dict[str, Any]]]):
+        # Responses in order; the last one is repeated once the others are used up
+        self.responses = list(responses)
+        self.requests: List[Dict[str, Any]] = []
+        self.connections = 0
+        self.server = None
+
+    async def __aenter__(self) -> "StubWatiServer":
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    @property
+    def base_url(self) -> str:
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/api/v1"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+                method, path, _ = head[0].split(" ", 2)
+                headers = {}
+                for line in head[1:]:
+                    if line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                self.requests.append({
+                    "method": method,
+                    "path": path,
+                    "headers": headers,
+                    "json": json.loads(body) if body else None
+                })
+
+                status, payload = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+                data = json.dumps(payload).encode()
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def test_send_message_posts_to_wati():
+    async def run():
+        async with StubWatiServer([(200, {"result": True, "id": "msg-1"})]) as stub:
+            client = AsyncWatiAPIClient("secret", stub.base_url)
+            try:
+                first = await client.send_message("911234567890", "Hello")
+                second = await client.send_message("911234567890", "Again")
+            finally:
+                await client.close()
+        return stub, client, first, second
+
+    stub, client, first, second = asyncio.run(run())
+
+    assert first == {"result": True, "id": "msg-1"}
+    assert second == first
+    assert [request["method"] for request in stub.requests] == ["POST", "POST"]
+    assert stub.requests[0]["path"] == "/api/v1/sendSessionMessage/911234567890"
+    assert stub.requests[0]["headers"]["authorization"] == "Bearer secret"
+    assert [request["json"] for request in stub.requests] == [{"messageText": "Hello"}, {"messageText": "Again"}]
+    # The second request reuses the kept-alive connection
+    assert stub.connections == 1
+    assert (client.connections_opened, client.connections_reused) == (1, 1)
+
+
+def test_send_template_message_and_get_conversations():
+    async def run():
+        async with StubWatiServer([(200, {"result": True})]) as stub:
+            client = AsyncWatiAPIClient("secret", stub.base_url)
+            try:
+                sent = await client.send_template_message("911234567890", "welcome", ["Sara"])
+                conversations = await client.get_conversations(page_size=5, page_number=2)
+            finally:
+                await client.close()
+        return stub, sent, conversations
+
+    stub, sent, conversations = asyncio.run(run())
+
+    assert sent == {"result": True}
+    assert conversations == {"result": True}
+    template, listing = stub.requests
+    assert (template["method"], template["path"]) == ("POST", "/api/v1/sendTemplateMessage")
+    assert template["json"] == {
+        "whatsappNumber": "911234567890",
+        "templateName": "welcome",
+        "broadcastName": "linkedin_bot_welcome_911234567890",
+        "parameters": [{"name": "{{1}}", "value": "Sara"}]
+    }
+    assert (listing["method"], listing["path"], listing["json"]) == ("GET", "/api/v1/getMessages/5/2", None)
+
+
+@pytest.mark.parametrize("status", [429, 500])
+def test_send_message_reports_http_errors(status):
+    async def run():
+        async with StubWatiServer([(status, {"result": False})]) as stub:
+            client = AsyncWatiAPIClient("secret", stub.base_url)
+            try:
+                return stub, await client.send_message("911234567890", "Hello")
+            finally:
+                await client.close()
+
+    stub, result = asyncio.run(run())
+
+    assert len(stub.requests) == 1
+    assert result["status_code"] == status
+    assert str(status) in result["error"]
+
+
+def test_send_message_reports_connection_errors():
+    async def run():
+        async with StubWatiServer([(200, {"result": True})]) as stub:
+            base_url = stub.base_url
+        client = AsyncWatiAPIClient("secret", base_url, timeout=2.0)
+        try:
+            return await client.send_message("911234567890", "Hello")
+        finally:
+            await client.close()
+
+    result = asyncio.run(run())
+
+    assert result["status_code"] is None
+    assert result["error"]
+
+
+def test_dispatcher_retries_rate_limited_sends():
+    async def run():
+        async with StubWatiServer([(429, {"result": False}), (200, {"result": True})]) as stub:
+            client = AsyncWatiAPIClient("secret", stub.base_url)
+            dispatcher = OutboundDispatcher(client.send_message, rate=100.0, burst=10, backoff_base=0.01,
+                                            name="test_wati_client")
+            dispatcher.start()
+            try:
+                assert dispatcher.submit("911234567890", "Hello")
+                await dispatcher.close(timeout=5.0)
+            finally:
+                await client.close()
+        return stub, dispatcher
+
+    stub, dispatcher = asyncio.run(run())
+
+    assert [request["json"] for request in stub.requests] == [{"messageText": "Hello"}] * 2
+    assert dispatcher.stats() == {"queued": 0, "sent": 1, "retries": 1, "dropped": {}}
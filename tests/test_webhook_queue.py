@@ -0,0 +1,37 @@
+"""Tests of the bounded webhook event queue."""
+
+import asyncio
+
+from caches import DedupCache
+from webhook_queue import WebhookQueue
+
+
+def test_drop_oldest_reports_dropped_events():
+    async def run():
+        processed = []
+        release = asyncio.Event()
+        accepted = DedupCache(100, 60.0)
+
+        async def handle(event):
+            await release.wait()
+            processed.append(event)
+
+        queue = WebhookQueue(handle, max_size=2, consumers=1, overflow="drop_oldest", on_drop=accepted.discard)
+        queue.start()
+        for event in ["first", "second", "third", "fourth"]:
+            assert queue.submit(event)
+            accepted.add(event)
+            # Let the consumer take the first event
+            await asyncio.sleep(0)
+
+        dropped_seen = accepted.seen("second")
+        release.set()
+        await queue.close(timeout=5.0)
+        return processed, dropped_seen, queue.stats()
+
+    processed, dropped_seen, stats = asyncio.run(run())
+
+    assert processed == ["first", "third", "fourth"]
+    # A redelivery of the dropped event is no longer treated as a duplicate
+    assert not dropped_seen
+    assert stats["dropped"] == {"overflow": 1}
@@ -4,12 +4,24 @@ Wati API Integration for LinkedIn Profile Bot
 This module provides functions to integrate the LinkedIn Profile Query Bot with the Wati API.
 """
 
+import asyncio
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
 import json
 import os
-from typing import Dict, Any, Optional, List
+import weakref
+from typing import Dict, Any, Iterator, Optional, List, Tuple, Union
 import logging
 
+from caches import DedupCache
+from metrics import REGISTRY
+from outbound_dispatcher import OutboundDispatcher
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -17,21 +29,177 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Default (connect, read) timeouts of outbound requests, in seconds
+DEFAULT_TIMEOUT = (3.05, 10.0)
+
+# Pooled sessions and async clients by client name, reported on /metrics
+_sessions: "weakref.WeakValueDictionary[str, requests.Session]" = weakref.WeakValueDictionary()
+_async_clients: "weakref.WeakValueDictionary[str, AsyncWatiAPIClient]" = weakref.WeakValueDictionary()
+
+
+def create_session(name: str, pool_size: int = 10) -> requests.Session:
+    """
+    Create a session whose connections are kept alive and reused across requests.
+
+    Args:
+        name: Client name under which the connection pool is reported
+        pool_size: Maximum number of connections kept open per host; concurrent
+            requests beyond this open short-lived extra connections
+
+    Returns:
+        Session with pooled HTTP and HTTPS adapters
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    _sessions[name] = session
+    return session
+
+
+def session_pool_stats(session: requests.Session) -> Dict[str, int]:
+    """
+    Get the connection counters of a session's pools.
+
+    Args:
+        session: Session created by create_session
+
+    Returns:
+        Dictionary with requests sent and connections opened; the remaining
+        requests reused a kept-alive connection
+    """
+    sent = 0
+    opened = 0
+    for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                sent += pool.num_requests
+                opened += pool.num_connections
+    return {"requests": sent, "connections_opened": opened, "connections_reused": max(sent - opened, 0)}
+
+
+def _pool_samples(field: str) -> Iterator[Tuple[Tuple[str], int]]:
+    """Collect a connection counter of every pooled session for /metrics."""
+    for name, session in list(_sessions.items()):
+        yield (name,), session_pool_stats(session)[field]
+    for name, client in list(_async_clients.items()):
+        yield (name,), client.pool_stats()[field]
+
+
+REGISTRY.callback("http_client_requests_total", "Requests sent by outbound HTTP clients", "counter",
+                  ("client",), lambda: _pool_samples("requests"))
+REGISTRY.callback("http_client_connections_opened_total", "Connections opened by outbound HTTP clients",
+                  "counter", ("client",), lambda: _pool_samples("connections_opened"))
+REGISTRY.callback("http_client_connections_reused_total",
+                  "Requests sent by outbound HTTP clients over a kept-alive connection", "counter",
+                  ("client",), lambda: _pool_samples("connections_reused"))
+
+
+def error_status_code(error: Exception) -> Optional[int]:
+    """
+    Get the HTTP status code of a failed request.
+
+    Args:
+        error: Exception raised by requests or aiohttp
+
+    Returns:
+        Status code of the error response, or None if no response was received
+    """
+    response = getattr(error, "response", None)
+    if response is not None:
+        return response.status_code
+    # aiohttp.ClientResponseError
+    return getattr(error, "status", None)
+
+
+def message_dedup_key(message_id: Optional[str], whatsapp_number: Optional[str], text: str,
+                      timestamp: Optional[str]) -> Optional[str]:
+    """
+    Build the key identifying repeated deliveries of one webhook message.
+
+    Args:
+        message_id: Wati message ID, if the event has one
+        whatsapp_number: WhatsApp number of the sender
+        text: Message text
+        timestamp: Message timestamp, if the event has one
+
+    Returns:
+        The message ID, or a hash of sender, text and timestamp without an ID;
+        None if there is neither, as repeated messages could not be told apart from redeliveries
+    """
+    if message_id:
+        return f"id:{message_id}"
+    if timestamp is None:
+        return None
+    digest = hashlib.blake2b(f"{whatsapp_number}\0{text}\0{timestamp}".encode(), digest_size=16).hexdigest()
+    return f"hash:{digest}"
+
+
+def webhook_message_key(message_data: Dict[str, Any]) -> Optional[str]:
+    """
+    Build the deduplication key of a webhook message event, see message_dedup_key.
+
+    Args:
+        message_data: Message data from Wati webhook
+
+    Returns:
+        Deduplication key, or None if the event carries neither an ID nor a timestamp
+    """
+    payload = message_data.get("payload", {})
+    message_id = (message_data.get("id") or message_data.get("whatsappMessageId")
+                  or payload.get("id") or payload.get("whatsappMessageId"))
+    timestamp = message_data.get("timestamp") or payload.get("timestamp")
+    return message_dedup_key(message_id, message_data.get("userData", {}).get("waId"), payload.get("text", ""),
+                             None if timestamp is None else str(timestamp))
+
+
+def template_message_payload(whatsapp_number: str, template_name: str, parameters: List[str]) -> Dict[str, Any]:
+    """Build the body of a sendTemplateMessage request."""
+    return {
+        "whatsappNumber": whatsapp_number,
+        "templateName": template_name,
+        "broadcastName": f"linkedin_bot_{template_name}_{whatsapp_number}",
+        "parameters": [{"name": f"{{{{1}}}}", "value": param} for param in parameters]
+    }
+
+
 class WatiAPIClient:
-    def __init__(self, api_key: str, base_url: str = "https://api.wati.io/api/v1"):
+    def __init__(self, api_key: str, base_url: str = "https://api.wati.io/api/v1", pool_size: int = 10,
+                 timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT):
         """
         Initialize the Wati API client.
 
         Args:
             api_key: Wati API key
             base_url: Wati API base URL
+            pool_size: Maximum number of kept-alive connections to the Wati API
+            timeout: Request timeout in seconds, or a (connect, read) tuple
         """
         self.api_key = api_key
         self.base_url = base_url
+        self.timeout = timeout
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        # Reuses connections, so only the first request to the API pays for the TCP and TLS handshakes
+        self.session = create_session("wati_api", pool_size)
+        self.session.headers.update(self.headers)
+
+    def pool_stats(self) -> Dict[str, int]:
+        """
+        Get connection reuse counters of the Wati API session.
+
+        Returns:
+            Dictionary with requests sent, connections opened and connections reused
+        """
+        return session_pool_stats(self.session)
+
+    def close(self) -> None:
+        """Close the kept-alive connections."""
+        self.session.close()
 
     def send_message(self, whatsapp_number: str, message: str) -> Dict[str, Any]:
         """
@@ -42,7 +210,7 @@ class WatiAPIClient:
             message: Message text
 
         Returns:
-            Response from Wati API
+            Response from Wati API, or a dictionary with the error and the HTTP status code, if any
         """
         endpoint = f"{self.base_url}/sendSessionMessage/{whatsapp_number}"
         payload = {
@@ -50,12 +218,12 @@ class WatiAPIClient:
         }
 
         try:
-            response = requests.post(endpoint, headers=self.headers, json=payload)
+            response = self.session.post(endpoint, json=payload, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             logger.error(f"Error sending message to {whatsapp_number}: {str(e)}")
-            return {"error": str(e)}
+            return {"error": str(e), "status_code": error_status_code(e)}
 
     def send_template_message(
         self,
@@ -75,20 +243,15 @@ class WatiAPIClient:
             Response from Wati API
         """
         endpoint = f"{self.base_url}/sendTemplateMessage"
-        payload = {
-            "whatsappNumber": whatsapp_number,
-            "templateName": template_name,
-            "broadcastName": f"linkedin_bot_{template_name}_{whatsapp_number}",
-            "parameters": [{"name": f"{{{{1}}}}", "value": param} for param in parameters]
-        }
+        payload = template_message_payload(whatsapp_number, template_name, parameters)
 
         try:
-            response = requests.post(endpoint, headers=self.headers, json=payload)
+            response = self.session.post(endpoint, json=payload, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             logger.error(f"Error sending template message to {whatsapp_number}: {str(e)}")
-            return {"error": str(e)}
+            return {"error": str(e), "status_code": error_status_code(e)}
 
     def get_conversations(self, page_size: int = 10, page_number: int = 1) -> Dict[str, Any]:
         """
@@ -104,12 +267,12 @@ class WatiAPIClient:
         endpoint = f"{self.base_url}/getMessages/{page_size}/{page_number}"
 
         try:
-            response = requests.get(endpoint, headers=self.headers)
+            response = self.session.get(endpoint, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             logger.error(f"Error getting conversations: {str(e)}")
-            return {"error": str(e)}
+            return {"error": str(e), "status_code": error_status_code(e)}
 
     def get_conversation_messages(
         self,
@@ -131,12 +294,12 @@ class WatiAPIClient:
         endpoint = f"{self.base_url}/getMessagesWithContact/{whatsapp_number}/{page_size}/{page_number}"
 
         try:
-            response = requests.get(endpoint, headers=self.headers)
+            response = self.session.get(endpoint, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             logger.error(f"Error getting messages for {whatsapp_number}: {str(e)}")
-            return {"error": str(e)}
+            return {"error": str(e), "status_code": error_status_code(e)}
 
     def create_custom_webhook(self, webhook_url: str, events: List[str]) -> Dict[str, Any]:
         """
@@ -185,12 +348,182 @@ class WatiAPIClient:
         }
 
 
+class AsyncWatiAPIClient:
+    def __init__(self, api_key: str, base_url: str = "https://api.wati.io/api/v1", pool_size: int = 10,
+                 timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT, name: str = "wati_api_async"):
+        """
+        Initialize the asyncio Wati API client.
+
+        Requests are sent without blocking the event loop over a pool of
+        kept-alive connections, so many messages can be in flight at once.
+        Create the client inside the event loop that uses it. Requires the
+        aiohttp package.
+
+        Args:
+            api_key: Wati API key
+            base_url: Wati API base URL
+            pool_size: Maximum number of concurrent connections to the Wati API;
+                further requests wait for a free connection
+            timeout: Request timeout in seconds, or a (connect, read) tuple
+            name: Client name under which the connection pool is reported
+
+        Raises:
+            ImportError: If aiohttp is not installed
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncWatiAPIClient requires the aiohttp package (pip install aiohttp)")
+
+        self.api_key = api_key
+        self.base_url = base_url
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        self.requests_sent = 0
+        self.connections_opened = 0
+        self.connections_reused = 0
+
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_create_end.append(self._connection_created)
+        trace.on_connection_reuseconn.append(self._connection_reused)
+        connect_timeout, read_timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        self.session = aiohttp.ClientSession(
+            headers=self.headers,
+            connector=aiohttp.TCPConnector(limit=pool_size, limit_per_host=pool_size),
+            # Waiting for a free pooled connection is bounded by the read timeout
+            timeout=aiohttp.ClientTimeout(connect=read_timeout, sock_connect=connect_timeout, sock_read=read_timeout),
+            trace_configs=[trace]
+        )
+        _async_clients[name] = self
+
+    async def _connection_created(self, session, context, params) -> None:
+        self.connections_opened += 1
+
+    async def _connection_reused(self, session, context, params) -> None:
+        self.connections_reused += 1
+
+    async def _request(self, method: str, endpoint: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Send a request and decode the JSON response, raising on HTTP errors and timeouts."""
+        self.requests_sent += 1
+        async with self.session.request(method, endpoint, json=payload) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def send_message(self, whatsapp_number: str, message: str) -> Dict[str, Any]:
+        """
+        Send a message to a WhatsApp number via Wati.
+
+        Args:
+            whatsapp_number: WhatsApp number to send the message to
+            message: Message text
+
+        Returns:
+            Response from Wati API, or a dictionary with the error and the HTTP status code, if any
+        """
+        endpoint = f"{self.base_url}/sendSessionMessage/{whatsapp_number}"
+        try:
+            return await self._request("POST", endpoint, {"messageText": message})
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.error(f"Error sending message to {whatsapp_number}: {str(e)}")
+            return {"error": str(e), "status_code": error_status_code(e)}
+
+    async def send_template_message(
+        self,
+        whatsapp_number: str,
+        template_name: str,
+        parameters: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Send a template message to a WhatsApp number via Wati.
+
+        Args:
+            whatsapp_number: WhatsApp number to send the message to
+            template_name: Name of the template to use
+            parameters: List of parameter values for the template
+
+        Returns:
+            Response from Wati API
+        """
+        endpoint = f"{self.base_url}/sendTemplateMessage"
+        payload = template_message_payload(whatsapp_number, template_name, parameters)
+        try:
+            return await self._request("POST", endpoint, payload)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.error(f"Error sending template message to {whatsapp_number}: {str(e)}")
+            return {"error": str(e), "status_code": error_status_code(e)}
+
+    async def get_conversations(self, page_size: int = 10, page_number: int = 1) -> Dict[str, Any]:
+        """
+        Get conversations from Wati.
+
+        Args:
+            page_size: Number of conversations per page
+            page_number: Page number
+
+        Returns:
+            Response from Wati API
+        """
+        endpoint = f"{self.base_url}/getMessages/{page_size}/{page_number}"
+        try:
+            return await self._request("GET", endpoint)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.error(f"Error getting conversations: {str(e)}")
+            return {"error": str(e), "status_code": error_status_code(e)}
+
+    async def get_conversation_messages(
+        self,
+        whatsapp_number: str,
+        page_size: int = 10,
+        page_number: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Get messages from a specific conversation.
+
+        Args:
+            whatsapp_number: WhatsApp number of the conversation
+            page_size: Number of messages per page
+            page_number: Page number
+
+        Returns:
+            Response from Wati API
+        """
+        endpoint = f"{self.base_url}/getMessagesWithContact/{whatsapp_number}/{page_size}/{page_number}"
+        try:
+            return await self._request("GET", endpoint)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.error(f"Error getting messages for {whatsapp_number}: {str(e)}")
+            return {"error": str(e), "status_code": error_status_code(e)}
+
+    def pool_stats(self) -> Dict[str, int]:
+        """
+        Get connection reuse counters.
+
+        Returns:
+            Dictionary with requests sent, connections opened and connections reused
+        """
+        return {
+            "requests": self.requests_sent,
+            "connections_opened": self.connections_opened,
+            "connections_reused": self.connections_reused
+        }
+
+    async def close(self) -> None:
+        """Close the kept-alive connections."""
+        await self.session.close()
+
+
 class LinkedInBotWatiIntegration:
     def __init__(
         self,
         wati_api_key: str,
         bot_api_url: str = "http://localhost:8000",
-        wati_api_url: str = "https://api.wati.io/api/v1"
+        wati_api_url: str = "https://api.wati.io/api/v1",
+        pool_size: int = 10,
+        timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+        dispatcher_options: Optional[Dict[str, Any]] = None,
+        processor=None,
+        dedup_size: int = 50000,
+        dedup_ttl: float = 600.0
     ):
         """
         Initialize the LinkedIn Bot Wati integration.
@@ -199,9 +532,36 @@ class LinkedInBotWatiIntegration:
             wati_api_key: Wati API key
             bot_api_url: LinkedIn Bot API URL
             wati_api_url: Wati API URL
+            pool_size: Maximum number of kept-alive connections to each of the Wati and bot APIs
+            timeout: Request timeout in seconds, or a (connect, read) tuple
+            dispatcher_options: Optional OutboundDispatcher keyword arguments for sending replies
+            processor: Optional ProfileQueryProcessor running in this process; when given,
+                queries are answered by it directly instead of through the bot API
+            dedup_size: Maximum number of message keys remembered to ignore redelivered messages
+            dedup_ttl: Seconds a message key is remembered; 0 disables deduplication
         """
-        self.wati_client = WatiAPIClient(wati_api_key, wati_api_url)
+        self.wati_client = WatiAPIClient(wati_api_key, wati_api_url, pool_size, timeout)
         self.bot_api_url = bot_api_url
+        self.processor = processor
+        self.seen_messages = DedupCache(dedup_size, dedup_ttl) if dedup_ttl > 0 else None
+        self.timeout = timeout
+        self.bot_session = create_session("bot_api", pool_size)
+        # Replies are queued and sent by a background dispatcher, which rate limits and retries them
+        options = {"concurrency": pool_size, "name": "wati_integration"}
+        options.update(dispatcher_options or {})
+        self.dispatcher = OutboundDispatcher(self.wati_client.send_message, **options)
+        self.dispatcher.start_in_thread()
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """
+        Send the queued replies and close the kept-alive connections to the Wati and bot APIs.
+
+        Args:
+            timeout: Maximum seconds to wait for queued replies, or None to wait indefinitely
+        """
+        self.dispatcher.close_threadsafe(timeout)
+        self.wati_client.close()
+        self.bot_session.close()
 
     def setup_webhook(self, webhook_url: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -221,6 +581,31 @@ class LinkedInBotWatiIntegration:
 
         return self.wati_client.create_custom_webhook(webhook_url, events)
 
+    def query_bot(self, query: str, whatsapp_number: str) -> Dict[str, Any]:
+        """
+        Answer a query with the in-process processor, or through the bot API if there is none.
+
+        Args:
+            query: Message text
+            whatsapp_number: WhatsApp number of the sender
+
+        Returns:
+            Query result, as returned by the bot API's /query endpoint
+        """
+        if self.processor is not None:
+            return self.processor.process_query(query)
+
+        endpoint = f"{self.bot_api_url}/query"
+        payload = {
+            "query": query,
+            "user_id": whatsapp_number,
+            "session_id": whatsapp_number
+        }
+
+        response = self.bot_session.post(endpoint, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
     def process_incoming_message(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Process an incoming message from Wati.
@@ -231,6 +616,11 @@ class LinkedInBotWatiIntegration:
         Returns:
             Response from bot API
         """
+        # Wati redelivers events it saw no timely response to; answer each message once
+        message_key = webhook_message_key(message_data) if self.seen_messages is not None else None
+        if message_key is not None and not self.seen_messages.add(message_key):
+            return {"status": "duplicate"}
+
         try:
             # Extract message text and WhatsApp number
             message_text = message_data.get("payload", {}).get("text", "")
@@ -240,17 +630,7 @@ class LinkedInBotWatiIntegration:
                 logger.warning(f"Missing message text or WhatsApp number: {message_data}")
                 return {"error": "Missing message text or WhatsApp number"}
 
-            # Send query to bot API
-            endpoint = f"{self.bot_api_url}/query"
-            payload = {
-                "query": message_text,
-                "user_id": whatsapp_number,
-                "session_id": whatsapp_number
-            }
-
-            response = requests.post(endpoint, json=payload)
-            response.raise_for_status()
-            result = response.json()
+            result = self.query_bot(message_text, whatsapp_number)
 
             # Send response back to user via Wati
             if result.get("success"):
@@ -259,15 +639,19 @@ class LinkedInBotWatiIntegration:
                 available_profiles = ", ".join(result.get("available_profiles", []))
                 response_text = f"{result['error']}. Available profiles: {available_profiles}"
 
-            self.wati_client.send_message(whatsapp_number, response_text)
+            queued = self.dispatcher.submit_threadsafe(whatsapp_number, response_text)
 
             return {
                 "status": "success",
                 "whatsapp_number": whatsapp_number,
-                "query_result": result
+                "query_result": result,
+                "reply": "queued" if queued else "dropped"
             }
         except Exception as e:
             logger.error(f"Error processing incoming message: {str(e)}")
+            if message_key is not None:
+                # Let a redelivery of the message try again
+                self.seen_messages.discard(message_key)
             return {"error": str(e)}
 
 
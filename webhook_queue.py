@@ -0,0 +1,175 @@
+"""
+Webhook Queue
+
+This module lets a webhook endpoint acknowledge events as soon as they are
+validated and process them afterwards. Events are put on a bounded asyncio
+queue and handled by a fixed number of consumer tasks, so slow processing
+no longer delays the response and the sender does not retry events that
+are still being processed.
+
+When the queue is full, the overflow policy decides what happens to a new
+event: "reject" refuses it, so the endpoint can ask the sender to retry
+later; "drop_oldest" discards the oldest queued event to make room; and
+"drop_newest" discards the new event.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_QUEUE_SECONDS = REGISTRY.histogram(
+    "webhook_queue_wait_seconds", "Time webhook events waited in the queue before processing",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+WEBHOOK_PROCESSED = REGISTRY.counter(
+    "webhook_events_processed_total", "Queued webhook events processed", ("outcome",)
+)
+WEBHOOK_DROPPED = REGISTRY.counter(
+    "webhook_events_dropped_total", "Webhook events dropped or rejected without being processed", ("reason",)
+)
+
+OVERFLOW_POLICIES = ("reject", "drop_oldest", "drop_newest")
+
+
+class WebhookQueue:
+    def __init__(self, handler: Callable[[Any], Awaitable[Any]], max_size: int = 1000, consumers: int = 8,
+                 overflow: str = "reject", on_drop: Optional[Callable[[Any], None]] = None):
+        """
+        Initialize the queue. Call start() from the event loop that should run it.
+
+        Args:
+            handler: Coroutine function processing one event
+            max_size: Maximum number of events waiting to be processed
+            consumers: Number of events processed at the same time
+            overflow: What to do with a new event when the queue is full: "reject",
+                "drop_oldest" or "drop_newest"
+            on_drop: Optional callback invoked with a queued event that is dropped to make
+                room for a new one, e.g. to forget that the event was accepted
+        """
+        if max_size <= 0 or consumers <= 0:
+            raise ValueError("max_size and consumers must be positive")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {', '.join(OVERFLOW_POLICIES)}")
+
+        self.handler = handler
+        self.max_size = max_size
+        self.consumers = consumers
+        self.overflow = overflow
+        self.on_drop = on_drop
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumers = []
+        self._closed = False
+        self._processing = 0
+        self.processed = 0
+        self.failed = 0
+        self.dropped: Dict[str, int] = {}
+
+    def start(self) -> None:
+        """Start the consumer tasks on the running event loop."""
+        self._queue = asyncio.Queue(self.max_size)
+        self._consumers = [asyncio.ensure_future(self._consume()) for _ in range(self.consumers)]
+
+    @property
+    def depth(self) -> int:
+        """Number of events queued or being processed."""
+        return (self._queue.qsize() if self._queue else 0) + self._processing
+
+    def submit(self, event: Any) -> bool:
+        """
+        Queue an event for processing. Must be called from the queue's event loop.
+
+        Args:
+            event: Event passed to the handler
+
+        Returns:
+            True if the event was queued, False if it was rejected or dropped
+        """
+        if self._closed:
+            self._drop("closed")
+            return False
+
+        if self._queue.full():
+            if self.overflow == "reject":
+                self._drop("rejected")
+                return False
+            if self.overflow == "drop_newest":
+                self._drop("overflow")
+                return False
+            # drop_oldest: the newest events are the ones still worth answering
+            _, dropped = self._queue.get_nowait()
+            self._queue.task_done()
+            self._drop("overflow")
+            if self.on_drop:
+                try:
+                    self.on_drop(dropped)
+                except Exception as e:
+                    logger.error(f"Webhook drop callback failed: {str(e)}")
+
+        self._queue.put_nowait((time.perf_counter(), event))
+        return True
+
+    async def _consume(self) -> None:
+        """Process queued events one at a time."""
+        while True:
+            queued_at, event = await self._queue.get()
+            self._processing += 1
+            WEBHOOK_QUEUE_SECONDS.observe(time.perf_counter() - queued_at)
+            try:
+                await self.handler(event)
+                self.processed += 1
+                WEBHOOK_PROCESSED.labels("success").inc()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Processing webhook event failed: {str(e)}")
+                self.failed += 1
+                WEBHOOK_PROCESSED.labels("error").inc()
+            finally:
+                self._processing -= 1
+                self._queue.task_done()
+
+    def _drop(self, reason: str) -> None:
+        self.dropped[reason] = self.dropped.get(reason, 0) + 1
+        WEBHOOK_DROPPED.labels(reason).inc()
+
+    async def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop accepting events, wait for queued events to be processed and stop the consumers.
+
+        Events still queued after the timeout are dropped.
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+        """
+        self._closed = True
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self.depth} webhook events that were not processed before shutdown")
+            for _ in range(self.depth):
+                self._drop("shutdown")
+        for consumer in self._consumers:
+            consumer.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers = []
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get queue counters.
+
+        Returns:
+            Dictionary with queued, processed and failed events and drops by reason
+        """
+        return {
+            "queued": self.depth,
+            "processed": self.processed,
+            "failed": self.failed,
+            "dropped": dict(self.dropped)
+        }